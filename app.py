@@ -1,5 +1,5 @@
 # waiting/app.py - Kiosk Queue Management Application
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context, g
 import os
 import logging
 from logging.handlers import RotatingFileHandler
@@ -7,16 +7,24 @@ import html
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import threading
+import queue
+import asyncio
 from cachetools import TTLCache
 
 load_dotenv()
 
 # Import database functions
 import database
+from queue_events import QueueWatcher
+from prefetch_service import PrefetchService
+from async_bridge import AsyncBridge
+from circuit_breaker import STATE_CLOSED, STATE_OPEN
+import deadline
 
 # Import DNA API Client
 try:
     from dna_client import DNAApiClient, DNAApiError
+    from dna_async_client import AsyncDNAClient
     DNA_CLIENT_AVAILABLE = True
     logging.info("Successfully imported DNAApiClient.")
 except ImportError:
@@ -32,18 +40,20 @@ except Exception as e:
 
 # Import MeridianLink API Client
 try:
-    from meridian_link_client import MeridianLinkClient, MeridianLinkError
+    from meridian_link_client import MeridianLinkClient, MeridianLinkError, ssn_key
     ML_CLIENT_AVAILABLE = True
     logging.info("Successfully imported MeridianLinkClient.")
 except ImportError:
     logging.error("CRITICAL: Could not import meridian_link_client.py. MeridianLink API features will be disabled.")
     MeridianLinkClient = None
     MeridianLinkError = Exception
+    ssn_key = None
     ML_CLIENT_AVAILABLE = False
 except Exception as e:
     logging.error(f"CRITICAL: Error importing MeridianLinkClient: {e}", exc_info=True)
     MeridianLinkClient = None
     MeridianLinkError = Exception
+    ssn_key = None
     ML_CLIENT_AVAILABLE = False
 
 # Initialize Flask App
@@ -74,36 +84,140 @@ logging.getLogger("urllib3").setLevel(logging.WARNING)
 # ─── CACHES ────────────────────────────────────────────────────────────────────
 dna_cache = TTLCache(maxsize=200, ttl=3600)   # 1 hr
 transaction_cache = TTLCache(maxsize=500, ttl=600)   # 10 min
+# Per-account (limit, transactions) kept much longer than transaction_cache so a refresh only asks DNA for new activity
+TRANSACTION_HISTORY_TTL = float(os.getenv('TRANSACTION_HISTORY_TTL', 86400))
+transaction_history_cache = TTLCache(maxsize=int(os.getenv('TRANSACTION_HISTORY_MAX_ACCOUNTS', 5000)), ttl=TRANSACTION_HISTORY_TTL)
 insight_cache = TTLCache(maxsize=100, ttl=600)   # 10 min
-
-# --- Prefetch Locking ---
-prefetch_locks = set()
-recent_prefetches = TTLCache(maxsize=200, ttl=60) # Track recent prefetches for 60 seconds
+# MeridianLink search results (loan lists) keyed by an HMAC of the SSN (meridian_link_client.ssn_key)
+ML_CACHE_TTL = float(os.getenv('ML_CACHE_TTL', 600))
+ML_CACHE_MAX_ENTRIES = int(os.getenv('ML_CACHE_MAX_ENTRIES', 500))
+ml_cache = TTLCache(maxsize=ML_CACHE_MAX_ENTRIES, ttl=ML_CACHE_TTL)
+# Member number -> ml_cache key, so a member's loans can be dropped without its (possibly expired) DNA details
+ml_cache_members = TTLCache(maxsize=ML_CACHE_MAX_ENTRIES, ttl=ML_CACHE_TTL)
+
+# --- Live Queue Updates ---
+QUEUE_WATCH_INTERVAL = float(os.getenv('QUEUE_WATCH_INTERVAL', 3))         # Seconds between change-feed polls (per server)
+QUEUE_STREAM_HEARTBEAT = float(os.getenv('QUEUE_STREAM_HEARTBEAT', 15))    # Keep-alive comment interval on idle SSE streams
+QUEUE_LONG_POLL_MAX = float(os.getenv('QUEUE_LONG_POLL_MAX', 25))          # Longest a long-poll request may block
+
+# --- Background Prefetch ---
+PREFETCH_WORKERS = int(os.getenv('PREFETCH_WORKERS', 2))             # Concurrent DNA prefetches
+PREFETCH_MAX_QUEUE = int(os.getenv('PREFETCH_MAX_QUEUE', 500))       # Members waiting to be prefetched before new work is dropped
+PREFETCH_RECENT_TTL = float(os.getenv('PREFETCH_RECENT_TTL', 60))    # Seconds a completed prefetch is not repeated
+PREFETCH_MEMBER_INFO_BATCH = int(os.getenv('PREFETCH_MEMBER_INFO_BATCH', 10))   # Queued members looked up together in one bulk DNA member-info call
+PREFETCH_NEW_ARRIVAL_POSITION = 1000000  # Check-ins seen on the change feed queue behind anything a dashboard listed
+
+# Upstream HTTP pools are sized for the prefetch workers plus this many concurrent web requests
+HTTP_REQUEST_THREADS = int(os.getenv('HTTP_REQUEST_THREADS', 8))
+
+# Concurrent upstream fan-out for member_details
+MEMBER_DETAILS_TIMEOUT = float(os.getenv('MEMBER_DETAILS_TIMEOUT', 90))   # Longest the page waits for MeridianLink + transactions
+
+# Latency budgets: total seconds a route may spend on DNA/MeridianLink calls (0 = no budget). Each call
+# gets the time left as its timeout; when it runs out the route answers with cached or partial data.
+MEMBER_DETAILS_BUDGET = float(os.getenv('MEMBER_DETAILS_BUDGET', 20))
+UPDATE_MEMBER_BUDGET = float(os.getenv('UPDATE_MEMBER_BUDGET', 20))
+MEMBER_API_BUDGET = float(os.getenv('MEMBER_API_BUDGET', 10))   # /api/member and /get_transactions
+ROUTE_LATENCY_BUDGETS = {
+    'member_details': MEMBER_DETAILS_BUDGET,
+    'update_member_number': UPDATE_MEMBER_BUDGET,
+    'get_member_data': MEMBER_API_BUDGET,
+    'get_transactions': MEMBER_API_BUDGET,
+}
+LATENCY_BUDGET_GRACE = 1.0   # Extra seconds member_details waits for calls that were cut short to return
 
 # Configuration for insights
 INSIGHTS_TRANSACTION_DAYS = int(os.getenv('INSIGHTS_TRANSACTION_DAYS', 30))
 
 def filter_recent_transactions(transactions, days=30):
-    """Filter transactions to only include those from the last N days."""
+    """Filter transactions to only include those from the last N days. Undated transactions are kept."""
     if not transactions:
         return []
-    
-    cutoff_date = datetime.now() - timedelta(days=days)
-    recent_transactions = []
-    
-    for tx in transactions:
-        tx_date_str = tx.get('date', '')
-        if tx_date_str:
-            try:
-                tx_date = datetime.strptime(tx_date_str, '%Y-%m-%d')
-                if tx_date >= cutoff_date:
-                    recent_transactions.append(tx)
-            except ValueError:
-                recent_transactions.append(tx)
+
+    # A transaction dated D is kept when midnight of D is on or after the cutoff
+    cutoff = datetime.now() - timedelta(days=days)
+    first_day = cutoff.date()
+    if cutoff.time() != datetime.min.time():
+        first_day += timedelta(days=1)
+    return [tx for tx in transactions if tx.date is None or tx.date >= first_day]
+
+def fetch_account_transactions(account_numbers, limit, log_prefix):
+    """
+    Fetches transactions for several accounts with bulk DNA requests. Accounts with a cached history are
+    refreshed incrementally; the rest are fetched in full. Returns account number -> list, using [] for
+    accounts whose transactions could not be retrieved (as the per-account loops did).
+    """
+    account_numbers = [str(acct) for acct in account_numbers if acct]
+    if not account_numbers:
+        return {}
+    history, full = _split_cached_histories(account_numbers, limit)
+    refreshed = fetched = {}
+    if history:
+        try:
+            refreshed = dna_client.refresh_financial_transactions_bulk(history)
+        except Exception as tx_e:
+            logging.error(f"{log_prefix} Error refreshing transactions for accounts {list(history)}: {tx_e}", exc_info=True)
+            refreshed = None
+    if full:
+        try:
+            fetched = dna_client.get_financial_transactions_bulk(full, limit=limit)
+        except Exception as tx_e:
+            logging.error(f"{log_prefix} Error fetching transactions for accounts {full}: {tx_e}", exc_info=True)
+            fetched = None
+    return _transactions_by_account(account_numbers, limit, history, refreshed, fetched, log_prefix)
+
+async def fetch_account_transactions_async(account_numbers, limit, log_prefix, limiter=None):
+    """Async counterpart of fetch_account_transactions; the refresh and the full fetches run concurrently."""
+    account_numbers = [str(acct) for acct in account_numbers if acct]
+    if not account_numbers:
+        return {}
+    history, full = _split_cached_histories(account_numbers, limit)
+
+    async def nothing():
+        return {}
+    refreshed, fetched = await asyncio.gather(
+        dna_async.refresh_financial_transactions_bulk(history, limiter=limiter) if history else nothing(),
+        dna_async.get_financial_transactions_bulk(full, limit=limit, limiter=limiter) if full else nothing(),
+        return_exceptions=True)
+    # Each half fails on its own, so a failed full fetch keeps the refreshed histories and vice versa
+    if isinstance(refreshed, Exception):
+        logging.error(f"{log_prefix} Error refreshing transactions for accounts {list(history)}: {refreshed}", exc_info=refreshed)
+        refreshed = None
+    if isinstance(fetched, Exception):
+        logging.error(f"{log_prefix} Error fetching transactions for accounts {full}: {fetched}", exc_info=fetched)
+        fetched = None
+    return _transactions_by_account(account_numbers, limit, history, refreshed, fetched, log_prefix)
+
+def _split_cached_histories(account_numbers, limit):
+    """Splits accounts into ({account: (limit, cached transactions)} that can be refreshed, [accounts to fetch in full])."""
+    history, full = {}, []
+    for acct in account_numbers:
+        entry = transaction_history_cache.get(acct)
+        if entry is not None and entry[0] >= limit:
+            history[acct] = entry
         else:
-            recent_transactions.append(tx)
-    
-    return recent_transactions
+            full.append(acct)
+    return history, full
+
+def _transactions_by_account(account_numbers, limit, history, refreshed, fetched, log_prefix):
+    if refreshed is None:
+        logging.warning(f"{log_prefix} Transaction refresh failed for accounts {list(history)}")
+        refreshed = {}
+    if fetched is None:
+        logging.warning(f"{log_prefix} Bulk transaction fetch failed for accounts {[acct for acct in account_numbers if acct not in history]}")
+        fetched = {}
+    results = {}
+    for acct in account_numbers:
+        if acct in history:
+            stored_limit, transactions = history[acct][0], refreshed.get(acct)
+        else:
+            stored_limit, transactions = limit, fetched.get(acct)
+        if transactions is None:
+            results[acct] = []
+            continue
+        transaction_history_cache[acct] = (stored_limit, transactions)
+        results[acct] = transactions[:limit]
+    return results
 
 # --- Initialize DNA Client ---
 dna_client = None
@@ -112,12 +226,16 @@ if DNA_CLIENT_AVAILABLE:
     try:
         dna_verify_ssl = os.getenv('DNA_VERIFY_SSL', 'false').lower() == 'true'
         logger.info("Attempting to initialize DNAApiClient...")
-        dna_client = DNAApiClient(logger=logger, verify_ssl=dna_verify_ssl)
+        dna_client = DNAApiClient(logger=logger, verify_ssl=dna_verify_ssl, pool_size=PREFETCH_WORKERS + HTTP_REQUEST_THREADS)
         logger.info(f"DNAApiClient object created successfully (Verify SSL: {dna_verify_ssl}).")
     except (ValueError, DNAApiError, Exception) as e:
         logger.error(f"Failed to initialize DNAApiClient: {e}", exc_info=True)
         dna_client = None
 
+# Async front end used to run one member's upstream calls concurrently from synchronous views
+dna_async = AsyncDNAClient(dna_client) if dna_client else None
+upstream_bridge = AsyncBridge(name='upstream-fanout')
+
 # --- Initialize MeridianLink Client ---
 ml_client = None
 if ML_CLIENT_AVAILABLE:
@@ -125,17 +243,81 @@ if ML_CLIENT_AVAILABLE:
     try:
         ml_verify_ssl = os.getenv('ML_VERIFY_SSL', 'false').lower() == 'true'
         logger.info("Attempting to initialize MeridianLinkClient...")
-        ml_client = MeridianLinkClient(logger=logger, verify_ssl=ml_verify_ssl)
+        ml_client = MeridianLinkClient(logger=logger, verify_ssl=ml_verify_ssl, pool_size=PREFETCH_WORKERS + HTTP_REQUEST_THREADS)
         logger.info(f"MeridianLinkClient object created successfully (Verify SSL: {ml_verify_ssl}).")
     except (MeridianLinkError, Exception) as e:
         logger.error(f"Failed to initialize MeridianLinkClient: {e}", exc_info=True)
         ml_client = None
 
+# --- Upstream availability ---
+def dna_circuit_state():
+    """Circuit breaker state of the DNA core endpoint ('closed' when it is not known to be failing)."""
+    if not dna_client or not dna_client.dna_endpoint:
+        return STATE_CLOSED
+    return dna_client.transport.circuit_state(dna_client.dna_endpoint)
+
+def ml_circuit_state():
+    """Circuit breaker state of the MeridianLink search endpoint."""
+    if not ml_client or not ml_client.api_url:
+        return STATE_CLOSED
+    return ml_client.transport.circuit_state(ml_client.api_url)
+
+# --- MeridianLink result cache ---
+def query_meridian_link_cached(ssn, member_number, refresh=False):
+    """
+    ml_client.query_meridian_link through ml_cache, shared by the member routes and the prefetch.
+    Answers, including "no loans" ([]), are cached; failed lookups (None) are not, so the next request
+    retries them. refresh=True skips the cached entry and replaces it. member_number is the member the
+    SSN belongs to, recorded so invalidate_member_caches can find the entry.
+    """
+    key = ssn_key(ssn)
+    loans = None if refresh else ml_cache.get(key)
+    if loans is None:
+        loans = ml_client.query_meridian_link(ssn)
+        if loans is not None:
+            ml_cache[key] = loans
+    if loans is not None and member_number:
+        ml_cache_members[member_number] = key
+    return loans
+
+def invalidate_member_caches(member_number):
+    """
+    Drops the cached DNA details, transactions and MeridianLink results of a member number, and lets the
+    prefetch service queue it again straight away instead of after PREFETCH_RECENT_TTL.
+    """
+    details = dna_cache.pop(member_number, None)
+    transaction_cache.pop(member_number, None)
+    key = ml_cache_members.pop(member_number, None)
+    if key:
+        ml_cache.pop(key, None)
+    if ssn_key and details and details.get('ssn'):
+        ml_cache.pop(ssn_key(details['ssn']), None)
+    _prefetch_member_info_misses.pop(member_number, None)
+    prefetch_service.forget(member_number)
+
+# --- Latency budgets ---
+@app.before_request
+def start_latency_budget():
+    g.latency_budget_token = deadline.start(ROUTE_LATENCY_BUDGETS.get(request.endpoint), request.endpoint)
+
+@app.teardown_request
+def finish_latency_budget(exc=None):
+    token = g.pop('latency_budget_token', None)
+    try:
+        deadline.finish(token)
+    except ValueError:
+        pass  # Torn down in a different context than it was started in; that context is discarded anyway
+
 # --- Context Processors ---
 @app.context_processor
 def inject_now():
     return {'now': datetime.now(datetime.UTC) if hasattr(datetime, 'UTC') else datetime.utcnow()}
 
+@app.context_processor
+def inject_upstream_status():
+    return {'upstream_status': {'dna': dna_circuit_state(), 'meridianlink': ml_circuit_state()},
+            'latency_budget_exceeded': deadline.exceeded()}
+
 @app.context_processor
 def inject_visitor_count():
     count = 0
@@ -150,6 +332,118 @@ def inject_visitor_count():
     return {'current_visitor_count': count}
 
 # --- Routes ---
+# --- Background Prefetch Service ---
+_prefetch_batch_lock = threading.Lock()
+_prefetch_member_info_misses = TTLCache(maxsize=max(PREFETCH_MAX_QUEUE, 200), ttl=PREFETCH_RECENT_TTL)  # Members DNA had no info for
+
+def _prefetch_member_info_batch(member_number_from_db):
+    """
+    Fetches DNA member info for this member together with the other members being prefetched or
+    queued for prefetching that are not cached yet, in one bulk 7725 call, and caches every member found.
+    Returns (person details or None, whether DNA answered for this member). Only a member DNA reported
+    as not found is remembered as a miss; members of a chunk that failed are left to be retried.
+    """
+    # One batch at a time, so other workers find their member cached instead of fetching it again
+    with _prefetch_batch_lock:
+        if member_number_from_db in dna_cache:
+            return dna_cache[member_number_from_db], True
+        if member_number_from_db in _prefetch_member_info_misses:
+            return None, True
+        batch = [member_number_from_db]
+        for pending_member in prefetch_service.pending_keys(PREFETCH_MEMBER_INFO_BATCH * 2):
+            if len(batch) >= PREFETCH_MEMBER_INFO_BATCH:
+                break
+            if (pending_member not in dna_cache and pending_member not in _prefetch_member_info_misses
+                    and pending_member not in batch):
+                batch.append(pending_member)
+        results = dna_client.get_member_info_bulk(batch)
+        if results is None:
+            return None, False
+        for member_number in batch:
+            details = results.get(str(member_number))
+            if details:
+                dna_cache[member_number] = details
+            elif str(member_number) in results:
+                _prefetch_member_info_misses[member_number] = True
+        if len(batch) > 1:
+            logging.info(f"[Dashboard Background] Pre-fetched DNA data for {len(batch)} waiting members in one bulk lookup")
+        return results.get(str(member_number_from_db)), str(member_number_from_db) in results
+
+def _prefetch_member(member_number_from_db, member_checkin_info):
+    """Warms the DNA and transaction caches for one waiting member. Runs on a PrefetchService worker."""
+    if not dna_client:
+        return
+    if dna_circuit_state() == STATE_OPEN:
+        logging.info(f"[Dashboard Background] DNA is unavailable; skipping pre-fetch for member {member_number_from_db}")
+        return
+    checkin_id = member_checkin_info.get('FacingMemberID')
+    logging.info(f"[Dashboard Background] Pre-fetching DNA data for member {member_number_from_db} (check-in {checkin_id})")
+    person_details = None
+    if member_number_from_db in dna_cache:
+        person_details = dna_cache[member_number_from_db]
+        logging.info(f"[Dashboard Background] Using cached DNA data for member {member_number_from_db}")
+    else:
+        try:
+            person_details, fetched = _prefetch_member_info_batch(member_number_from_db)
+            if not fetched:
+                person_details = dna_client.get_person_detail_by_member_number(member_number_from_db)
+            if person_details:
+                dna_cache[member_number_from_db] = person_details
+                logging.info(f"[Dashboard Background] Successfully pre-fetched DNA data for member {member_number_from_db}")
+        except AttributeError:
+            person_details = dna_client.get_member_info_with_person_lookup(member_number_from_db)
+            if person_details:
+                dna_cache[member_number_from_db] = person_details
+                logging.info(f"[Dashboard Background] Successfully pre-fetched DNA data for member {member_number_from_db} (fallback)")
+
+    if person_details and 'accounts' in person_details:
+        logging.info(f"[Dashboard Background] Pre-fetching transactions for all accounts of member {member_number_from_db}")
+        member_transactions = transaction_cache.get(member_number_from_db)
+        if member_transactions is None:
+            member_transactions = transaction_cache[member_number_from_db] = {}
+        account_numbers = [account.get('account_number') for account in person_details['accounts']]
+        missing = [acct for acct in account_numbers if acct and acct not in member_transactions]
+        if missing:
+            logging.info(f"[Dashboard Background] Fetching transactions for accounts {missing}")
+            member_transactions.update(fetch_account_transactions(missing, 50, "[Dashboard Background]"))
+        if len(missing) < len([acct for acct in account_numbers if acct]):
+            logging.info(f"[Dashboard Background] Using cached transactions for the remaining accounts of member {member_number_from_db}")
+        logging.info(f"[Dashboard Background] Completed pre-fetching transactions for member {member_number_from_db}")
+
+    if person_details and person_details.get('ssn') and ml_client and ml_circuit_state() != STATE_OPEN:
+        try:
+            loans = query_meridian_link_cached(person_details['ssn'], member_number_from_db)
+            if loans is not None:
+                logging.info(f"[Dashboard Background] MeridianLink results cached for member {member_number_from_db} ({len(loans)} loan(s))")
+        except Exception as ml_e:
+            logging.error(f"[Dashboard Background] Error pre-fetching MeridianLink data for member {member_number_from_db}: {ml_e}")
+
+prefetch_service = PrefetchService(_prefetch_member, workers=PREFETCH_WORKERS, max_queue=PREFETCH_MAX_QUEUE,
+                                   recent_ttl=PREFETCH_RECENT_TTL, name='dna-prefetch')
+
+def _queue_prefetch(waiting_members, start_position=0):
+    """Submits waiting check-ins to the prefetch service, prioritised by queue position then check-in time."""
+    queued = 0
+    for position, member_checkin_info in enumerate(waiting_members, start=start_position):
+        member_number_from_db = member_checkin_info.get('MemberNumber')
+        if not member_number_from_db:
+            logging.debug(f"[Dashboard Background] Skipping pre-fetch for check-in ID {member_checkin_info.get('FacingMemberID')} as no member number is set.")
+            continue
+        created = member_checkin_info.get('CreatedDate')
+        priority = (position, created.timestamp() if created else 0.0)
+        if prefetch_service.submit(member_number_from_db, priority, member_checkin_info):
+            queued += 1
+    return queued
+
+def _prefetch_new_arrivals(rows):
+    """Change-feed hook: prefetches members who checked in since dashboards last loaded."""
+    if not dna_client:
+        return
+    waiting_rows = [row for row in rows if database.normalize_status(row.get('Status')) == database.STATUS_WAITING]
+    waiting_rows.sort(key=lambda row: row.get('CreatedDate') or datetime.min)
+    if waiting_rows:
+        _queue_prefetch(waiting_rows, start_position=PREFETCH_NEW_ARRIVAL_POSITION)
+
 @app.route('/')
 def index():
     return redirect(url_for('dashboard'))
@@ -159,121 +453,132 @@ def dashboard():
     waiting_list = []
     handled_list = []
     waiting_count = 0
-    db_error_waiting = None
-    db_error_handled = None
+    handled_count = 0
+    handled_next_cursor = None
+    queue_token = None
 
     try:
-        waiting_list_result, error_waiting = database.get_kiosk_queue(status='Waiting')
-        if error_waiting:
-            logging.error(f"[Dashboard] Error fetching waiting check-ins: {error_waiting}")
-            db_error_waiting = "Could not load waiting list."
-        elif waiting_list_result:
-            waiting_list = waiting_list_result
-
-        handled_list_result, error_handled = database.get_kiosk_queue(status='Handled')
-        if error_handled:
-            logging.error(f"[Dashboard] Error fetching handled check-ins: {error_handled}")
-            db_error_handled = "Could not load handled list."
-        elif handled_list_result:
-            handled_list = handled_list_result
-
-        count, error_count = database.get_kiosk_queue_count(status='Waiting')
-        if error_count:
-            logging.error(f"[Dashboard] Error fetching waiting count: {error_count}")
-            waiting_count = len(waiting_list)
-        else:
-            waiting_count = count
+        snapshot, error_snapshot = database.get_dashboard_snapshot()
+        if error_snapshot:
+            logging.error(f"[Dashboard] Error fetching dashboard snapshot: {error_snapshot}")
+        elif snapshot:
+            waiting_list = snapshot['waiting']
+            handled_list = snapshot['handled']
+            waiting_count = snapshot['waiting_count']
+            handled_count = snapshot['handled_count']
+            handled_next_cursor = snapshot['handled_next_cursor']
+            queue_token = snapshot['queue_token']
 
         if waiting_list and dna_client:
-            def prefetch_all_data_background():
-                global dna_cache, transaction_cache, prefetch_locks, recent_prefetches
-                logging.info(f"[Dashboard Background] Starting DNA and transaction pre-fetch for {len(waiting_list)} members")
-                for member_checkin_info in waiting_list: 
-                    member_number_from_db = member_checkin_info.get('MemberNumber') 
-                    
-                    if not member_number_from_db: 
-                        logging.info(f"[Dashboard Background] Skipping pre-fetch for check-in ID {member_checkin_info.get('FacingMemberID')} as no member number is set.")
-                        continue
-
-                    if member_number_from_db in prefetch_locks:
-                        logging.info(f"[Dashboard Background] Pre-fetch for member {member_number_from_db} (check-in {member_checkin_info.get('FacingMemberID')}) already in progress. Skipping.")
-                        continue
-                    if member_number_from_db in recent_prefetches:
-                        logging.info(f"[Dashboard Background] Pre-fetch for member {member_number_from_db} (check-in {member_checkin_info.get('FacingMemberID')}) completed recently. Skipping.")
-                        continue
-                        
-                    try:
-                        prefetch_locks.add(member_number_from_db)
-                        logging.info(f"[Dashboard Background] Pre-fetching DNA data for member {member_number_from_db} (check-in {member_checkin_info.get('FacingMemberID')})")
-                        person_details = None
-                        if member_number_from_db in dna_cache:
-                            person_details = dna_cache[member_number_from_db]
-                            logging.info(f"[Dashboard Background] Using cached DNA data for member {member_number_from_db}")
-                        else:
-                            try:
-                                person_details = dna_client.get_person_detail_by_member_number(member_number_from_db)
-                                if person_details:
-                                    dna_cache[member_number_from_db] = person_details
-                                    logging.info(f"[Dashboard Background] Successfully pre-fetched DNA data for member {member_number_from_db}")
-                            except AttributeError: 
-                                person_number_from_dna_lookup = dna_client.get_person_number_by_member_number(member_number_from_db)
-                                if person_number_from_dna_lookup:
-                                    person_details = dna_client.get_taxid_data_by_person_number(person_number_from_dna_lookup)
-                                    if person_details:
-                                        dna_cache[member_number_from_db] = person_details
-                                        logging.info(f"[Dashboard Background] Successfully pre-fetched DNA data for member {member_number_from_db} (fallback)")
-                        
-                        if person_details and 'accounts' in person_details:
-                            logging.info(f"[Dashboard Background] Pre-fetching transactions for all accounts of member {member_number_from_db}")
-                            if member_number_from_db not in transaction_cache:
-                                transaction_cache[member_number_from_db] = {}
-                            for account in person_details['accounts']:
-                                account_number = account.get('account_number')
-                                if account_number and account_number not in transaction_cache[member_number_from_db]:
-                                    logging.info(f"[Dashboard Background] Fetching transactions for account {account_number}")
-                                    try:
-                                        transactions = dna_client.get_financial_transactions(account_number, limit=50)
-                                        if transactions is not None:
-                                            transaction_cache[member_number_from_db][account_number] = transactions
-                                        else:
-                                            transaction_cache[member_number_from_db][account_number] = []
-                                    except Exception as tx_e:
-                                        logging.error(f"[Dashboard Background] Error fetching transactions for account {account_number}: {tx_e}", exc_info=True)
-                                        transaction_cache[member_number_from_db][account_number] = []
-                                elif account_number in transaction_cache[member_number_from_db]:
-                                     logging.info(f"[Dashboard Background] Using cached transactions for account {account_number}")
-                            logging.info(f"[Dashboard Background] Completed pre-fetching transactions for member {member_number_from_db}")
-                    except Exception as e:
-                        logging.warning(f"[Dashboard Background] Failed to pre-fetch data for member {member_number_from_db}: {e}")
-                    finally:
-                        if member_number_from_db in prefetch_locks:
-                            prefetch_locks.remove(member_number_from_db)
-                        recent_prefetches[member_number_from_db] = True
-                logging.info(f"[Dashboard Background] Completed DNA and transaction pre-fetch. DNA cache: {len(dna_cache)}, Tx cache: {len(transaction_cache)}")
-            
-            background_thread = threading.Thread(target=prefetch_all_data_background)
-            background_thread.daemon = True
-            background_thread.start()
-            logging.info("[Dashboard] Started background thread for DNA and transaction pre-fetching")
+            queued = _queue_prefetch(waiting_list)
+            logging.info(f"[Dashboard] Queued {queued} of {len(waiting_list)} waiting members for DNA and transaction pre-fetching")
 
     except Exception as e:
         logging.error(f"[Dashboard] Exception fetching dashboard data: {e}", exc_info=True)
-        waiting_list, handled_list, waiting_count = [], [], 0
-
-    visitors = []
-    for member in waiting_list:
-        visitors.append({
-            'id': member.get('FacingMemberID'), 'name': member.get('Name', 'Unknown'),
-            'checkin_time': member.get('CreatedDate').strftime('%I:%M %p') if member.get('CreatedDate') else 'Unknown',
-            'status': 'waiting'
-        })
-    for member in handled_list:
-        completion_time = (member.get('UpdatedDate') or member.get('CreatedDate')).strftime('%I:%M %p') if (member.get('UpdatedDate') or member.get('CreatedDate')) else 'Unknown'
-        visitors.append({
-            'id': member.get('FacingMemberID'), 'name': member.get('Name', 'Unknown'),
-            'checkin_time': completion_time, 'status': 'done'
-        })
-    return render_template('dashboard.html', visitors=visitors, waiting_count=waiting_count, selected=None, accounts=[], transactions={}, ai_insights=[])
+        waiting_list, handled_list, waiting_count, handled_count = [], [], 0, 0
+
+    visitors = [_visitor_from_checkin(member, 'waiting') for member in waiting_list]
+    visitors.extend(_visitor_from_checkin(member, 'done') for member in handled_list)
+    return render_template('dashboard.html', visitors=visitors, waiting_count=waiting_count,
+                           handled_count=handled_count, handled_next_cursor=handled_next_cursor,
+                           queue_token=queue_token,
+                           selected=None, accounts=[], transactions={}, ai_insights=[])
+
+def _visitor_from_checkin(member, status):
+    """Converts a kiosk check-in row into the visitor dict rendered by the dashboard."""
+    if status == 'done':
+        shown_time = member.get('UpdatedDate') or member.get('CreatedDate')
+    else:
+        shown_time = member.get('CreatedDate')
+    return {
+        'id': member.get('FacingMemberID'), 'name': member.get('Name') or 'Unknown',
+        'checkin_time': shown_time.strftime('%I:%M %p') if shown_time else 'Unknown',
+        'status': status
+    }
+
+def _visitor_from_change(row):
+    """Converts a change-feed row into a visitor dict; rows that left the dashboard are marked 'removed'."""
+    status = database.normalize_status(row.get('Status'))
+    if status == database.STATUS_WAITING:
+        return _visitor_from_checkin(row, 'waiting')
+    if status == database.STATUS_HANDLED and row.get('CreatedDate') and row['CreatedDate'] >= database.get_handled_window_start():
+        return _visitor_from_checkin(row, 'done')
+    return {'id': row.get('FacingMemberID'), 'status': 'removed'}
+
+# One watcher per process polls the change feed and pushes deltas to every open dashboard
+queue_watcher = QueueWatcher(database.get_queue_changes, _visitor_from_change, interval=QUEUE_WATCH_INTERVAL,
+                             on_rows=_prefetch_new_arrivals)
+database.add_queue_change_listener(queue_watcher.notify)
+
+@app.route('/api/queue/stream')
+def queue_stream_route():
+    """Server-Sent Events stream of queue changes after ?since=<token> (or the Last-Event-ID on reconnect)."""
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', type=int)
+    subscription = queue_watcher.subscribe()
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            backlog = queue_watcher.backlog_since(since) if since is not None else None
+            if backlog is None:
+                yield QueueWatcher.format_sse('reset', {})
+                return
+            token, changes = backlog
+            if changes:
+                yield f"id: {token}\n" + QueueWatcher.format_sse('changes', {'token': token, 'changes': changes})
+            while True:
+                try:
+                    event = subscription.events.get(timeout=QUEUE_STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if subscription.overflowed:
+                    yield QueueWatcher.format_sse('reset', {})
+                    return
+                if event['token'] <= token:
+                    continue  # Already delivered as part of the backlog
+                token = event['token']
+                yield f"id: {token}\n" + QueueWatcher.format_sse('changes', event)
+        finally:
+            queue_watcher.unsubscribe(subscription)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/queue/changes')
+def get_queue_changes_route():
+    since = request.args.get('since', type=int)
+    wait = request.args.get('wait', type=float)
+    if wait is not None:
+        # Long-poll fallback for browsers without EventSource: answered from the shared watcher, not the DB
+        backlog = queue_watcher.wait_for_changes(since, min(max(wait, 0), QUEUE_LONG_POLL_MAX))
+        if backlog is None:
+            return jsonify({'token': None, 'changes': [], 'has_more': False, 'reset': True})
+        token, changes = backlog
+        return jsonify({'token': token, 'changes': changes, 'has_more': False, 'reset': False})
+    result, error = database.get_queue_changes(since)
+    if error:
+        logging.error(f"[Queue Changes] Error fetching queue changes since {since}: {error}")
+        return jsonify({'error': error}), 500
+    return jsonify({
+        'token': result['token'],
+        'changes': [_visitor_from_change(row) for row in result['changes']],
+        'has_more': result['has_more'],
+        'reset': since is None  # No usable token: the client should reload its full snapshot
+    })
+
+@app.route('/api/handled')
+def get_handled_page_route():
+    (rows, next_cursor), error = database.get_handled_page(before=request.args.get('before'))
+    if error:
+        logging.error(f"[Dashboard] Error fetching handled page: {error}")
+        return jsonify({'error': error}), 400 if error == "Invalid cursor." else 500
+    return jsonify({
+        'visitors': [_visitor_from_checkin(member, 'done') for member in rows],
+        'next_cursor': next_cursor
+    })
 
 @app.route('/kiosk-queue') 
 def view_kiosk_queue():
@@ -322,7 +627,7 @@ def get_member_data(checkin_id_for_api):
             except Exception as e: logging.error(f"[API] Error fetching DNA data for member {member_number_to_use}: {e}")
 
         if dna_data and dna_data.get('ssn') and ml_client:
-            try: ml_data = ml_client.query_meridian_link(dna_data['ssn'])
+            try: ml_data = query_meridian_link_cached(dna_data['ssn'], member_number_to_use)
             except Exception as e: logging.error(f"[API] Error fetching MeridianLink data for SSN related to member {member_number_to_use}: {e}")
         
         if dna_data and dna_data.get('accounts'):
@@ -333,18 +638,86 @@ def get_member_data(checkin_id_for_api):
         if member_number_to_use in transaction_cache and transaction_cache[member_number_to_use]:
             account_keys = list(transaction_cache[member_number_to_use].keys())
             if account_keys and accounts: 
-                 transactions_for_modal[accounts[0]] = transaction_cache[member_number_to_use][account_keys[0]][:8]
+                 transactions_for_modal[accounts[0]] = [tx.to_dict() for tx in transaction_cache[member_number_to_use][account_keys[0]][:8]]
 
         insights = insight_cache.get(checkin_id_for_api, "").split('\n') if insight_cache.get(checkin_id_for_api) else []
         
         return jsonify({
             'accounts': accounts, 'transactions': transactions_for_modal, 'insights': insights[:4],
-            'member_info': {'name': (dna_data.get('firstname', '') + ' ' + dna_data.get('lastname', '')).strip() if dna_data else record.get('Name', ''), 'member_number': member_number_to_use}
+            'member_info': {'name': (dna_data.get('firstname', '') + ' ' + dna_data.get('lastname', '')).strip() if dna_data else record.get('Name', ''), 'member_number': member_number_to_use},
+            'partial': deadline.exceeded()
         })
     except Exception as e:
         logging.error(f"[API] Error in get_member_data for check-in {checkin_id_for_api}: {e}", exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
 
+def _lookup_meridian_link(member_number_to_use, dna_data, dna_error_message):
+    """MeridianLink part of member_details. Returns (ml_data, ml_connected, ml_error_message)."""
+    ml_data, ml_connected, ml_error_message = None, False, None
+    if not ML_CLIENT_AVAILABLE:
+        ml_error_message = "MeridianLink Client is not available or failed to initialize. Please check system configuration."
+    elif not dna_data or not dna_data.get('ssn'):
+        # This case is handled by is_partial_data or dna_error_message; ML part will just not show data.
+        if member_number_to_use and dna_data and not dna_error_message: # Only log if DNA part was seemingly okay
+             logging.warning(f"[Member Details] SSN not found in DNA data for member {member_number_to_use}. Skipping MeridianLink lookup.")
+    elif ml_circuit_state() == STATE_OPEN:
+        ml_error_message = "MeridianLink is temporarily unavailable. Loan data will load once it recovers."
+        logging.warning(f"[Member Details] MeridianLink circuit is open; skipping lookup for member {member_number_to_use}")
+    else: # ML Client available, and we have dna_data with an SSN
+        ssn = dna_data['ssn']
+        logging.info(f"[Member Details] Attempting MeridianLink lookup for SSN ending in: {ssn[-4:]} (related to member {member_number_to_use})")
+        try:
+            ml_data_result = query_meridian_link_cached(ssn, member_number_to_use)
+            if ml_data_result is not None: # API call was made, result could be empty list (no loans) or list of loans
+                ml_data = ml_data_result
+                ml_connected = True 
+                logging.info(f"[Member Details] MeridianLink lookup successful for SSN related to member {member_number_to_use}. Found {len(ml_data)} loan(s).")
+                if not ml_data: # Empty list means no loans found
+                    ml_error_message = f"No loan applications found in MeridianLink for member {member_number_to_use} (SSN provided)."
+            elif deadline.exceeded(): # Gave up waiting within the page's latency budget
+                ml_error_message = f"MeridianLink did not answer in time; loan data for member {member_number_to_use} is not shown."
+                logging.warning(f"[Member Details] MeridianLink lookup ran out of latency budget for member {member_number_to_use}")
+            else: # query_meridian_link returned None, implying an error or specific "not found"
+                ml_connected = True # Connection was attempted
+                ml_error_message = f"Could not retrieve loan data from MeridianLink for member {member_number_to_use} (SSN provided)."
+                logging.warning(f"[Member Details] MeridianLink lookup returned None for SSN related to member {member_number_to_use}")
+        except deadline.DeadlineExceeded as e: # Waited on another request's lookup past the budget
+            ml_error_message = f"MeridianLink did not answer in time; loan data for member {member_number_to_use} is not shown."
+            logging.warning(f"[Member Details] MeridianLink lookup ran out of latency budget for member {member_number_to_use}: {e}")
+        except MeridianLinkError as e: # Specific API error from client
+            ml_connected = False
+            ml_error_message = f"MeridianLink API error for member {member_number_to_use}: {str(e)}"
+            logging.error(f"[Member Details] MeridianLink API error (member {member_number_to_use}): {e}", exc_info=True)
+        except Exception as ml_e: # Other unexpected errors
+            ml_connected = False
+            ml_error_message = f"An unexpected error occurred during MeridianLink lookup for member {member_number_to_use}."
+            logging.error(f"[Member Details] Unexpected error during MeridianLink lookup (member {member_number_to_use}): {ml_e}", exc_info=True)
+    return ml_data, ml_connected, ml_error_message
+
+async def _member_transactions(member_number_to_use, dna_data):
+    """Transaction part of member_details; uses the cache or fetches every account concurrently."""
+    if not (dna_data and dna_data.get('accounts') and member_number_to_use):
+        return {}
+    logging.info(f"[Member Details] Getting transactions for active member {member_number_to_use}")
+    if member_number_to_use in transaction_cache:
+        return transaction_cache[member_number_to_use]
+    if not dna_async or dna_circuit_state() == STATE_OPEN:
+        return {}  # Nothing is cached, so transactions load once DNA recovers
+    account_transactions = await fetch_account_transactions_async(
+        [account.get('account_number') for account in dna_data['accounts']], 10,
+        f"[Member Details] (member {member_number_to_use})", limiter=dna_async.member_limiter())
+    if not deadline.exceeded(): # Accounts cut off by the latency budget are empty; don't cache them
+        transaction_cache[member_number_to_use] = account_transactions
+    return account_transactions
+
+async def _load_member_extras(member_number_to_use, dna_data, dna_error_message):
+    """
+    Runs the MeridianLink lookup and the DNA transaction fetch concurrently, so member_details waits
+    for the slower of the two instead of both. Both need the DNA member info (SSN, account list) first.
+    """
+    return await asyncio.gather(asyncio.to_thread(_lookup_meridian_link, member_number_to_use, dna_data, dna_error_message),
+                                _member_transactions(member_number_to_use, dna_data))
+
 @app.route('/member_details/<int:checkin_id>')
 def member_details(checkin_id):
     global dna_cache, transaction_cache
@@ -372,6 +745,9 @@ def member_details(checkin_id):
                 dna_data = dna_cache[member_number_to_use]
                 dna_connected = True # If in cache, assume it was connected
                 logging.info(f"[Member Details] Using cached DNA data for active member {member_number_to_use}")
+            elif dna_circuit_state() == STATE_OPEN: # DNA is failing; don't wait on it
+                dna_error_message = f"DNA is temporarily unavailable. Member data for {member_number_to_use} will load once it recovers."
+                logging.warning(f"[Member Details] DNA circuit is open; skipping DNA fetch for active member {member_number_to_use}")
             else: # dna_client is available and member_number_to_use exists, but not in cache
                 logging.info(f"[Member Details] Attempting synchronous DNA fetch for active member {member_number_to_use}")
                 try:
@@ -386,10 +762,16 @@ def member_details(checkin_id):
                         dna_connected = True # Connection was made
                         dna_error_message = f"Core DNA data is incomplete for member number {member_number_to_use}."
                         logging.warning(f"[Member Details] Incomplete DNA data for {member_number_to_use}: {person_details}")
+                    elif deadline.exceeded(): # Gave up waiting within the page's latency budget
+                        dna_error_message = f"DNA did not answer in time; member data for {member_number_to_use} is not available yet. Reload to try again."
+                        logging.warning(f"[Member Details] DNA fetch ran out of latency budget for active member {member_number_to_use}")
                     else: # No person_details returned from client call
                         dna_connected = True # Connection was made, but no data found
                         dna_error_message = f"Member data not found in DNA for member number {member_number_to_use}."
                         logging.warning(f"[Member Details] get_person_detail_by_member_number returned None or empty for active member {member_number_to_use}")
+                except deadline.DeadlineExceeded as e: # Waited on another request's lookup past the budget
+                    dna_error_message = f"DNA did not answer in time; member data for {member_number_to_use} is not available yet. Reload to try again."
+                    logging.warning(f"[Member Details] DNA fetch ran out of latency budget for active member {member_number_to_use}: {e}")
                 except DNAApiError as e: # Specific API error from client
                     dna_connected = False # Explicitly set as connection/API call failed
                     dna_error_message = f"DNA API error for member {member_number_to_use}: {str(e)}"
@@ -399,54 +781,17 @@ def member_details(checkin_id):
                     dna_error_message = f"An unexpected error occurred fetching DNA data for member {member_number_to_use}."
                     logging.error(f"[Member Details] Unexpected DNA API call failed for active member {member_number_to_use}: {e}", exc_info=True)
 
-        # MeridianLink Data Fetching
-        if not ML_CLIENT_AVAILABLE:
-            ml_error_message = "MeridianLink Client is not available or failed to initialize. Please check system configuration."
-        elif not dna_data or not dna_data.get('ssn'):
-            # This case is handled by is_partial_data or dna_error_message; ML part will just not show data.
-            if member_number_to_use and dna_data and not dna_error_message: # Only log if DNA part was seemingly okay
-                 logging.warning(f"[Member Details] SSN not found in DNA data for member {member_number_to_use}. Skipping MeridianLink lookup.")
-        else: # ML Client available, and we have dna_data with an SSN
-            ssn = dna_data['ssn']
-            logging.info(f"[Member Details] Attempting MeridianLink lookup for SSN ending in: {ssn[-4:]} (related to member {member_number_to_use})")
-            try:
-                ml_data_result = ml_client.query_meridian_link(ssn)
-                if ml_data_result is not None: # API call was made, result could be empty list (no loans) or list of loans
-                    ml_data = ml_data_result
-                    ml_connected = True 
-                    logging.info(f"[Member Details] MeridianLink lookup successful for SSN related to member {member_number_to_use}. Found {len(ml_data)} loan(s).")
-                    if not ml_data: # Empty list means no loans found
-                        ml_error_message = f"No loan applications found in MeridianLink for member {member_number_to_use} (SSN provided)."
-                else: # query_meridian_link returned None, implying an error or specific "not found"
-                    ml_connected = True # Connection was attempted
-                    ml_error_message = f"Could not retrieve loan data from MeridianLink for member {member_number_to_use} (SSN provided)."
-                    logging.warning(f"[Member Details] MeridianLink lookup returned None for SSN related to member {member_number_to_use}")
-            except MeridianLinkError as e: # Specific API error from client
-                ml_connected = False
-                ml_error_message = f"MeridianLink API error for member {member_number_to_use}: {str(e)}"
-                logging.error(f"[Member Details] MeridianLink API error (member {member_number_to_use}): {e}", exc_info=True)
-            except Exception as ml_e: # Other unexpected errors
-                ml_connected = False
-                ml_error_message = f"An unexpected error occurred during MeridianLink lookup for member {member_number_to_use}."
-                logging.error(f"[Member Details] Unexpected error during MeridianLink lookup (member {member_number_to_use}): {ml_e}", exc_info=True)
-        
-        # Transaction Fetching (remains largely the same, depends on dna_data)
-        if dna_data and dna_data.get('accounts') and member_number_to_use:
-            logging.info(f"[Member Details] Getting transactions for active member {member_number_to_use}")
-            if member_number_to_use in transaction_cache:
-                account_transactions = transaction_cache[member_number_to_use]
-            elif dna_client:
-                transaction_cache[member_number_to_use] = {}
-                for account in dna_data['accounts']:
-                    account_number_val = account.get('account_number')
-                    if account_number_val:
-                        try:
-                            transactions = dna_client.get_financial_transactions(account_number_val, limit=10)
-                            transaction_cache[member_number_to_use][account_number_val] = transactions if transactions is not None else []
-                        except Exception as tx_e:
-                            logging.error(f"[Member Details] Error fetching transactions for account {account_number_val} (member {member_number_to_use}): {tx_e}", exc_info=True)
-                            transaction_cache[member_number_to_use][account_number_val] = []
-                account_transactions = transaction_cache[member_number_to_use]
+        # MeridianLink lookup and transaction fetching run concurrently once the DNA member info is known
+        budget_left = deadline.remaining()
+        extras_timeout = MEMBER_DETAILS_TIMEOUT if budget_left is None else min(MEMBER_DETAILS_TIMEOUT, budget_left + LATENCY_BUDGET_GRACE)
+        try:
+            (ml_data, ml_connected, ml_error_message), account_transactions = upstream_bridge.run(
+                _load_member_extras(member_number_to_use, dna_data, dna_error_message), timeout=extras_timeout)
+        except TimeoutError as e:
+            if budget_left is not None and extras_timeout < MEMBER_DETAILS_TIMEOUT:
+                deadline.mark_exceeded()
+            logging.error(f"[Member Details] Loan and transaction lookups timed out for member {member_number_to_use}: {e}")
+            ml_error_message = f"Timed out loading loan and transaction data for member {member_number_to_use}."
         
         is_partial_data = not member_number_to_use or not dna_data or not dna_data.get('persnbr')
 
@@ -490,11 +835,9 @@ def update_member_number(checkin_id):
 
         if old_active_member_number and old_active_member_number != new_member_number_input:
             logging.info(f"Clearing cache for old active member number: {old_active_member_number}")
-            dna_cache.pop(old_active_member_number, None)
-            transaction_cache.pop(old_active_member_number, None)
+            invalidate_member_caches(old_active_member_number)
         
-        dna_cache.pop(new_member_number_input, None)
-        transaction_cache.pop(new_member_number_input, None)
+        invalidate_member_caches(new_member_number_input)
         insight_cache.pop(checkin_id, None)
 
         if dna_client:
@@ -505,18 +848,17 @@ def update_member_number(checkin_id):
                     dna_cache[new_member_number_input] = new_dna_data
                     logging.info(f"[UpdateMemberNumber] Successfully fetched and cached DNA data for {new_member_number_input}")
                     if new_dna_data.get('ssn') and ml_client:
-                        try: ml_client.query_meridian_link(new_dna_data['ssn'])
+                        try: query_meridian_link_cached(new_dna_data['ssn'], new_member_number_input, refresh=True)
                         except Exception as ml_e: logging.error(f"[UpdateMemberNumber] Error querying MeridianLink for {new_member_number_input}: {ml_e}")
                     if new_dna_data.get('accounts'):
-                        transaction_cache[new_member_number_input] = {}
-                        for account in new_dna_data['accounts']:
-                            acc_num = account.get('account_number')
-                            if acc_num:
-                                try:
-                                    txns = dna_client.get_financial_transactions(acc_num, limit=10)
-                                    transaction_cache[new_member_number_input][acc_num] = txns if txns is not None else []
-                                except Exception as tx_e: logging.error(f"[UpdateMemberNumber] Error fetching tx for acc {acc_num} (member {new_member_number_input}): {tx_e}")
-                        logging.info(f"[UpdateMemberNumber] Transactions re-fetched for {new_member_number_input}")
+                        account_transactions = fetch_account_transactions(
+                            [account.get('account_number') for account in new_dna_data['accounts']], 10,
+                            f"[UpdateMemberNumber] (member {new_member_number_input})")
+                        if not deadline.exceeded():
+                            transaction_cache[new_member_number_input] = account_transactions
+                            logging.info(f"[UpdateMemberNumber] Transactions re-fetched for {new_member_number_input}")
+                elif deadline.exceeded():
+                    flash(f"DNA did not answer in time for member number {new_member_number_input}; details will load on the member page.", "warning")
                 else: 
                     flash(f"Could not retrieve DNA details for the new member number {new_member_number_input}. It may be invalid.", "warning")
             except Exception as e:
@@ -546,8 +888,7 @@ def revert_manual_member_number(checkin_id):
         # Cache Management for the member number that was just cleared
         if member_number_before_revert:
             logging.info(f"Clearing cache for prior manual member number: {member_number_before_revert}")
-            dna_cache.pop(member_number_before_revert, None)
-            transaction_cache.pop(member_number_before_revert, None)
+            invalidate_member_caches(member_number_before_revert)
         
         # Always clear insights for this check-in
         insight_cache.pop(checkin_id, None)
@@ -565,7 +906,11 @@ def get_transactions(account_number):
     if not dna_client: return jsonify({'error': 'DNA client not available'}), 503
     try:
         transactions = dna_client.get_financial_transactions(account_number, limit=10)
-        return jsonify(transactions if transactions is not None else []) 
+        if transactions is None and deadline.exceeded():
+            return jsonify({'error': 'DNA did not answer in time; please try again'}), 504
+        return jsonify([tx.to_dict() for tx in transactions] if transactions is not None else [])
+    except deadline.DeadlineExceeded:
+        return jsonify({'error': 'DNA did not answer in time; please try again'}), 504
     except Exception as e:
         logging.error(f"[AJAX Transactions] Error: {e}", exc_info=True)
         return jsonify({'error': 'An unexpected error occurred'}), 500
@@ -603,5 +948,22 @@ def get_insights_route(checkin_id):
         return jsonify({'status': 'done', 'insights': insight_cache[checkin_id]})
     return jsonify({'status': 'pending'})
 
+@app.route('/api/metrics')
+def metrics_route():
+    return jsonify({
+        'db_pool': database.get_pool_stats(),
+        'queue_watcher': queue_watcher.stats(),
+        'prefetch': prefetch_service.stats(),
+        'dna_auth': dna_client.auth_stats() if dna_client else None,
+        'dna_response_log': dna_client.response_log.stats() if dna_client else None,
+        'dna_http': dna_client.transport.stats() if dna_client else None,
+        'ml_http': ml_client.transport.stats() if ml_client else None,
+        'dna_async': dna_async.stats() if dna_async else None,
+        'upstream_bridge': upstream_bridge.stats(),
+        'circuits': {'dna': dna_circuit_state(), 'meridianlink': ml_circuit_state()},
+        'dna_coalescing': dna_client.single_flight.stats() if dna_client else None,
+        'ml_coalescing': ml_client.single_flight.stats() if ml_client else None,
+    })
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.getenv('WAITING_PORT', 8082)), debug=app.config['DEBUG'])
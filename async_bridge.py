@@ -0,0 +1,62 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+
+
+class AsyncBridge:
+    """
+    Runs coroutines on one long-lived event loop thread so synchronous Flask views can fan out
+    concurrent upstream calls and block until they finish. The loop starts on first use.
+    """
+
+    def __init__(self, name='async-bridge'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._stats = {'runs': 0, 'timeouts': 0, 'errors': 0}
+
+    def run(self, coro, timeout=None):
+        """Runs coro on the bridge loop and returns its result. Raises its exception, or TimeoutError after timeout seconds."""
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError(f"AsyncBridge '{self.name}'.run() called from its own event loop; await the coroutine instead")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        with self._lock:
+            self._stats['runs'] += 1
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()  # Cancels the coroutine's pending awaits; blocking calls already started run to completion
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise TimeoutError(f"'{self.name}' coroutine did not finish within {timeout}s")
+        except Exception:
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['running'] = self._thread is not None and self._thread.is_alive()
+        return snapshot
+
+    # --- Internals --------------------------------------------------------
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._loop
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, args=(self._loop,), name=self.name, daemon=True)
+            self._thread.start()
+        logging.info(f"[Async Bridge] Started '{self.name}' event loop thread.")
+        return self._loop
+
+    @staticmethod
+    def _run(loop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import requests
+
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request while the endpoint's circuit is open."""
+
+    def __init__(self, name, retry_in):
+        self.retry_in = retry_in
+        super().__init__(f"Circuit for {name} is open; failing fast (next probe in {retry_in:.1f}s)")
+
+
+class CircuitBreaker:
+    """
+    Tracks call outcomes for one upstream endpoint and fails calls fast while it is down.
+
+    - closed: calls pass; the circuit opens when at least min_calls outcomes in the last window
+      seconds include failure_rate or more failures.
+    - open: calls are refused (allow() returns False) for open_seconds.
+    - half_open: up to half_open_probes calls are let through; a success closes the circuit,
+      a failure opens it again.
+    """
+
+    def __init__(self, name, failure_rate=0.5, min_calls=5, window=60.0, open_seconds=30.0, half_open_probes=1):
+        self.name = name
+        self.failure_rate = float(failure_rate)
+        self.min_calls = max(1, int(min_calls))
+        self.window = float(window)
+        self.open_seconds = float(open_seconds)
+        self.half_open_probes = max(1, int(half_open_probes))
+
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._outcomes = deque()        # (monotonic time, succeeded) within the window
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._stats = {'opened': 0, 'rejected': 0, 'successes': 0, 'failures': 0}
+
+    # --- Public API -------------------------------------------------------
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state_locked(time.monotonic())
+
+    def allow(self):
+        """Returns True if a call may be made now. Each allowed call must be followed by record()."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state_locked(now)
+            if state == STATE_CLOSED:
+                return True
+            if state == STATE_HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def retry_in(self):
+        """Seconds until the open circuit lets a probe through (0 when not open)."""
+        with self._lock:
+            if self._state != STATE_OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def cancel(self):
+        """Releases an allowed call without recording an outcome (e.g. the caller gave up on it, not the endpoint)."""
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def record(self, succeeded):
+        now = time.monotonic()
+        with self._lock:
+            self._stats['successes' if succeeded else 'failures'] += 1
+            state = self._current_state_locked(now)
+            if state == STATE_HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if succeeded:
+                    self._close_locked()
+                else:
+                    self._open_locked(now, "half-open probe failed")
+                return
+            if state == STATE_OPEN:
+                return  # Late result of a call that started before the circuit opened
+
+            self._outcomes.append((now, succeeded))
+            if not succeeded:
+                self._failures += 1
+            self._expire_locked(now)
+            total = len(self._outcomes)
+            if total >= self.min_calls and self._failures / total >= self.failure_rate:
+                self._open_locked(now, f"{self._failures}/{total} calls failed in the last {self.window:.0f}s")
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            snapshot = dict(self._stats)
+            state = self._current_state_locked(now)
+            self._expire_locked(now)
+            snapshot.update({
+                'state': state,
+                'window_calls': len(self._outcomes),
+                'window_failures': self._failures,
+                'retry_in_seconds': round(max(0.0, self._opened_at + self.open_seconds - now), 1) if state == STATE_OPEN else 0,
+            })
+        return snapshot
+
+    # --- Internals --------------------------------------------------------
+
+    def _current_state_locked(self, now):
+        if self._state == STATE_OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = STATE_HALF_OPEN
+            self._probes = 0
+            logging.info(f"[Circuit {self.name}] Half-open; letting a probe request through.")
+        return self._state
+
+    def _expire_locked(self, now):
+        cutoff = now - self.window
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            _, succeeded = self._outcomes.popleft()
+            if not succeeded:
+                self._failures -= 1
+
+    def _open_locked(self, now, reason):
+        self._state = STATE_OPEN
+        self._opened_at = now
+        self._probes = 0
+        self._stats['opened'] += 1
+        logging.warning(f"[Circuit {self.name}] Opened ({reason}); failing fast for {self.open_seconds:.0f}s.")
+
+    def _close_locked(self):
+        self._state = STATE_CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+        logging.info(f"[Circuit {self.name}] Closed; upstream is responding again.")
@@ -1,8 +1,11 @@
 import pyodbc
 import os
 import logging
+import threading
+from cachetools import TTLCache
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta
+from db_pool import ConnectionPool
 
 
 load_dotenv()
@@ -14,6 +17,32 @@ DB_PASSWORD = os.getenv('DB_PASSWORD')
 DB_TABLE = os.getenv('DB_TABLE') 
 DB_KIOSK_TABLE = os.getenv('DB_KIOSK_TABLE')
 
+# Connection pool settings
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))                 # Seconds to wait for a free connection
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', 300))             # Seconds before an idle connection is dropped
+DB_POOL_VALIDATE_AFTER = float(os.getenv('DB_POOL_VALIDATE_AFTER', 30))  # Idle seconds before a borrow runs 'SELECT 1'
+
+# Canonical queue status values. Rows are stored with exactly these values (migration 0001 backfills
+# NULLs and odd casing), so queue queries can compare Status directly and seek on the status index.
+STATUS_WAITING = 'Waiting'
+STATUS_HANDLED = 'Handled'
+_CANONICAL_STATUSES = {status.upper(): status for status in (STATUS_WAITING, STATUS_HANDLED)}
+
+# Handled list bounds: only check-ins from the last N calendar days (1 = today) are listed,
+# HANDLED_PAGE_SIZE rows at a time using a (CreatedDate, FacingMemberID) keyset cursor.
+HANDLED_WINDOW_DAYS = max(1, int(os.getenv('HANDLED_WINDOW_DAYS', 1)))
+HANDLED_PAGE_SIZE = max(1, int(os.getenv('HANDLED_PAGE_SIZE', 25)))
+
+# Shared waiting-count cache read by the inject_visitor_count context processor on every render.
+# Writes through this module invalidate it; the TTL bounds staleness for check-ins made by other processes.
+VISITOR_COUNT_TTL = float(os.getenv('VISITOR_COUNT_TTL', 15))
+_visitor_count_cache = TTLCache(maxsize=1, ttl=VISITOR_COUNT_TTL)
+_visitor_count_lock = threading.Lock()
+
+# Callbacks run after this module commits a queue change (e.g. to wake the dashboard queue watcher)
+_queue_change_listeners = []
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def create_connection():
@@ -38,9 +67,51 @@ def create_connection():
         # For a web app, failing requests might be better than crashing
         return None # Or raise e ?? will figure out later 
 
+_pool = ConnectionPool(
+    create_connection,
+    max_size=DB_POOL_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    max_idle=DB_POOL_MAX_IDLE,
+    validate_after=DB_POOL_VALIDATE_AFTER,
+    name='kiosk',
+)
+
+def get_connection():
+    """Borrows a connection from the pool. Calling close() on it returns it to the pool."""
+    return _pool.acquire()
+
+def get_pool_stats():
+    """Returns connection pool statistics for monitoring."""
+    return _pool.stats()
+
+def get_handled_window_start():
+    """Returns the earliest CreatedDate included in the handled list (midnight, HANDLED_WINDOW_DAYS - 1 days ago)."""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=HANDLED_WINDOW_DAYS - 1)
+
+def encode_handled_cursor(row):
+    """Builds a 'before' cursor ('<CreatedDate>,<FacingMemberID>') from the last row of a handled page."""
+    # ISO 8601 with millisecond precision matches the DATETIME column, so the cursor value round-trips exactly.
+    return f"{row['CreatedDate'].isoformat(timespec='milliseconds')},{row['FacingMemberID']}"
+
+def parse_handled_cursor(cursor_value):
+    """Parses a 'before' cursor into (created_date, facing_member_id). Raises ValueError if malformed."""
+    created_str, _, id_str = (cursor_value or '').rpartition(',')
+    created_date = datetime.fromisoformat(created_str)  # Also accepts cursors issued with a space separator
+    if created_date.tzinfo is not None:
+        raise ValueError(f"Cursor date must not carry a UTC offset: {created_str}")
+    return created_date, int(id_str)
+
+def normalize_status(status):
+    """Maps a status in any casing (or None) to the canonical value stored in the Status column."""
+    if status is None:
+        return STATUS_WAITING
+    status = str(status).strip()
+    return _CANONICAL_STATUSES.get(status.upper(), status)
+
 def add_visitor(visitor_data):
     """Adds a new visitor record to the database."""
-    conn = create_connection()
+    conn = get_connection()
     if not conn:
         return False, "Database connection failed"
 
@@ -89,7 +160,7 @@ def add_visitor(visitor_data):
 
 def revert_manual_entry(checkin_id):
     """Clears MemberNumber, ManuallyEnteredMemberNumber, and MemberNumberSource for a check-in."""
-    conn = create_connection()
+    conn = get_connection()
     if not conn:
         return False, "Database connection failed"
 
@@ -138,7 +209,7 @@ def revert_manual_entry(checkin_id):
 
 def add_facing_member(details):
     """Adds a new record to the FacingMembers table."""
-    conn = create_connection()
+    conn = get_connection()
     if not conn:
         return None, "Database connection failed"
 
@@ -156,7 +227,7 @@ def add_facing_member(details):
             Status
         )
         OUTPUT INSERTED.FacingMemberID -- Get the newly created ID
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, GETDATE(), GETDATE(), ?, ?, ?, ?, ?, 'Waiting')
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, GETDATE(), GETDATE(), ?, ?, ?, ?, ?, ?)
     """
     member_number_from_kiosk = details.get('MemberNumber')
     member_number_source = 'kiosk' if member_number_from_kiosk else None
@@ -180,7 +251,8 @@ def add_facing_member(details):
         details.get('address'),   # Fetched from DNA, map to SystemAddress
         details.get('home_phone'),# Fetched from DNA, map to SystemHomePhone
         details.get('email'),     # Fetched from DNA, map to SystemEmail
-        details.get('mobile_phone') # Fetched from DNA, map to SystemCellPhone
+        details.get('mobile_phone'), # Fetched from DNA, map to SystemCellPhone
+        STATUS_WAITING
     )
 
     try:
@@ -188,6 +260,7 @@ def add_facing_member(details):
         cursor.execute(sql, params)
         new_id = cursor.fetchone()[0] # Fetch the ID returned by OUTPUT
         conn.commit()
+        _queue_changed()
         logging.info(f"FacingMember record added successfully with ID: {new_id}.")
         return new_id, None # Return the new ID and no error
     except pyodbc.Error as ex:
@@ -208,7 +281,7 @@ def add_facing_member(details):
 
 def update_facing_member_confirmation(facing_member_id, is_confirmed):
     """Updates the IsSystemInfoConfirmed flag for a FacingMembers record."""
-    conn = create_connection()
+    conn = get_connection()
     if not conn:
         return False, "Database connection failed"
 
@@ -250,7 +323,7 @@ def update_facing_member_confirmation(facing_member_id, is_confirmed):
 
 def get_facing_member_details(facing_member_id):
     """Retrieves details for a specific FacingMembers record by ID."""
-    conn = create_connection()
+    conn = get_connection()
     if not conn:
         return None, "Database connection failed"
 
@@ -293,7 +366,7 @@ def get_facing_member_details(facing_member_id):
 
 def get_kiosk_queue(status='Waiting'):
     """Retrieves FacingMembers records with a specific status (default 'Waiting'), ordered by CreatedDate."""
-    conn = create_connection()
+    conn = get_connection()
     if not conn:
         return [], "Database connection failed"
 
@@ -305,15 +378,16 @@ def get_kiosk_queue(status='Waiting'):
     # Log the actual query for debugging
     logging.info(f"DB_KIOSK_TABLE value: {DB_KIOSK_TABLE}")
     
-    # Modified query with proper status handling:
-    # - For 'Waiting': Get records with Status='Waiting' OR Status IS NULL
-    # - For other statuses (like 'Handled'): Only get exact matches
-    if status.upper() == 'WAITING':
+    # Status values are canonical, so compare the column directly (sargable):
+    # - For 'Waiting': the constant is inlined so SQL Server can match the filtered IX_FacingMembers_Waiting index
+    # - For other statuses (like 'Handled'): seek on IX_FacingMembers_Status_CreatedDate
+    status = normalize_status(status)
+    if status == STATUS_WAITING:
         sql = f"""
             SELECT
                 FacingMemberID, Name, HelpTopic, SubIssue, CreatedDate, Status, MemberNumber
             FROM {DB_KIOSK_TABLE}
-            WHERE UPPER(Status) = 'WAITING' OR Status IS NULL
+            WHERE Status = '{STATUS_WAITING}'
             ORDER BY CreatedDate ASC -- Show oldest waiting first
         """
         params = ()
@@ -322,10 +396,10 @@ def get_kiosk_queue(status='Waiting'):
             SELECT
                 FacingMemberID, Name, HelpTopic, SubIssue, CreatedDate, Status
             FROM {DB_KIOSK_TABLE}
-            WHERE UPPER(Status) = UPPER(?)
+            WHERE Status = ? AND CreatedDate >= ? -- Bounded to the handled window, not all history
             ORDER BY CreatedDate DESC -- Show most recently handled first
         """
-        params = (status,)
+        params = (status, get_handled_window_start())
     try:
         logging.info(f"Executing SQL for get_kiosk_queue with status: {status}")
         cursor.execute(sql, params)
@@ -354,7 +428,7 @@ def get_kiosk_queue(status='Waiting'):
 
 def get_kiosk_queue_count(status='Waiting'):
     """Returns the count of FacingMembers with a specific status (default 'Waiting')."""
-    conn = create_connection()
+    conn = get_connection()
     if not conn:
         return 0, "Database connection failed"
 
@@ -362,19 +436,20 @@ def get_kiosk_queue_count(status='Waiting'):
     # Use environment variable for table name
     # ASSUMES a 'Status' column exists
     
-    # Modified query to be more flexible with status matching (case-insensitive)
-    if status.upper() == 'WAITING':
+    # Sargable status match against canonical values (see get_kiosk_queue)
+    status = normalize_status(status)
+    if status == STATUS_WAITING:
         sql = f"""
             SELECT COUNT(*) AS QueueCount
             FROM {DB_KIOSK_TABLE}
-            WHERE UPPER(Status) = 'WAITING' OR Status IS NULL
+            WHERE Status = '{STATUS_WAITING}'
         """
         params = ()
     else:
         sql = f"""
             SELECT COUNT(*) AS QueueCount
             FROM {DB_KIOSK_TABLE}
-            WHERE UPPER(Status) = UPPER(?)
+            WHERE Status = ?
         """
         params = (status,)
     try:
@@ -401,9 +476,263 @@ def get_kiosk_queue_count(status='Waiting'):
         if conn:
             conn.close()
 
+def get_current_visitor_count():
+    """Returns (count, error) for members currently waiting, served from a short-TTL cache when possible."""
+    with _visitor_count_lock:
+        count = _visitor_count_cache.get('waiting')
+        if count is not None:
+            return count, None
+        # Query while holding the lock so concurrent renders on a cold cache share a single COUNT
+        count, error = get_kiosk_queue_count(STATUS_WAITING)
+        if not error:
+            _visitor_count_cache['waiting'] = count
+        return count, error
+
+def invalidate_visitor_count():
+    """Drops the cached waiting count after the queue changes."""
+    with _visitor_count_lock:
+        _visitor_count_cache.clear()
+
+def add_queue_change_listener(callback):
+    """Registers a no-argument callback invoked whenever this module changes the kiosk queue."""
+    _queue_change_listeners.append(callback)
+
+def _queue_changed():
+    invalidate_visitor_count()
+    for callback in list(_queue_change_listeners):
+        try:
+            callback()
+        except Exception as e:
+            logging.warning(f"Queue change listener failed: {e}")
+
+def _store_visitor_count(count):
+    # Queries that already know the waiting count (e.g. the dashboard snapshot) refresh the cache for free
+    with _visitor_count_lock:
+        _visitor_count_cache['waiting'] = count
+
+def get_dashboard_snapshot():
+    """
+    Retrieves everything the dashboard needs in a single round trip: waiting rows (oldest first),
+    the first page of handled rows in the handled window (most recent first), the counts and a
+    change-feed token for get_queue_changes, returned as one batch with four result sets.
+    """
+    conn = get_connection()
+    if not conn:
+        return None, "Database connection failed"
+
+    cursor = conn.cursor()
+    sql = f"""
+        SET NOCOUNT ON;
+
+        -- Change-feed token taken before reading, so nothing committed after this point is missed
+        DECLARE @token BIGINT = CONVERT(BIGINT, MIN_ACTIVE_ROWVERSION()) - 1;
+
+        SELECT
+            FacingMemberID, Name, HelpTopic, SubIssue, CreatedDate, UpdatedDate, Status, MemberNumber
+        FROM {DB_KIOSK_TABLE}
+        WHERE Status = '{STATUS_WAITING}'
+        ORDER BY CreatedDate ASC; -- Show oldest waiting first
+
+        SELECT TOP (?)
+            FacingMemberID, Name, HelpTopic, SubIssue, CreatedDate, UpdatedDate, Status
+        FROM {DB_KIOSK_TABLE}
+        WHERE Status = '{STATUS_HANDLED}' AND CreatedDate >= ?
+        ORDER BY CreatedDate DESC, FacingMemberID DESC; -- Show most recently handled first
+
+        SELECT COUNT(*) AS HandledCount
+        FROM {DB_KIOSK_TABLE}
+        WHERE Status = '{STATUS_HANDLED}' AND CreatedDate >= ?;
+
+        SELECT @token AS QueueToken;
+    """
+    window_start = get_handled_window_start()
+    # One extra row tells us whether a "load more" cursor is needed
+    params = (HANDLED_PAGE_SIZE + 1, window_start, window_start)
+    try:
+        logging.info("Executing SQL batch for get_dashboard_snapshot")
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        waiting = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        handled = []
+        if cursor.nextset():
+            columns = [column[0] for column in cursor.description]
+            handled = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        handled_count = len(handled)
+        if cursor.nextset():
+            handled_count = cursor.fetchone()[0]
+
+        queue_token = None
+        if cursor.nextset():
+            queue_token = cursor.fetchone()[0]
+
+        handled_next_cursor = None
+        if len(handled) > HANDLED_PAGE_SIZE:
+            handled = handled[:HANDLED_PAGE_SIZE]
+            handled_next_cursor = encode_handled_cursor(handled[-1])
+
+        snapshot = {
+            'waiting': waiting,
+            'handled': handled,
+            'handled_next_cursor': handled_next_cursor,
+            'waiting_count': len(waiting),
+            'handled_count': handled_count,
+            'queue_token': queue_token,
+        }
+        _store_visitor_count(len(waiting))
+        logging.info(f"Retrieved dashboard snapshot: {len(waiting)} waiting, {len(handled)} handled.")
+        return snapshot, None
+    except pyodbc.Error as ex:
+        sqlstate = ex.args[0]
+        message = ex.args[1]
+        if 'Invalid column name' in message and 'Status' in message:
+             logging.error("CRITICAL: 'Status' column not found in [Interactions].[dbo].[FacingMembers] table. Queue functionality requires this column.")
+             return None, "Database schema error: 'Status' column missing."
+        else:
+            logging.error(f"Failed to retrieve dashboard snapshot. SQLSTATE: {sqlstate} Message: {message}")
+            return None, f"Database error: {message}"
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while fetching dashboard snapshot: {str(e)}")
+        return None, f"An unexpected error occurred: {str(e)}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def get_handled_page(before=None, limit=None):
+    """
+    Retrieves one page of handled check-ins inside the handled window, most recent first.
+    'before' is a cursor from a previous page; returns ((rows, next_cursor), error).
+    """
+    limit = max(1, min(int(limit or HANDLED_PAGE_SIZE), 200))
+    try:
+        before_key = parse_handled_cursor(before) if before else None
+    except ValueError:
+        return ([], None), "Invalid cursor."
+
+    conn = get_connection()
+    if not conn:
+        return ([], None), "Database connection failed"
+
+    cursor = conn.cursor()
+    # Keyset pagination: seek past the last row seen instead of OFFSET, so every page costs the same
+    # regardless of how deep into the list the caller is. Ties on CreatedDate are broken by ID.
+    keyset_filter = ""
+    params = [limit + 1, get_handled_window_start()]
+    if before_key:
+        # The cursor is bound as a datetime, so no DATEFORMAT/language-dependent string conversion happens.
+        # pyodbc sends it as DATETIME2; the CAST rounds it to the column's type so the equality tie-break holds.
+        keyset_filter = """
+            AND (CreatedDate < CAST(? AS DATETIME)
+                 OR (CreatedDate = CAST(? AS DATETIME) AND FacingMemberID < ?))"""
+        params.extend([before_key[0], before_key[0], before_key[1]])
+    sql = f"""
+        SELECT TOP (?)
+            FacingMemberID, Name, HelpTopic, SubIssue, CreatedDate, UpdatedDate, Status
+        FROM {DB_KIOSK_TABLE}
+        WHERE Status = '{STATUS_HANDLED}' AND CreatedDate >= ?{keyset_filter}
+        ORDER BY CreatedDate DESC, FacingMemberID DESC
+    """
+    try:
+        logging.info(f"Executing SQL for get_handled_page before cursor: {before}")
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_handled_cursor(rows[-1])
+        logging.info(f"Retrieved {len(rows)} handled records (more: {next_cursor is not None}).")
+        return (rows, next_cursor), None
+    except pyodbc.Error as ex:
+        sqlstate = ex.args[0]
+        message = ex.args[1]
+        logging.error(f"Failed to retrieve handled page. SQLSTATE: {sqlstate} Message: {message}")
+        return ([], None), f"Database error: {message}"
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while fetching handled page: {str(e)}")
+        return ([], None), f"An unexpected error occurred: {str(e)}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def get_queue_changes(since_token, limit=500):
+    """
+    Returns the kiosk rows inserted or updated since a change-feed token, using the RowVer
+    ROWVERSION column (migration 0002). Result is ({'token', 'changes', 'has_more'}, error);
+    pass the returned token to the next call. A None token only returns the current token.
+    """
+    conn = get_connection()
+    if not conn:
+        return None, "Database connection failed"
+
+    cursor = conn.cursor()
+    # Rows at or above MIN_ACTIVE_ROWVERSION() may belong to uncommitted transactions, so the feed
+    # only advances to just below it; anything still in flight is picked up by the next call.
+    if since_token is None:
+        sql = "SELECT CONVERT(BIGINT, MIN_ACTIVE_ROWVERSION()) - 1 AS QueueToken"
+        params = ()
+    else:
+        sql = f"""
+            SET NOCOUNT ON;
+            DECLARE @high BIGINT = CONVERT(BIGINT, MIN_ACTIVE_ROWVERSION()) - 1;
+
+            SELECT TOP (?)
+                FacingMemberID, Name, HelpTopic, SubIssue, CreatedDate, UpdatedDate, Status, MemberNumber,
+                CONVERT(BIGINT, RowVer) AS RowVer
+            FROM {DB_KIOSK_TABLE}
+            WHERE RowVer > CONVERT(BINARY(8), CAST(? AS BIGINT))
+              AND RowVer <= CONVERT(BINARY(8), @high)
+            ORDER BY RowVer ASC;
+
+            SELECT @high AS QueueToken;
+        """
+        params = (limit + 1, int(since_token))
+    try:
+        logging.info(f"Executing SQL for get_queue_changes since token: {since_token}")
+        cursor.execute(sql, params)
+        if since_token is None:
+            return {'token': cursor.fetchone()[0], 'changes': [], 'has_more': False}, None
+
+        columns = [column[0] for column in cursor.description]
+        changes = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        token = int(since_token)
+        if cursor.nextset():
+            token = cursor.fetchone()[0]
+
+        has_more = len(changes) > limit
+        if has_more:
+            # Resume right after the last row returned instead of jumping to the high-water mark
+            changes = changes[:limit]
+            token = changes[-1]['RowVer']
+        if changes:
+            logging.info(f"Retrieved {len(changes)} kiosk queue changes (more: {has_more}).")
+        return {'token': token, 'changes': changes, 'has_more': has_more}, None
+    except pyodbc.Error as ex:
+        sqlstate = ex.args[0]
+        message = ex.args[1]
+        if 'Invalid column name' in message and 'RowVer' in message:
+             logging.error("CRITICAL: 'RowVer' column not found in kiosk table. Run migrations/0002_kiosk_rowversion.sql.")
+             return None, "Database schema error: 'RowVer' column missing."
+        else:
+            logging.error(f"Failed to retrieve kiosk queue changes. SQLSTATE: {sqlstate} Message: {message}")
+            return None, f"Database error: {message}"
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while fetching kiosk queue changes: {str(e)}")
+        return None, f"An unexpected error occurred: {str(e)}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
 def update_kiosk_queue_status(facing_member_id, new_status='Handled'):
     """Updates the Status for a FacingMembers record."""
-    conn = create_connection()
+    conn = get_connection()
     if not conn:
         return False, "Database connection failed"
 
@@ -411,7 +740,8 @@ def update_kiosk_queue_status(facing_member_id, new_status='Handled'):
     # Use environment variable for table name
     # ASSUMES a 'Status' column exists
     
-    # Modified query to be more flexible with status matching
+    # Always store the canonical value so queue queries can match Status exactly
+    new_status = normalize_status(new_status)
     sql = f"""
         UPDATE {DB_KIOSK_TABLE}
         SET Status = ?, UpdatedDate = GETDATE()
@@ -428,6 +758,7 @@ def update_kiosk_queue_status(facing_member_id, new_status='Handled'):
             logging.warning(f"Kiosk Queue record ID {facing_member_id} not found for update.")
             return False, "Record not found."
         conn.commit()
+        _queue_changed()
         logging.info(f"Kiosk Queue record ID {facing_member_id} status updated to '{new_status}'.")
         return True, None # Return success and no error
     except pyodbc.Error as ex:
@@ -454,7 +785,7 @@ def update_kiosk_queue_status(facing_member_id, new_status='Handled'):
 
 def update_member_number_for_checkin(checkin_id, new_member_number, source):
     """Updates the MemberNumber, ManuallyEnteredMemberNumber, MemberNumberSource, and UpdatedDate for a check-in."""
-    conn = create_connection()
+    conn = get_connection()
     if not conn:
         return False, "Database connection failed"
 
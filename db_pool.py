@@ -0,0 +1,255 @@
+import logging
+import threading
+import time
+
+
+class PooledConnection:
+    """Wraps a pyodbc connection so that close() hands it back to the pool instead of disconnecting."""
+
+    def __init__(self, pool, raw_conn):
+        self._pool = pool
+        self._conn = raw_conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.last_validated = self.created_at
+        self.checked_out = False
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        # Callers in database.py close their connection in a finally block; returning it here
+        # keeps those functions unchanged while the link itself stays open.
+        if self.checked_out:
+            self.checked_out = False
+            self._pool.release(self)
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of database connections.
+
+    Connections are validated on borrow (a cheap 'SELECT 1' when they have been idle longer than
+    validate_after seconds), discarded once they have been idle longer than max_idle seconds, and
+    replaced transparently when the link turns out to be broken.
+    """
+
+    def __init__(self, connect, max_size=10, timeout=5.0, max_idle=300.0, validate_after=30.0, name='db'):
+        self._connect = connect
+        self.max_size = max(1, int(max_size))
+        self.timeout = float(timeout)
+        self.max_idle = float(max_idle)
+        self.validate_after = float(validate_after)
+        self.name = name
+
+        self._lock = threading.Condition(threading.Lock())
+        self._idle = []          # LIFO stack of PooledConnection, most recently used last
+        self._in_use = 0
+        self._opening = 0        # Slots reserved while a new connection is being opened
+
+        self._stats = {
+            'created': 0,
+            'borrowed': 0,
+            'released': 0,
+            'discarded_idle': 0,
+            'discarded_broken': 0,
+            'validation_failures': 0,
+            'connect_failures': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+        }
+
+    # --- Borrow / release -------------------------------------------------
+
+    def acquire(self):
+        """Borrows a healthy connection, opening a new one if below max_size. Returns None on failure/timeout."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+
+        while True:
+            candidate = None
+            open_new = False
+            stale = []
+            with self._lock:
+                while True:
+                    candidate = self._pop_idle_locked(stale)
+                    if candidate is not None:
+                        self._in_use += 1
+                        break
+                    if self._in_use + self._opening < self.max_size:
+                        self._opening += 1
+                        open_new = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._close_all_quietly(stale)
+                        self._stats['timeouts'] += 1
+                        logging.error(f"[DB Pool] Timed out after {self.timeout:.1f}s waiting for a '{self.name}' connection "
+                                      f"(in use: {self._in_use}/{self.max_size}).")
+                        return None
+                    if not waited:
+                        waited = True
+                        self._stats['waits'] += 1
+                    self._lock.wait(remaining)
+            self._close_all_quietly(stale)
+
+            if open_new:
+                conn = self._open_new()
+                if conn is None:
+                    return None
+                self._record_wait(started)
+                return conn
+
+            if self._validate(candidate):
+                candidate.last_used = time.monotonic()
+                self._record_wait(started)
+                with self._lock:
+                    self._stats['borrowed'] += 1
+                candidate.checked_out = True
+                return candidate
+
+            # Broken link: drop it and go round again, which will open a replacement if needed.
+            self._discard(candidate, in_use=True, reason='discarded_broken')
+
+    def release(self, pooled):
+        """Returns a borrowed connection to the pool, discarding it if it can no longer be reset."""
+        try:
+            # Reset any transaction left open by a SELECT (autocommit is off) so the next borrower starts clean.
+            pooled.raw.rollback()
+        except Exception as e:
+            logging.warning(f"[DB Pool] Discarding '{self.name}' connection that failed to reset: {e}")
+            self._discard(pooled, in_use=True, reason='discarded_broken')
+            return
+
+        pooled.last_used = time.monotonic()
+        with self._lock:
+            self._in_use -= 1
+            self._stats['released'] += 1
+            self._idle.append(pooled)
+            self._lock.notify()
+
+    # --- Monitoring -------------------------------------------------------
+
+    def stats(self):
+        """Returns a snapshot of pool usage counters for monitoring."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'name': self.name,
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'opening': self._opening,
+                'size': self._in_use + len(self._idle) + self._opening,
+                'timeout_seconds': self.timeout,
+                'max_idle_seconds': self.max_idle,
+            })
+        borrows = snapshot['borrowed'] or 1
+        snapshot['avg_wait_ms'] = round(snapshot.pop('total_wait_ms') / borrows, 3)
+        snapshot['max_wait_ms'] = round(snapshot['max_wait_ms'], 3)
+        return snapshot
+
+    def close_all(self):
+        """Closes every idle connection. Borrowed connections are closed when they are released."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        self._close_all_quietly(idle)
+
+    # --- Internals --------------------------------------------------------
+
+    def _pop_idle_locked(self, stale):
+        # Connections idle past max_idle are collected into 'stale' and closed after the lock is released.
+        now = time.monotonic()
+        while self._idle:
+            pooled = self._idle.pop()
+            if now - pooled.last_used > self.max_idle:
+                self._stats['discarded_idle'] += 1
+                stale.append(pooled)
+                continue
+            return pooled
+        return None
+
+    def _open_new(self):
+        try:
+            raw_conn = self._connect()
+        except Exception as e:
+            logging.error(f"[DB Pool] Error opening '{self.name}' connection: {e}")
+            raw_conn = None
+
+        with self._lock:
+            self._opening -= 1
+            if raw_conn is None:
+                self._stats['connect_failures'] += 1
+                self._lock.notify()
+                return None
+            self._in_use += 1
+            self._stats['created'] += 1
+            self._stats['borrowed'] += 1
+        pooled = PooledConnection(self, raw_conn)
+        pooled.checked_out = True
+        return pooled
+
+    def _validate(self, pooled):
+        if time.monotonic() - pooled.last_used < self.validate_after:
+            return True
+        cursor = None
+        try:
+            cursor = pooled.raw.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            pooled.last_validated = time.monotonic()
+            return True
+        except Exception as e:
+            logging.warning(f"[DB Pool] '{self.name}' connection failed validation, reconnecting: {e}")
+            with self._lock:
+                self._stats['validation_failures'] += 1
+            return False
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    def _discard(self, pooled, in_use, reason):
+        self._close_quietly(pooled)
+        with self._lock:
+            if in_use:
+                self._in_use -= 1
+            self._stats[reason] += 1
+            self._lock.notify()
+
+    def _record_wait(self, started):
+        wait_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._stats['total_wait_ms'] += wait_ms
+            if wait_ms > self._stats['max_wait_ms']:
+                self._stats['max_wait_ms'] = wait_ms
+
+    @classmethod
+    def _close_all_quietly(cls, pooled_list):
+        for pooled in pooled_list:
+            cls._close_quietly(pooled)
+
+    @staticmethod
+    def _close_quietly(pooled):
+        conn, pooled._conn = pooled._conn, None
+        if conn is None:
+            return
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,105 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+import requests
+
+
+_current = contextvars.ContextVar('latency_budget', default=None)
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Raised instead of starting, retrying or waiting longer on an upstream call once the latency budget is spent."""
+
+
+class Deadline:
+    """
+    A latency budget: the moment by which the work it covers (e.g. one web request) should be done.
+    exceeded is set once an upstream call was skipped or cut short because the budget ran out, so
+    the caller can tell staff the data shown may be partial.
+    """
+
+    __slots__ = ('name', 'budget', 'expires_at', 'exceeded')
+
+    def __init__(self, name, budget, expires_at=None):
+        self.name = name
+        self.budget = float(budget)
+        self.expires_at = expires_at if expires_at is not None else time.monotonic() + self.budget
+        self.exceeded = False
+
+    def remaining(self):
+        """Seconds left, never below 0."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def __repr__(self):
+        return f"Deadline({self.name!r}, {self.remaining():.2f}s of {self.budget:.2f}s left)"
+
+
+def start(seconds, name='request'):
+    """
+    Starts a budget of seconds for the current context and returns the token for finish().
+    A budget started inside another one never outlasts it. Returns None (no budget) for seconds <= 0.
+    """
+    if not seconds or seconds <= 0:
+        return None
+    outer = _current.get()
+    expires_at = time.monotonic() + seconds
+    if outer is not None:
+        expires_at = min(expires_at, outer.expires_at)
+    return _current.set(Deadline(name, seconds, expires_at))
+
+
+def finish(token):
+    """Ends the budget started by start(); accepts None."""
+    if token is not None:
+        _current.reset(token)
+
+
+@contextmanager
+def latency_budget(seconds, name='request'):
+    """with latency_budget(5): ... runs the block under a 5 second budget and yields its Deadline (or None)."""
+    token = start(seconds, name)
+    try:
+        yield _current.get() if token is not None else None
+    finally:
+        finish(token)
+
+
+def current():
+    """The Deadline of the current context, or None."""
+    return _current.get()
+
+
+def remaining():
+    """Seconds left in the current budget, or None when there is no budget."""
+    deadline = _current.get()
+    return None if deadline is None else deadline.remaining()
+
+
+def exceeded():
+    """True if an upstream call in the current budget was skipped or cut short."""
+    deadline = _current.get()
+    return deadline is not None and deadline.exceeded
+
+
+def mark_exceeded():
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.exceeded = True
+
+
+def clip_timeout(timeout):
+    """
+    Returns the (connect, read) timeout to use for a call made now: timeout capped by the remaining
+    budget. Raises DeadlineExceeded (and marks the budget exceeded) if nothing is left.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return timeout
+    left = deadline.remaining()
+    if left <= 0:
+        deadline.exceeded = True
+        raise DeadlineExceeded(f"Latency budget '{deadline.name}' ({deadline.budget:.1f}s) is spent")
+    if isinstance(timeout, tuple):
+        return tuple(min(part, left) if part is not None else left for part in timeout)
+    return min(timeout, left) if timeout is not None else left
@@ -0,0 +1,119 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+DNA_ASYNC_MEMBER_CONCURRENCY = int(os.getenv('DNA_ASYNC_MEMBER_CONCURRENCY', 4))   # DNA calls in flight at once for one member
+DNA_ASYNC_TXN_CHUNK_SIZE = int(os.getenv('DNA_ASYNC_TXN_CHUNK_SIZE', 4))           # Accounts per concurrent 7703 SubmitRequest
+
+
+class AsyncDNAClient:
+    """
+    Asyncio counterpart of DNAApiClient for fanning out one member's DNA calls concurrently.
+
+    Every call reuses the wrapped client's request builders, parsers, single-flight authentication
+    and pooled transport; the blocking round trip runs on a dedicated executor sized to the transport
+    pool, so awaiting several calls overlaps them. Calls made with the same limiter (see
+    member_limiter) share a concurrency cap.
+    """
+
+    def __init__(self, client, member_concurrency=DNA_ASYNC_MEMBER_CONCURRENCY, txn_chunk_size=DNA_ASYNC_TXN_CHUNK_SIZE,
+                 workers=None):
+        self.client = client
+        self.logger = client.logger
+        self.member_concurrency = max(1, int(member_concurrency))
+        self.txn_chunk_size = max(1, int(txn_chunk_size))
+        self.workers = max(1, int(workers or client.transport.pool_size))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='dna-async')
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {'calls': 0, 'failures': 0, 'max_in_flight': 0, 'chunked_fetches': 0}
+
+    # --- Public API -------------------------------------------------------
+
+    def member_limiter(self):
+        """Returns a semaphore capping the concurrent DNA calls made on behalf of one member."""
+        return asyncio.Semaphore(self.member_concurrency)
+
+    async def ensure_authentication(self, limiter=None):
+        return await self._call(limiter, self.client.ensure_authentication)
+
+    async def get_person_detail_by_member_number(self, member_number, limiter=None):
+        return await self._call(limiter, self.client.get_person_detail_by_member_number, member_number)
+
+    async def get_financial_transactions(self, acctNbr, limit=10, limiter=None):
+        return await self._call(limiter, self.client.get_financial_transactions, acctNbr, limit=limit)
+
+    async def get_financial_transactions_bulk(self, account_numbers, limit=10, limiter=None):
+        """
+        Same result as DNAApiClient.get_financial_transactions_bulk, but accounts are split into
+        SubmitRequests of txn_chunk_size accounts that run concurrently. Accounts in a failed chunk
+        map to None; None is returned only if every chunk failed.
+        """
+        account_numbers = list(dict.fromkeys(str(acct) for acct in account_numbers if acct))
+        if not account_numbers:
+            return {}
+        chunks = [account_numbers[i:i + self.txn_chunk_size] for i in range(0, len(account_numbers), self.txn_chunk_size)]
+        if len(chunks) == 1:
+            return await self._call(limiter, self.client.get_financial_transactions_bulk, chunks[0], limit=limit)
+
+        with self._lock:
+            self._stats['chunked_fetches'] += 1
+        results = await asyncio.gather(
+            *(self._call(limiter, self.client.get_financial_transactions_bulk, chunk, limit=limit) for chunk in chunks),
+            return_exceptions=True)
+
+        merged = {}
+        any_succeeded = False
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"[DNA_ASYNC] Transaction fetch failed for accounts {', '.join(chunk)}: {result}")
+                result = None
+            if result is None:
+                merged.update((acct, None) for acct in chunk)
+                continue
+            any_succeeded = True
+            merged.update(result)
+        return merged if any_succeeded else None
+
+    async def refresh_financial_transactions_bulk(self, history, limiter=None):
+        return await self._call(limiter, self.client.refresh_financial_transactions_bulk, history)
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['in_flight'] = self._in_flight
+        snapshot.update({'workers': self.workers, 'member_concurrency': self.member_concurrency,
+                         'txn_chunk_size': self.txn_chunk_size})
+        return snapshot
+
+    # --- Internals --------------------------------------------------------
+
+    async def _call(self, limiter, func, *args, **kwargs):
+        if limiter is None:
+            return await self._run_blocking(func, *args, **kwargs)
+        async with limiter:
+            return await self._run_blocking(func, *args, **kwargs)
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._stats['calls'] += 1
+            self._in_flight += 1
+            if self._in_flight > self._stats['max_in_flight']:
+                self._stats['max_in_flight'] = self._in_flight
+        try:
+            # run_in_executor does not carry contextvars over; copy them so the caller's latency budget applies
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, functools.partial(context.run, func, *args, **kwargs))
+        except Exception:
+            with self._lock:
+                self._stats['failures'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
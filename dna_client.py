@@ -1,3 +1,5 @@
+import functools
+import io
 import os
 import requests
 import xml.etree.ElementTree as ET
@@ -7,23 +9,100 @@ import html
 import uuid
 import warnings
 import traceback
-from requests.adapters import HTTPAdapter
+import threading
 import xml.dom.minidom as minidom
 from flask import current_app 
 import base64
 import hashlib
+from response_log_writer import ResponseLogWriter
+from http_transport import HttpTransport
+from deadline import DeadlineExceeded
+from circuit_breaker import CircuitOpenError
+from single_flight import SingleFlight, coalesced
+from transactions import Transaction, merge_recent_transactions, parse_amount_cents
 
 # Configure logging if not already configured by the main app
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Authentication lifetime. Tickets are treated as valid for DNA_AUTH_TTL_MINUTES and refreshed in the
+# background DNA_AUTH_REFRESH_MARGIN seconds before that, so requests keep using the current ticket.
+DNA_AUTH_TTL_MINUTES = float(os.getenv('DNA_AUTH_TTL_MINUTES', 60))
+DNA_AUTH_REFRESH_MARGIN = float(os.getenv('DNA_AUTH_REFRESH_MARGIN', 300))
+DNA_AUTH_RETRY_SECONDS = float(os.getenv('DNA_AUTH_RETRY_SECONDS', 30))   # Wait before retrying a failed background refresh
+DNA_MEMBER_INFO_CHUNK_SIZE = int(os.getenv('DNA_MEMBER_INFO_CHUNK_SIZE', 10))   # Members per 7725 SubmitRequest in get_member_info_bulk
+DNA_TXN_REFRESH_WINDOW = int(os.getenv('DNA_TXN_REFRESH_WINDOW', 5))   # Newest transactions requested per account when refreshing a cached history
+DNA_AUTH_BACKGROUND_REFRESH = os.getenv('DNA_AUTH_BACKGROUND_REFRESH', 'true').lower() in ('true', '1', 't')
+
+# Qualified tag names for the streaming 7703 transaction-history parser
+_NS_CORE = '{http://www.opensolutions.com/CoreApi}'
+_NS_MESSAGES = '{http://schemas.datacontract.org/2004/07/OpenSolutions.CoreApiService.Services.Messages}'
+_ATTR_XSI_TYPE = '{http://www.w3.org/2001/XMLSchema-instance}type'
+_TAG_RESPONSES = _NS_CORE + 'Responses'
+_TAG_RESPONSE_BASE = _NS_CORE + 'ResponseBase'
+_TAG_USER_AUTHENTICATION = _NS_CORE + 'UserAuthentication'
+_TAG_CORE_WAS_SUCCESSFUL = _NS_CORE + 'WasSuccessful'
+_TAG_WAS_SUCCESSFUL = _NS_MESSAGES + 'WasSuccessful'
+_TAG_REFERENCE_NUMBER = _NS_MESSAGES + 'ReferenceNumber'
+_TAG_ERROR_MESSAGE = _NS_MESSAGES + 'ErrorMessage'
+_TAG_RTXN = _NS_MESSAGES + 'Rtxn'
+_RTXN_FIELDS = {_NS_MESSAGES + name: name for name in (
+    'ActivityDateTime', 'TransactionAmount', 'RtxnTypeCode', 'ExternalRtxnDescription', 'RtxnDescription', 'RtxnSourceCd')}
+
+# GetTaxIdData (7725) fields are matched on local names, whichever namespace prefix DNA puts them in
+_PERSON_TEXT_FIELDS = frozenset((
+    'PersonNumber', 'FirstName', 'LastName', 'IsDeceased', 'LastUpdated', 'DateBirth', 'AddDate', 'MemberGroup',
+    'MemberNumber', 'TaxId'))
+_ACCOUNT_FIELDS = frozenset((
+    'AccountNumber', 'MajorAccountTypeCode', 'CurrentMinorAccountTypeCode', 'BalanceAmount', 'AvailableBalance',
+    'DateAccountOpened', 'CurrentAccountStatusCode'))
+
+
+@functools.lru_cache(maxsize=512)
+def _local_name(tag):
+    """'{namespace}Name' -> 'Name'."""
+    return tag.rpartition('}')[2] if isinstance(tag, str) else ''
+
+
+def _error_messages(errors_elem):
+    """Returns the non-empty ErrorMessage texts of the Error children of a DNA Errors element."""
+    messages = []
+    for error in errors_elem:
+        message = _child_texts(error, ('ErrorMessage',)).get('ErrorMessage')
+        if message:
+            messages.append(message)
+    return messages
+
+
+def _child_texts(elem, names):
+    """Returns {local name: text} for the first non-empty child of elem with each of the given local names."""
+    found = {}
+    for child in elem:
+        name = _local_name(child.tag)
+        if name in names and child.text and name not in found:
+            found[name] = child.text
+    return found
+
+# Raw/pretty-printed SOAP XML goes to its own logger so it can stay off while the app logs at DEBUG.
+# Set DNA_XML_LOG_LEVEL=DEBUG to see request and response XML.
+xml_logger = logging.getLogger('dna_client.xml')
+xml_logger.setLevel(os.getenv('DNA_XML_LOG_LEVEL', 'INFO').upper())
+
+# Optional full-response dumps to DNA_response_logs/, written off the request path for a sample of responses
+DNA_RESPONSE_LOG_ENABLED = os.getenv('DNA_RESPONSE_LOG_ENABLED', 'false').lower() in ('true', '1', 't')
+DNA_RESPONSE_LOG_DIR = os.getenv('DNA_RESPONSE_LOG_DIR', 'DNA_response_logs')
+DNA_RESPONSE_LOG_SAMPLE_RATE = float(os.getenv('DNA_RESPONSE_LOG_SAMPLE_RATE', 0.1))
+DNA_RESPONSE_LOG_MAX_FILES = int(os.getenv('DNA_RESPONSE_LOG_MAX_FILES', 500))
+DNA_RESPONSE_LOG_MAX_MB = float(os.getenv('DNA_RESPONSE_LOG_MAX_MB', 50))
+DNA_RESPONSE_LOG_RETENTION_DAYS = float(os.getenv('DNA_RESPONSE_LOG_RETENTION_DAYS', 7))
+
 
 class DNAApiError(Exception):
     pass
 
 
 class DNAApiClient:
-    def __init__(self, logger, verify_ssl=False):
+    def __init__(self, logger, verify_ssl=False, pool_size=None):
         # Load configuration directly from environment variables
         self.pie_endpoint = os.getenv('PIE_ENDPOINT')
         self.dna_endpoint = os.getenv('DNA_ENDPOINT')
@@ -40,8 +119,27 @@ class DNAApiClient:
         self.whois_response = None
         self.auth_expiration = None
         self.logger = logger
+        self._submit_envelope_segments = None  # (whois_response, prefix, suffix) for the current auth session
+        # Concurrent identical lookups (e.g. a prefetch and a page view of the same member) share one upstream call
+        self.single_flight = SingleFlight('dna')
+
+        # Single-flight authentication: one handshake runs at a time and callers that waited on it reuse its result
+        self._auth_lock = threading.Lock()
+        self._auth_attempts = 0
+        self._auth_refresher = None
+        self._auth_refresh_stop = threading.Event()
+        # Counters have their own lock so /api/metrics never waits behind a handshake holding _auth_lock
+        self._auth_stats_lock = threading.Lock()
+        self._auth_stats = {'handshakes': 0, 'failures': 0, 'background_refreshes': 0, 'waited_for_refresh': 0}
         self.verify_ssl = verify_ssl
-        self.session = self._create_retry_session()
+        # Shared keep-alive transport; DNA_HTTP_* variables tune pool size, timeouts and retries
+        self.transport = HttpTransport.from_env('DNA', name='dna', default_pool_size=pool_size or 10,
+                                                default_read_timeout=60, verify=self.verify_ssl)
+        self.session = self.transport.session
+        self.response_log = ResponseLogWriter(
+            DNA_RESPONSE_LOG_DIR, enabled=DNA_RESPONSE_LOG_ENABLED, sample_rate=DNA_RESPONSE_LOG_SAMPLE_RATE,
+            max_files=DNA_RESPONSE_LOG_MAX_FILES, max_total_bytes=int(DNA_RESPONSE_LOG_MAX_MB * 1024 * 1024),
+            retention_days=DNA_RESPONSE_LOG_RETENTION_DAYS, formatter=self.prettify_xml)
         self.transaction_type_descriptions = {
             'CDSB': 'Cost Disbursement',
             'CRCT': 'Cost Receipt',
@@ -92,14 +190,6 @@ class DNAApiClient:
             warnings.warn("SSL certificate verification is disabled.")
             requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
 
-    def _create_retry_session(self):
-        session = requests.Session()
-        retries = 3
-        adapter = HTTPAdapter(max_retries=retries)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-        return session
-
     def prettify_xml(self, xml_string):
         try:
             if isinstance(xml_string, str):
@@ -114,56 +204,62 @@ class DNAApiClient:
             return xml_string.decode('utf-8', errors='ignore') if isinstance(xml_string, bytes) else str(xml_string)
 
 
-    def log_xml_response(self, response_text):
-        """Log XML response, splitting long responses into a file."""
+    def _debug_xml(self, label, xml, pretty=True):
+        """
+        Logs XML (a string, bytes or an Element) at DEBUG on the 'dna_client.xml' logger. The
+        serialisation and pretty-printing only run when that logger is enabled for DEBUG.
+        """
+        if not xml_logger.isEnabledFor(logging.DEBUG):
+            return
+        if isinstance(xml, ET.Element):
+            xml = ET.tostring(xml, encoding='unicode')
+        if pretty:
+            xml = self.prettify_xml(xml)
+        elif isinstance(xml, bytes):
+            xml = xml.decode('utf-8', errors='ignore')
+        xml_logger.debug(f"{label}:\n{xml}")
+
+    def log_xml_response(self, response):
+        """
+        Logs an XML response (first 50 lines when XML debug is on) and offers it to the sampled response-log
+        writer. response.text is only decoded when one of them actually uses it.
+        """
         try:
-            pretty_xml = self.prettify_xml(response_text)
-            lines = pretty_xml.splitlines()
-            if len(lines) > 50:
-                self.logger.debug("--- Start XML Response (Truncated) ---")
-                for line in lines[:50]:
-                    self.logger.debug(line)
-                self.logger.debug("--- End XML Response (Truncated) ---")
-                log_dir = 'DNA_response_logs'
-                if not os.path.exists(log_dir):
-                    try:
-                        os.makedirs(log_dir)
-                    except OSError as e:
-                        self.logger.error(f"Could not create log directory {log_dir}: {e}")
-                        self.logger.debug(f"Raw XML Response:\n{response_text}")
-                        return
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-                file_path = os.path.join(log_dir, f'full_response_{timestamp}.xml')
-                try:
-                    with open(file_path, 'w', encoding='utf-8') as file:
-                        file.write(pretty_xml)
-                    self.logger.debug(f'Full XML response saved to {file_path}')
-                except IOError as e:
-                    self.logger.error(f"Could not write full XML response to {file_path}: {e}")
-                    self.logger.debug(f"Raw XML Response:\n{response_text}")
-            else:
-                self.logger.debug(f"XML Response:\n{pretty_xml}")
+            if xml_logger.isEnabledFor(logging.DEBUG):
+                lines = self.prettify_xml(response.text).splitlines()
+                if len(lines) > 50:
+                    xml_logger.debug("--- Start XML Response (Truncated) ---\n" + "\n".join(lines[:50]) + "\n--- End XML Response (Truncated) ---")
+                else:
+                    xml_logger.debug("XML Response:\n" + "\n".join(lines))
+            self.response_log.submit(lambda: response.text)
         except Exception as e:
-             self.logger.error(f"Error logging/prettifying XML response: {e}")
-             self.logger.debug(f"Raw XML Response:\n{response_text}")
+            self.logger.error(f"Error logging XML response: {e}")
 
-    def _make_request(self, url, headers, data):
+    def _make_request(self, url, headers, data, idempotent=True, hedge=False):
+        # Every call this client makes (sign-on, WhoIs, inquiry SubmitRequests with
+        # ShouldCommitOrRollback=false) is safe to repeat, so they default to idempotent retries.
+        # hedge=True marks the member-info (7725) and transaction (7703) reads the transport may hedge.
         try:
             self.logger.debug(f"Making request to {url}")
             self.logger.debug(f"Headers: {headers}")
-            self.logger.debug(f"Request data: {self.prettify_xml(data)}")
+            self._debug_xml("Request data", data)
 
-            # Increase timeout to 60 seconds for better reliability
-            response = self.session.post(url, headers=headers, data=data, timeout=60, verify=self.verify_ssl)
+            response = self.transport.post(url, headers=headers, data=data, idempotent=idempotent, hedge=hedge)
 
             self.logger.info(f"API called: POST {url}")
             self.logger.debug(f"Response status code: {response.status_code}")
             self.logger.debug(f"Response headers: {response.headers}")
             
-            self.log_xml_response(response.text)
+            self.log_xml_response(response)
 
             response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
             return response
+        except CircuitOpenError as e:
+            self.logger.warning(f"DNA API unavailable, not calling {url}: {e}")
+            return None
+        except DeadlineExceeded as e:
+            self.logger.warning(f"Latency budget exhausted; gave up on DNA call to {url}: {e}")
+            return None
         except requests.ConnectTimeout as e:
             self.logger.error(f"Connection timeout to DNA API: {str(e)}")
             self.logger.error(f"Could not connect to {url} - server may be down or unreachable")
@@ -178,14 +274,14 @@ class DNAApiClient:
              if e.response is not None:
                  self.logger.error(f"Response status code: {e.response.status_code}")
                  self.logger.error(f"Response headers: {e.response.headers}")
-                 self.log_xml_response(e.response.text) # Log the error response body
+                 self.log_xml_response(e.response) # Log the error response body
              return None
         except requests.RequestException as e:
             self.logger.error(f"General API request failed: {str(e)}")
             if hasattr(e, 'response') and e.response is not None:
                 self.logger.error(f"Response status code: {e.response.status_code}")
                 self.logger.error(f"Response headers: {e.response.headers}")
-                self.log_xml_response(e.response.text)
+                self.log_xml_response(e.response)
             return None
         except Exception as e: # Catch any other unexpected errors
             self.logger.error(f"Unexpected error during API request: {str(e)}", exc_info=True)
@@ -193,7 +289,24 @@ class DNAApiClient:
 
 
     def authenticate(self):
+        """Runs the DirectSignon + WhoIs handshake, serialised with any other refresh in progress."""
+        with self._auth_lock:
+            return self._authenticate_locked()
+
+    def _authenticate_locked(self):
         self.logger.info("Starting authentication process")
+        self._auth_attempts += 1
+        self._count_auth('handshakes')
+        success = self._run_auth_handshake()
+        if success:
+            self._start_auth_refresher()
+        else:
+            self._count_auth('failures')
+        return success
+
+    def _run_auth_handshake(self):
+        # The new ticket is built up in locals and published only once both calls succeed, so threads
+        # using the current credentials never see a half-finished login.
         try:
             login_data = self._prepare_login_data()
             login_headers = {
@@ -205,15 +318,15 @@ class DNAApiClient:
                 self.logger.error("Authentication failed: Connection to DNA API timed out or request failed.")
                 return False
                 
-            self.logger.debug(f"Login response content: {self.prettify_xml(login_response.content)}")
-            self.sso_ticket = self._parse_authentication_response(login_response.content)
-            if not self.sso_ticket:
+            self._debug_xml("Login response content", login_response.content)
+            sso_ticket = self._parse_authentication_response(login_response.content)
+            if not sso_ticket:
                 self.logger.error("Failed to obtain SSO ticket from response")
                 return False
                 
             self.logger.info("Successfully obtained SSO ticket")
 
-            whois_data = self._prepare_whois_data()
+            whois_data = self._prepare_whois_data(sso_ticket)
             whois_headers = {
                 'Content-Type': 'text/xml; charset=utf-8',
                 'SOAPAction': '"http://www.opensolutions.com/WhoIs"'
@@ -223,13 +336,15 @@ class DNAApiClient:
                 self.logger.error("Authentication failed: WhoIs request to DNA API timed out or request failed.")
                 return False
                 
-            self.logger.debug(f"WhoIs response content: {self.prettify_xml(whois_response.content)}")
-            self.whois_response = self._parse_whois_response(whois_response.content)
-            if not self.whois_response:
+            self._debug_xml("WhoIs response content", whois_response.content)
+            whois_result = self._parse_whois_response(whois_response.content)
+            if not whois_result:
                 self.logger.error("Failed to obtain WhoIs response from response")
                 return False
 
-            self.auth_expiration = datetime.now() + timedelta(hours=1)
+            self.sso_ticket = sso_ticket
+            self.whois_response = whois_result
+            self.auth_expiration = datetime.now() + timedelta(minutes=DNA_AUTH_TTL_MINUTES)
             self.logger.info("Authentication successful")
             return True
         except Exception as e:
@@ -261,15 +376,16 @@ class DNAApiClient:
   </soap:Body>
 </soap:Envelope>"""
 
-    def _prepare_whois_data(self):
-        if not self.sso_ticket:
+    def _prepare_whois_data(self, sso_ticket=None):
+        sso_ticket = sso_ticket or self.sso_ticket
+        if not sso_ticket:
             self.logger.error("SSO ticket is missing")
             raise DNAApiError("SSO ticket is missing")
 
         # Construct the inner XML request first
         inner_xml = f"""<?xml version="1.0" encoding="utf-8"?>
-<WhoIsRequest MessageDateTime="{datetime.now().isoformat()}" TrackingId="{str(uuid.uuid4())}" SSOTicket="{html.escape(self.sso_ticket)}">
-  <LookupSSOTicket>{html.escape(self.sso_ticket)}</LookupSSOTicket>
+<WhoIsRequest MessageDateTime="{datetime.now().isoformat()}" TrackingId="{str(uuid.uuid4())}" SSOTicket="{html.escape(sso_ticket)}">
+  <LookupSSOTicket>{html.escape(sso_ticket)}</LookupSSOTicket>
 </WhoIsRequest>"""
         
         # Escape the entire inner XML string before embedding it
@@ -285,7 +401,7 @@ class DNAApiClient:
     def _parse_authentication_response(self, response_content):
         try:
             root = ET.fromstring(response_content)
-            self.logger.debug(f"Authentication response XML: {self.prettify_xml(ET.tostring(root, encoding='unicode'))}")
+            self._debug_xml("Authentication response XML", root)
             
             direct_signon_result = root.find('.//{http://www.opensolutions.com/}DirectSignonResult')
             if direct_signon_result is not None and direct_signon_result.text:
@@ -307,7 +423,7 @@ class DNAApiClient:
     def _parse_whois_response(self, response_content):
         try:
             root = ET.fromstring(response_content)
-            self.logger.debug(f"WhoIs response XML: {self.prettify_xml(ET.tostring(root, encoding='unicode'))}")
+            self._debug_xml("WhoIs response XML", root)
             
             whois_result = root.find('.//{http://www.opensolutions.com/}WhoIsResult')
             if whois_result is not None:
@@ -322,48 +438,126 @@ class DNAApiClient:
             self.logger.error(f"Unexpected error parsing WhoIs response: {str(e)}", exc_info=True)
             return None
 
+    def _has_valid_authentication(self):
+        expiration = self.auth_expiration
+        return bool(self.sso_ticket and self.whois_response and expiration and datetime.now() < expiration)
+
     def ensure_authentication(self):
-        if not self.sso_ticket or not self.whois_response or datetime.now() >= self.auth_expiration:
-            self.logger.info("[DNA_CLIENT] Starting new authentication process.")
-            auth_success = self.authenticate()
-            if not auth_success:
+        if self._has_valid_authentication():
+            self.logger.debug("[DNA_CLIENT] Using existing valid authentication.")
+            return True
+
+        attempts_seen = self._auth_attempts
+        with self._auth_lock:
+            if self._has_valid_authentication():
+                # Another thread refreshed the ticket while this one waited
+                self._count_auth('waited_for_refresh')
+                return True
+            if self._auth_attempts != attempts_seen:
+                # The handshake this thread waited on just failed; don't immediately repeat it
+                self._count_auth('waited_for_refresh')
                 self.logger.warning("Authentication failed. DNA API features will be unavailable.")
                 return False
-            return auth_success
-        else:
-            self.logger.info("[DNA_CLIENT] Using existing valid authentication.")
-            return True
+            self.logger.info("[DNA_CLIENT] Starting new authentication process.")
+            auth_success = self._authenticate_locked()
+        if not auth_success:
+            self.logger.warning("Authentication failed. DNA API features will be unavailable.")
+            return False
+        return auth_success
+
+    def _count_auth(self, counter):
+        with self._auth_stats_lock:
+            self._auth_stats[counter] += 1
+
+    def auth_stats(self):
+        """Returns authentication counters and the current ticket expiry for monitoring."""
+        with self._auth_stats_lock:
+            snapshot = dict(self._auth_stats)
+        expiration = self.auth_expiration
+        snapshot['authenticated'] = self._has_valid_authentication()
+        snapshot['expires_in_seconds'] = round((expiration - datetime.now()).total_seconds()) if expiration else None
+        snapshot['background_refresh'] = self._auth_refresher is not None and self._auth_refresher.is_alive()
+        return snapshot
+
+    def stop_auth_refresh(self):
+        """Stops the background refresh thread (e.g. on shutdown)."""
+        self._auth_refresh_stop.set()
+
+    def _start_auth_refresher(self):
+        if not DNA_AUTH_BACKGROUND_REFRESH or self._auth_refresh_stop.is_set():
+            return
+        if self._auth_refresher is not None and self._auth_refresher.is_alive():
+            return
+        self._auth_refresher = threading.Thread(target=self._auth_refresh_loop, name='dna-auth-refresh', daemon=True)
+        self._auth_refresher.start()
+
+    def _auth_refresh_loop(self):
+        """Re-authenticates shortly before the ticket expires so request threads never wait on a login."""
+        while not self._auth_refresh_stop.is_set():
+            expiration = self.auth_expiration
+            if expiration is None:
+                delay = DNA_AUTH_RETRY_SECONDS
+            else:
+                refresh_at = expiration - timedelta(seconds=DNA_AUTH_REFRESH_MARGIN)
+                delay = max(0.0, (refresh_at - datetime.now()).total_seconds())
+            if delay > 0 and self._auth_refresh_stop.wait(delay):
+                return
+
+            with self._auth_lock:
+                expiration = self.auth_expiration
+                if expiration and datetime.now() < expiration - timedelta(seconds=DNA_AUTH_REFRESH_MARGIN):
+                    continue  # Refreshed by a request thread in the meantime
+                self.logger.info("[DNA_CLIENT] Refreshing authentication in the background before it expires.")
+                self._count_auth('background_refreshes')
+                success = self._authenticate_locked()
+            if not success:
+                # The current ticket (if still valid) keeps serving requests; try again shortly
+                self.logger.warning(f"[DNA_CLIENT] Background authentication refresh failed; retrying in {DNA_AUTH_RETRY_SECONDS:.0f}s.")
+                if self._auth_refresh_stop.wait(DNA_AUTH_RETRY_SECONDS):
+                    return
             
     def _prepare_submit_request_envelope(self, request_body):
         """
         Prepares the SOAP envelope for a SubmitRequest call to the DNA API.
         This is used by various methods that need to make API calls to the DNA endpoint.
-        
+
+        The static parts of the envelope (everything but the RequestBase elements) are rendered
+        and encoded once per auth session; each call only splices request_body between them.
+
         Args:
             request_body: The specific request body XML for the API call
-            
+
         Returns:
-            The complete XML request string, or None if authentication details are missing
+            The complete UTF-8 encoded request, or None if authentication details are missing
         """
-        if not self.application_id or not self.ntwk_node_name or not self.whois_response:
+        password = self.whois_response
+        if not self.application_id or not self.ntwk_node_name or not password:
             self.logger.error("Missing required parameters for API request")
             return None
-            
-        return f"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+
+        segments = self._submit_envelope_segments
+        if segments is None or segments[0] != password:
+            segments = self._submit_envelope_segments = (password,) + self._render_submit_envelope_segments(password)
+        return b"".join((segments[1], request_body.encode('utf-8'), segments[2]))
+
+    def _render_submit_envelope_segments(self, password):
+        """Returns the encoded (prefix, suffix) of the SubmitRequest envelope around the <Requests> contents."""
+        prefix = """<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
   <s:Body>
     <SubmitRequest xmlns="http://www.opensolutions.com/CoreApi">
       <input xmlns:i="http://www.w3.org/2001/XMLSchema-instance">
         <Input>
           <ExtensionRequests i:nil="true" />
           <Requests>
-            {request_body}
+            """
+        suffix = f"""
           </Requests>
           <UserAuthentication>
             <ApplID>{html.escape(self.application_id)}</ApplID>
             <ApplNumber>0</ApplNumber>
             <AuthorizationType>SingleSignOn</AuthorizationType>
             <NetworkNodeName>{html.escape(self.ntwk_node_name)}</NetworkNodeName>
-            <Password>{html.escape(self.whois_response)}</Password>
+            <Password>{html.escape(password)}</Password>
           </UserAuthentication>
         </Input>
         <ShouldCommitOrRollback>false</ShouldCommitOrRollback>
@@ -371,9 +565,11 @@ class DNAApiClient:
     </SubmitRequest>
   </s:Body>
 </s:Envelope>"""
+        return prefix.encode('utf-8'), suffix.encode('utf-8')
 
 
     # Get Person Number by Member Number ---
+    @coalesced('person_number', key=lambda member_number: str(member_number))
     def get_person_number_by_member_number(self, member_number):
         """
         Fetches person details using Member Number (ReqTypCd 7711) and returns the Person Number.
@@ -387,13 +583,7 @@ class DNAApiClient:
             self.logger.warning(f"DNA authentication failed before getting person number {member_number}: {auth_err}")
             return None
 
-        # Construct the request body for PersonDetailInquiryRequest (7711) using Member Number attribute
-        request_body = f"""
-            <RequestBase i:type="PersonDetailInquiryRequest" xmlns:i="http://www.w3.org/2001/XMLSchema-instance">
-              <Person memberNbr="{html.escape(str(member_number))}" />
-              <RequestTypeCode>7711</RequestTypeCode>
-            </RequestBase>"""
-
+        request_body = self._prepare_person_number_request(member_number)
         full_request_xml = self._prepare_submit_request_envelope(request_body)
         if full_request_xml is None:
             self.logger.warning(f"Failed to prepare request envelope for member number {member_number}")
@@ -472,6 +662,7 @@ class DNAApiClient:
 
     # ---Get TaxId Data by Person Number ---
     # Note: This method is kept for reference but get_member_info_by_member_number (Method 3) is preferred
+    @coalesced('taxid_data', key=lambda persnbr: str(persnbr))
     def get_taxid_data_by_person_number(self, persnbr):
         """
         Fetches detailed member info including accounts using Person Number (ReqTypCd 7725, Method 4).
@@ -485,14 +676,7 @@ class DNAApiClient:
             self.logger.warning(f"DNA authentication failed before getting TaxId data for person {persnbr}: {auth_err}")
             return None
 
-        # Construct the request body for GetTaxIdDataRequest (7725) using Person Number (Method 4)
-        request_body = f"""
-            <RequestBase i:type="GetTaxIdDataRequest" xmlns:i="http://www.w3.org/2001/XMLSchema-instance">
-              <MethodNumber>4</MethodNumber>
-              <ReferenceNumber>{html.escape(str(persnbr))}</ReferenceNumber>
-              <RequestTypeCode>7725</RequestTypeCode>
-            </RequestBase>"""
-
+        request_body = self._prepare_taxid_by_person_request(persnbr)
         full_request_xml = self._prepare_submit_request_envelope(request_body)
         if full_request_xml is None:
              self.logger.warning(f"Failed to prepare request envelope for person number {persnbr}")
@@ -505,7 +689,7 @@ class DNAApiClient:
 
         try:
             self.logger.info(f"[DNA_CLIENT_API_CALL] Attempting to fetch TaxId data via API for person number: {persnbr}")
-            response = self._make_request(self.dna_endpoint, headers, full_request_xml)
+            response = self._make_request(self.dna_endpoint, headers, full_request_xml, hedge=True)
             if response is None:
                 self.logger.warning(f"API request failed when fetching TaxId data for person number {persnbr}")
                 return None
@@ -515,229 +699,385 @@ class DNAApiClient:
             self.logger.error(f"Unexpected error getting TaxId data for person {persnbr}: {str(e)}", exc_info=True)
             return None
 
-    def parse_member_info(self, response_content):
-        """Parses the GetTaxIdDataResponse (7725) to extract member details."""
-        self.logger.debug("Parsing member info from response")
-        try:
-            root = ET.fromstring(response_content)
-            self.logger.debug(f"Response XML: {self.prettify_xml(ET.tostring(root, encoding='unicode'))}")
+    def _prepare_person_number_request(self, member_number):
+        """RequestBase for PersonDetailInquiryRequest (7711) using the Member Number attribute."""
+        return f"""
+            <RequestBase i:type="PersonDetailInquiryRequest" xmlns:i="http://www.w3.org/2001/XMLSchema-instance">
+              <Person memberNbr="{html.escape(str(member_number))}" />
+              <RequestTypeCode>7711</RequestTypeCode>
+            </RequestBase>"""
 
-            namespaces = {
-                's': 'http://schemas.xmlsoap.org/soap/envelope/',
-                'core': 'http://www.opensolutions.com/CoreApi', 
-                'a': 'http://schemas.datacontract.org/2004/07/OpenSolutions.CoreApiService.Services.Messages',
-                'i': 'http://www.w3.org/2001/XMLSchema-instance'
-                # Add other namespaces if needed 
-            }
+    def _prepare_taxid_by_person_request(self, persnbr):
+        """RequestBase for GetTaxIdDataRequest (7725) using Person Number (Method 4)."""
+        return f"""
+            <RequestBase i:type="GetTaxIdDataRequest" xmlns:i="http://www.w3.org/2001/XMLSchema-instance">
+              <MethodNumber>4</MethodNumber>
+              <ReferenceNumber>{html.escape(str(persnbr))}</ReferenceNumber>
+              <RequestTypeCode>7725</RequestTypeCode>
+            </RequestBase>"""
 
-            # 1. Check overall success in UserAuthentication first
-            user_auth_elem = root.find('.//core:UserAuthentication', namespaces)
-            if user_auth_elem is None:
-                 self.logger.error("Parser Error: Could not find 'core:UserAuthentication' element.")
-                 return None
+    @coalesced('person_lookup', key=lambda member_number: str(member_number))
+    def get_member_info_with_person_lookup(self, member_number):
+        """
+        Combined replacement for get_person_number_by_member_number (7711) followed by
+        get_taxid_data_by_person_number (7725 Method 4).
 
-            overall_successful_elem = user_auth_elem.find('core:WasSuccessful', namespaces)
-            if overall_successful_elem is None or overall_successful_elem.text.lower() != 'true':
-                error_message = "Overall DNA API request failed (UserAuthentication WasSuccessful is not 'true')."
-                errors_elem = user_auth_elem.find('core:Errors', namespaces)
-                if errors_elem is not None:
-                    for error in errors_elem.findall('core:Error', namespaces):
-                        err_msg = self.safe_find(error, 'core:ErrorMessage', namespaces) 
-                        if err_msg:
-                             error_message += f" Message: {err_msg}"
-                self.logger.error(error_message)
-                return None # Overall request failed
+        The 7711 lookup and a 7725 Method 3 lookup by member number go out together in one
+        SubmitRequest. If the 7725 response holds the member, that is the result. If only 7711 found
+        the person, the Method 4 lookup by person number follows on the same pooled connection.
+        Returns the member info dict or None.
+        """
+        self.logger.info(f"[DNA_CLIENT] Attempting combined 7711 + 7725 lookup for member number: {member_number}")
+        try:
+            if not self.ensure_authentication():
+                return None # Authentication failed
+        except Exception as auth_err:
+            self.logger.warning(f"DNA authentication failed before combined lookup for member {member_number}: {auth_err}")
+            return None
 
-            # 2. If overall request was successful, find the specific GetTaxIdDataResponse
-            self.logger.debug("Overall UserAuthentication was successful. Looking for GetTaxIdDataResponse.")
-            response_base = None
-            for resp in root.findall('.//core:Responses/core:ResponseBase', namespaces):
-                if resp.get('{' + namespaces['i'] + '}type') == 'GetTaxIdDataResponse':
-                    response_base = resp
-                    break
+        request_body = self._prepare_person_number_request(member_number) + self._prepare_member_info_request(member_number)
+        full_request_xml = self._prepare_submit_request_envelope(request_body)
+        if full_request_xml is None:
+            self.logger.warning(f"Failed to prepare request envelope for member number {member_number}")
+            return None
 
-            if response_base is None:
-                self.logger.error("Overall request successful, but could not find GetTaxIdDataResponse element.")
+        headers = {
+            'Content-Type': 'text/xml; charset=utf-8',
+            'SOAPAction': '"http://www.opensolutions.com/CoreApi/ICoreApiService/SubmitRequest"'
+        }
+
+        try:
+            self.logger.info(f"[DNA_CLIENT_API_CALL] Attempting combined person lookup via API for member number: {member_number}")
+            response = self._make_request(self.dna_endpoint, headers, full_request_xml, hedge=True)
+            if response is None:
+                self.logger.warning(f"API request failed during combined lookup for member number {member_number}")
                 return None
+            self.logger.info(f"[DNA_CLIENT_API_SUCCESS] Successfully received API response for combined lookup: {member_number}")
+            persnbr, member_info = self.parse_person_lookup(response.content)
+        except Exception as e:
+            self.logger.error(f"Unexpected error during combined lookup for member {member_number}: {str(e)}", exc_info=True)
+            return None
 
-            # 3. Now parse the content within the found response_base
-            specific_successful_elem = response_base.find('a:WasSuccessful', namespaces)
-            if specific_successful_elem is not None and specific_successful_elem.text.lower() != 'true':
-                 self.logger.warning("Overall request successful, but GetTaxIdDataResponse internal WasSuccessful is not 'true'. Parsing will proceed but might be incomplete.")
-           
+        if member_info is not None:
+            if not member_info.get('persnbr'):
+                member_info['persnbr'] = persnbr
+            return member_info
+        if persnbr:
+            self.logger.info(f"7725 Method 3 returned no member for {member_number}; following up with Method 4 for person {persnbr}.")
+            return self.get_taxid_data_by_person_number(persnbr)
+        self.logger.warning(f"Combined lookup found no person for member number {member_number}")
+        return None
 
-        
-            # --- NAMESPACE FOR FINDING PERSON ELEMENT ---
-            self.logger.debug("Attempting to find 'core:Person' directly under GetTaxIdDataResponse.")
-            person_data = response_base.find('core:Person', namespaces) # Use 'core' namespace
-            if person_data is None:
-                 self.logger.error("Could not find 'core:Person' element directly under GetTaxIdDataResponse.")
-                 # Log the structure of response_base for debugging if Person is missing
-                 self.logger.debug(f"Structure of response_base:\n{self.prettify_xml(ET.tostring(response_base, encoding='unicode'))}")
-                 return None
+    def parse_person_lookup(self, response_content):
+        """
+        Parses a SubmitRequest response holding a PersonDetailInquiryResponse (7711) and a
+        GetTaxIdDataResponse (7725) in one pass. Returns (person number or None, member info or None).
+        """
+        try:
+            root = ET.fromstring(response_content)
+            self._debug_xml("Combined person lookup response XML", root)
+            user_auth_elem, response_bases = self._find_responses(
+                root, ('PersonDetailInquiryResponse', 'GetTaxIdDataResponse'))
+            if not self._response_auth_succeeded(user_auth_elem):
+                return None, None
+
+            persnbr = member_info = None
+            person_detail_seen = taxid_seen = False
+            for response_base in response_bases:
+                response_type = response_base.get(_ATTR_XSI_TYPE)
+                response_state = self._read_response_base(response_base)
+                succeeded = (response_state['was_successful'] or '').lower() == 'true'
+                if not succeeded:
+                    error_message = f"DNA API response indicates failure for {response_type}."
+                    for err_msg in response_state['errors']:
+                        error_message += f" Message: {err_msg}"
+                    self.logger.warning(error_message)
+
+                if response_type == 'PersonDetailInquiryResponse' and not person_detail_seen:
+                    person_detail_seen = True
+                    if succeeded and response_state['person'] is not None:
+                        persnbr = response_state['person'].get('persNbr')
+                elif response_type == 'GetTaxIdDataResponse' and not taxid_seen:
+                    taxid_seen = True
+                    if succeeded and response_state['person'] is not None:
+                        member_info = self._member_info_from_response(response_base, response_state['person'])
+            return persnbr, member_info
+        except ET.ParseError as e:
+            self.logger.error(f"Failed to parse combined person lookup XML response: {str(e)}")
+            return None, None
+        except Exception as e:
+            self.logger.error(f"Error parsing combined person lookup: {str(e)}", exc_info=True)
+            return None, None
 
-       
-        
-            # Try finding elements using core: prefix first, then a:, then no prefix as fallback
-            persnbr = self.safe_find(person_data, 'core:PersonNumber', namespaces) or self.safe_find(person_data, 'a:PersonNumber', namespaces) or person_data.get('persNbr') # Also check attribute
-            firstname = self.safe_find(person_data, 'core:FirstName', namespaces) or self.safe_find(person_data, 'a:FirstName', namespaces)
-            lastname = self.safe_find(person_data, 'core:LastName', namespaces) or self.safe_find(person_data, 'a:LastName', namespaces)
-            fullname = f"{firstname or ''} {lastname or ''}".strip()
-
-            is_deceased_raw = self.safe_find(person_data, 'core:IsDeceased', namespaces) or self.safe_find(person_data, 'a:IsDeceased', namespaces)
-            last_updated = self.safe_find(person_data, 'core:LastUpdated', namespaces) or self.safe_find(person_data, 'a:LastUpdated', namespaces)
-            self.logger.debug(f"Raw IsDeceased value from API: {is_deceased_raw}")
-
-            date_birth = self.safe_find(person_data, 'core:DateBirth', namespaces) or self.safe_find(person_data, 'a:DateBirth', namespaces)
-            age = self.calculate_age(date_birth) if date_birth else None
-
-            # Address Parsing (assuming structure like core:Addresses/core:Address)
-            primary_address = None
-            addresses_elem = person_data.find('core:Addresses', namespaces) or person_data.find('a:Addresses', namespaces)
-            if addresses_elem is not None:
-                 for address in addresses_elem.findall('core:Address', namespaces) or addresses_elem.findall('a:Address', namespaces):
-                   
-                     address_use_code = address.get('AddrUseCd') or self.safe_find(address, 'core:AddressUseCode', namespaces) or self.safe_find(address, 'a:AddressUseCode', namespaces)
-                     if address_use_code == 'PRI':
-                         primary_address = address
-                         break
-
-            address_str = None
-            city = state = zip_code = None
-            line1 = None
-            if primary_address is not None:
-                addr_lines_elem = primary_address.find('core:AddressLines', namespaces) or primary_address.find('a:AddressLines', namespaces)
-                if addr_lines_elem is not None:
-                    line_elem = addr_lines_elem.find('core:AddressLine', namespaces) or addr_lines_elem.find('a:AddressLine', namespaces)
-              
-                    line1 = self.safe_find(line_elem, '.', namespaces) if line_elem is not None else None
-
-                city = self.safe_find(primary_address, 'core:CityName', namespaces) or self.safe_find(primary_address, 'a:CityName', namespaces)
-                state = self.safe_find(primary_address, 'core:State', namespaces) or self.safe_find(primary_address, 'a:State', namespaces)
-                zip_code = self.safe_find(primary_address, 'core:ZipCode', namespaces) or self.safe_find(primary_address, 'a:ZipCode', namespaces) or self.safe_find(primary_address, 'core:ZipCd', namespaces) or self.safe_find(primary_address, 'a:ZipCd', namespaces)
-                address_str = f"{line1 or ''}, {city or ''}, {state or ''} {zip_code or ''}".strip(', ')
-
-     
-            email = None
-            email_addresses_elem = person_data.find('core:EmailAddresses', namespaces) or person_data.find('a:EmailAddresses', namespaces)
-            if email_addresses_elem is not None:
-                 for email_address in email_addresses_elem.findall('core:EmailAddress', namespaces) or email_addresses_elem.findall('a:EmailAddress', namespaces):
-                     email = self.safe_find(email_address, 'core:Email', namespaces) or self.safe_find(email_address, 'a:Email', namespaces)
-                     if email: break
-
-            # Phone number parsing
-            home_phone = None
-            cell_phone = None
-            phone_number = None  # Initialize phone_number
-            phones_elem = person_data.find('core:PersonPhones', namespaces) or person_data.find('a:PersonPhones', namespaces)
-            if phones_elem is not None:
-                for phone in phones_elem.findall('core:GetTaxIdDataPhone', namespaces) or phones_elem.findall('a:GetTaxIdDataPhone', namespaces):
-                    usage_code = self.safe_find(phone, 'core:UsageCode', namespaces) or self.safe_find(phone, 'a:UsageCode', namespaces)
-                    area_code = self.safe_find(phone, 'core:AreaCode', namespaces) or self.safe_find(phone, 'a:AreaCode', namespaces)
-                    exchange = self.safe_find(phone, 'core:Exchange', namespaces) or self.safe_find(phone, 'a:Exchange', namespaces)
-                    number = self.safe_find(phone, 'core:Number', namespaces) or self.safe_find(phone, 'a:Number', namespaces)
-                    if area_code and exchange and number:
-                        phone_number = f"{area_code}{exchange}{number}"
-                        if usage_code == 'PER':
-                            home_phone = phone_number
-                        elif usage_code == 'BUS':
-                            cell_phone = phone_number
-
-            # Address parsing
-            address_str = None
-            city = state = zip_code = None
-            line1 = None
-            addresses_elem = person_data.find('core:PersonAddresses', namespaces) or person_data.find('a:PersonAddresses', namespaces)
-            if addresses_elem is not None:
-                address = addresses_elem.find('core:GetTaxIdDataPersonOrganizationAddress', namespaces) or addresses_elem.find('a:GetTaxIdDataPersonOrganizationAddress', namespaces)
-                if address is not None:
-                    addr_lines_elem = address.find('core:AddressLines', namespaces) or address.find('a:AddressLines', namespaces)
-                    if addr_lines_elem is not None:
-                        line_elem = addr_lines_elem.find('core:GetTaxIdDataAddressLine', namespaces) or addr_lines_elem.find('a:GetTaxIdDataAddressLine', namespaces)
-                        if line_elem is not None:
-                            line1 = self.safe_find(line_elem, 'core:AddressLineText', namespaces) or self.safe_find(line_elem, 'a:AddressLineText', namespaces)
-
-                    city = self.safe_find(address, 'core:CityName', namespaces) or self.safe_find(address, 'a:CityName', namespaces)
-                    state = self.safe_find(address, 'core:State', namespaces) or self.safe_find(address, 'a:State', namespaces)
-                    zip_code = self.safe_find(address, 'core:ZipCode', namespaces) or self.safe_find(address, 'a:ZipCode', namespaces) or self.safe_find(address, 'core:ZipCd', namespaces) or self.safe_find(address, 'a:ZipCd', namespaces)
-                    address_str = f"{line1 or ''}, {city or ''}, {state or ''} {zip_code or ''}".strip(', ')
+    def parse_member_info(self, response_content):
+        """
+        Parses the GetTaxIdDataResponse (7725) to extract member details.
 
-        
-            person_types_elem = person_data.find('core:PersonTypes', namespaces) or person_data.find('a:PersonTypes', namespaces)
-            is_employee = False
-            if person_types_elem is not None:
-                 person_types = person_types_elem.findall('core:PersonType', namespaces) or person_types_elem.findall('a:PersonType', namespaces)
-                 is_employee = any((self.safe_find(pt, 'core:PersonTypeCode', namespaces) or self.safe_find(pt, 'a:PersonTypeCode', namespaces)) == 'EMP' for pt in person_types)
+        Elements are matched on their local name whatever namespace prefix DNA uses, and the person
+        and account structures are built in one walk over their elements.
+        """
+        self.logger.debug("Parsing member info from response")
+        try:
+            root = ET.fromstring(response_content)
+            self._debug_xml("Response XML", root)
 
-            
-            accounts = self.parse_accounts(response_base, namespaces)
+            # 1. Check overall success in UserAuthentication first
+            user_auth_elem, response_bases = self._find_responses(root)
+            if not self._response_auth_succeeded(user_auth_elem):
+                return None # Overall request failed
 
-        
-            member_info = {
-                'persnbr': persnbr,
-                'full_name': fullname,
-                'firstname': firstname,
-                'lastname': lastname,
-                'adddate': self.safe_find(person_data, 'core:AddDate', namespaces) or self.safe_find(person_data, 'a:AddDate', namespaces),
-                'age': age,
-                'last_updated': last_updated,
-                'is_active': (self.safe_find(person_data, 'core:MemberGroup', namespaces) or self.safe_find(person_data, 'a:MemberGroup', namespaces) or '').lower() == 'live',
-                'is_deceased': is_deceased_raw == 'true' if is_deceased_raw is not None else None,
-                'member_number': self.safe_find(person_data, 'core:MemberNumber', namespaces) or self.safe_find(person_data, 'a:MemberNumber', namespaces),
-                'address': address_str or "N/A", # Provide default if None
-                'city': city,
-                'state': state,
-                'zip_code': zip_code,
-                'accounts': accounts, 
-                'ssn': self.safe_find(person_data, 'core:TaxId', namespaces) or self.safe_find(person_data, 'a:TaxId', namespaces),
-                'email': email or "N/A", 
-                'mobile_phone': phone_number or "N/A", 
-                'date_of_birth': date_birth,
-                'is_employee': is_employee
-            }
+            # 2. If overall request was successful, use the specific GetTaxIdDataResponse
+            if not response_bases:
+                self.logger.error("Overall request successful, but could not find GetTaxIdDataResponse element.")
+                return None
 
-            self.logger.debug(f"Parsed is_deceased value: {member_info.get('is_deceased')}") # Use .get() for safety
-            self.logger.debug(f"Parsed last_updated value: {member_info.get('last_updated')}")
-            self.logger.info(f"Successfully parsed member info for person number: {member_info.get('persnbr')}")
-            self.logger.debug(f"Parsed member info: {member_info}")
-            return member_info
+            # 3. Now parse the content within the found response_base
+            response_state = self._read_response_base(response_bases[0])
+            if response_state['was_successful'] is not None and response_state['was_successful'].lower() != 'true':
+                self.logger.warning("Overall request successful, but GetTaxIdDataResponse internal WasSuccessful is not 'true'. Parsing will proceed but might be incomplete.")
+            return self._member_info_from_response(response_bases[0], response_state['person'])
 
         except ET.ParseError as e:
             self.logger.error(f"Failed to parse member info XML response: {str(e)}")
-            self.logger.debug(f"Problematic XML:\n{response_content.decode('utf-8', errors='ignore') if isinstance(response_content, bytes) else str(response_content)}")
+            self._debug_xml("Problematic XML", response_content, pretty=False)
             return None
         except Exception as e:
             self.logger.error(f"Error parsing member info: {str(e)}", exc_info=True)
             return None
 
-    def parse_accounts(self, response_base, namespaces): 
-        """Parses account information from the DNA API response."""
+    def parse_member_info_bulk(self, response_content, member_numbers):
+        """
+        Splits a multi-request 7725 response into member number -> member info (None for a member whose
+        response failed or held no Person, i.e. DNA has no info for it). Members without a response of
+        their own are left out. Responses are matched on the ReferenceNumber DNA echoes, then on the
+        MemberNumber they contain, otherwise by position in the request. Returns None if the whole
+        response failed or could not be parsed.
+        """
+        try:
+            root = ET.fromstring(response_content)
+            self._debug_xml("Bulk member info response XML", root)
+            user_auth_elem, response_bases = self._find_responses(root)
+            if not self._response_auth_succeeded(user_auth_elem):
+                return None
+
+            requested = set(member_numbers)
+            results = {}
+            for index, response_base in enumerate(response_bases):
+                response_state = self._read_response_base(response_base)
+                member_info = None
+                if response_state['was_successful'] is not None and response_state['was_successful'].lower() != 'true':
+                    error_message = "GetTaxIdDataResponse WasSuccessful is not 'true'."
+                    for err_msg in response_state['errors']:
+                        error_message += f" Message: {err_msg}"
+                    self.logger.warning(f"{error_message} (response {index + 1} of {len(response_bases)})")
+                elif response_state['person'] is not None:
+                    member_info = self._member_info_from_response(response_base, response_state['person'])
+
+                if response_state['reference'] in requested:
+                    member_number = response_state['reference']
+                elif member_info and member_info.get('member_number') in requested:
+                    member_number = member_info['member_number']
+                elif index < len(member_numbers):
+                    member_number = member_numbers[index]
+                else:
+                    self.logger.warning(f"Unmatched GetTaxIdDataResponse (reference {response_state['reference']}) in bulk response.")
+                    continue
+                results[member_number] = member_info
+
+            missing = [member_number for member_number in member_numbers if results.get(member_number) is None]
+            if missing:
+                self.logger.warning(f"No usable member info response for members: {', '.join(missing)}")
+            return results
+        except ET.ParseError as e:
+            self.logger.error(f"Failed to parse bulk member info XML response: {str(e)}")
+            return None
+        except Exception as e:
+            self.logger.error(f"Error parsing bulk member info: {str(e)}", exc_info=True)
+            return None
+
+    @staticmethod
+    def _find_responses(root, response_types=('GetTaxIdDataResponse',)):
+        """Returns (UserAuthentication or None, ResponseBase elements of the given i:types in document order)."""
+        user_auth = None
+        response_bases = []
+        stack = [root]
+        while stack:
+            elem = stack.pop()
+            name = _local_name(elem.tag)
+            if name == 'UserAuthentication':
+                if user_auth is None:
+                    user_auth = elem
+                continue
+            if name == 'Responses':
+                response_bases.extend(child for child in elem if _local_name(child.tag) == 'ResponseBase'
+                                      and child.get(_ATTR_XSI_TYPE) in response_types)
+                continue
+            stack.extend(reversed(elem))
+        return user_auth, response_bases
+
+    def _response_auth_succeeded(self, user_auth_elem):
+        """Checks the UserAuthentication block of a SubmitRequest response, logging DNA's errors if it failed."""
+        if user_auth_elem is None:
+            self.logger.error("Parser Error: Could not find 'UserAuthentication' element.")
+            return False
+        overall_successful = None
+        auth_errors = []
+        for child in user_auth_elem:
+            name = _local_name(child.tag)
+            if name == 'WasSuccessful' and overall_successful is None:
+                overall_successful = child.text or ''
+            elif name == 'Errors':
+                auth_errors.extend(_error_messages(child))
+        if overall_successful is None or overall_successful.lower() != 'true':
+            error_message = "Overall DNA API request failed (UserAuthentication WasSuccessful is not 'true')."
+            for err_msg in auth_errors:
+                error_message += f" Message: {err_msg}"
+            self.logger.error(error_message)
+            return False
+        return True
+
+    @staticmethod
+    def _read_response_base(response_base):
+        """Returns the Person element, WasSuccessful text, error messages and ReferenceNumber of one ResponseBase."""
+        state = {'person': None, 'was_successful': None, 'errors': [], 'reference': None}
+        for child in response_base:
+            name = _local_name(child.tag)
+            if name == 'Person':
+                if state['person'] is None:
+                    state['person'] = child
+            elif name == 'WasSuccessful':
+                if state['was_successful'] is None:
+                    state['was_successful'] = child.text or ''
+            elif name == 'Errors':
+                state['errors'].extend(_error_messages(child))
+            elif name == 'ReferenceNumber' and state['reference'] is None:
+                state['reference'] = child.text
+        return state
+
+    def _member_info_from_response(self, response_base, person_data):
+        if person_data is None:
+             self.logger.error("Could not find 'Person' element directly under GetTaxIdDataResponse.")
+             self._debug_xml("Structure of response_base", response_base)
+             return None
+
+        member_info = self._parse_taxid_person(person_data)
+        member_info['accounts'] = self.parse_accounts(response_base)
+
+        self.logger.debug(f"Parsed is_deceased value: {member_info.get('is_deceased')}") # Use .get() for safety
+        self.logger.debug(f"Parsed last_updated value: {member_info.get('last_updated')}")
+        self.logger.info(f"Successfully parsed member info for person number: {member_info.get('persnbr')}")
+        self.logger.debug(f"Parsed member info: {member_info}")
+        return member_info
+
+    def _parse_taxid_person(self, person_data):
+        """Builds the member dict (without accounts) from a 7725 Person element in one pass over its children."""
+        fields = {}
+        phone_number = None
+        email = None
+        address_fields = None
+        is_employee = False
+        for child in person_data:
+            name = _local_name(child.tag)
+            if name in _PERSON_TEXT_FIELDS:
+                if child.text and name not in fields:
+                    fields[name] = child.text
+            elif name == 'PersonPhones':
+                for phone in child:
+                    if _local_name(phone.tag) != 'GetTaxIdDataPhone':
+                        continue
+                    parts = _child_texts(phone, ('AreaCode', 'Exchange', 'Number'))
+                    if parts.get('AreaCode') and parts.get('Exchange') and parts.get('Number'):
+                        phone_number = f"{parts['AreaCode']}{parts['Exchange']}{parts['Number']}"
+            elif name == 'EmailAddresses' and email is None:
+                for email_address in child:
+                    if _local_name(email_address.tag) == 'EmailAddress':
+                        email = _child_texts(email_address, ('Email',)).get('Email')
+                        if email:
+                            break
+            elif name == 'PersonAddresses' and address_fields is None:
+                for address in child:
+                    if _local_name(address.tag) == 'GetTaxIdDataPersonOrganizationAddress':
+                        address_fields = self._parse_taxid_address(address)
+                        break
+            elif name == 'PersonTypes':
+                for person_type in child:
+                    if (_local_name(person_type.tag) == 'PersonType'
+                            and _child_texts(person_type, ('PersonTypeCode',)).get('PersonTypeCode') == 'EMP'):
+                        is_employee = True
+
+        firstname = fields.get('FirstName')
+        lastname = fields.get('LastName')
+        is_deceased_raw = fields.get('IsDeceased')
+        self.logger.debug(f"Raw IsDeceased value from API: {is_deceased_raw}")
+        date_birth = fields.get('DateBirth')
+        address_str, city, state, zip_code = address_fields or (None, None, None, None)
+        return {
+            'persnbr': fields.get('PersonNumber') or person_data.get('persNbr'),
+            'full_name': f"{firstname or ''} {lastname or ''}".strip(),
+            'firstname': firstname,
+            'lastname': lastname,
+            'adddate': fields.get('AddDate'),
+            'age': self.calculate_age(date_birth) if date_birth else None,
+            'last_updated': fields.get('LastUpdated'),
+            'is_active': (fields.get('MemberGroup') or '').lower() == 'live',
+            'is_deceased': is_deceased_raw == 'true' if is_deceased_raw is not None else None,
+            'member_number': fields.get('MemberNumber'),
+            'address': address_str or "N/A", # Provide default if None
+            'city': city,
+            'state': state,
+            'zip_code': zip_code,
+            'accounts': [],
+            'ssn': fields.get('TaxId'),
+            'email': email or "N/A",
+            'mobile_phone': phone_number or "N/A",
+            'date_of_birth': date_birth,
+            'is_employee': is_employee
+        }
+
+    @staticmethod
+    def _parse_taxid_address(address):
+        """Returns (display string, city, state, zip) for a GetTaxIdDataPersonOrganizationAddress element."""
+        fields = {}
+        line1 = None
+        for child in address:
+            name = _local_name(child.tag)
+            if name == 'AddressLines':
+                if line1 is None:
+                    for line_elem in child:
+                        if _local_name(line_elem.tag) == 'GetTaxIdDataAddressLine':
+                            line1 = _child_texts(line_elem, ('AddressLineText',)).get('AddressLineText')
+                            break
+            elif name in ('CityName', 'State', 'ZipCode', 'ZipCd') and child.text and name not in fields:
+                fields[name] = child.text
+        city = fields.get('CityName')
+        state = fields.get('State')
+        zip_code = fields.get('ZipCode') or fields.get('ZipCd')
+        address_str = f"{line1 or ''}, {city or ''}, {state or ''} {zip_code or ''}".strip(', ')
+        return address_str, city, state, zip_code
+
+    def parse_accounts(self, response_base, namespaces=None):
+        """Parses account information from a GetTaxIdDataResponse element (namespaces is no longer needed)."""
         self.logger.debug("Parsing account information")
-        accounts = []
-        # Find Accounts element relative to the response_base (GetTaxIdDataResponse)
-        # Try core: prefix first, then a:
-        accounts_elem = response_base.find('core:Accounts', namespaces) or response_base.find('a:Accounts', namespaces)
+        accounts_elem = next((child for child in response_base if _local_name(child.tag) == 'Accounts'), None)
         if accounts_elem is None:
-            self.logger.warning("Could not find 'core:Accounts' or 'a:Accounts' element directly under GetTaxIdDataResponse.")
-            # Log structure for debugging
-            self.logger.debug(f"Structure of response_base when looking for Accounts:\n{self.prettify_xml(ET.tostring(response_base, encoding='unicode'))}")
+            self.logger.warning("Could not find 'Accounts' element directly under GetTaxIdDataResponse.")
+            self._debug_xml("Structure of response_base when looking for Accounts", response_base)
             return [] # Return empty list if Accounts element is missing
 
-        account_data_elements = accounts_elem.findall('core:AccountTaxIdData', namespaces) or accounts_elem.findall('a:AccountTaxIdData', namespaces)
-        self.logger.info(f"Found {len(account_data_elements)} account data elements in response")
-
-        for account_data in account_data_elements:
-            account = {
-                'account_number': self.safe_find(account_data, 'core:AccountNumber', namespaces) or self.safe_find(account_data, 'a:AccountNumber', namespaces),
-                'account_type': self.safe_find(account_data, 'core:MajorAccountTypeCode', namespaces) or self.safe_find(account_data, 'a:MajorAccountTypeCode', namespaces),
-                'product_code': self.safe_find(account_data, 'core:CurrentMinorAccountTypeCode', namespaces) or self.safe_find(account_data, 'a:CurrentMinorAccountTypeCode', namespaces),
-                'balance': self.format_currency(self.safe_find(account_data, 'core:BalanceAmount', namespaces) or self.safe_find(account_data, 'a:BalanceAmount', namespaces)),
-                'available_balance': self.format_currency(self.safe_find(account_data, 'core:AvailableBalance', namespaces) or self.safe_find(account_data, 'a:AvailableBalance', namespaces)),
-                'date_opened': self.safe_find(account_data, 'core:DateAccountOpened', namespaces) or self.safe_find(account_data, 'a:DateAccountOpened', namespaces),
-                'status': self.safe_find(account_data, 'core:CurrentAccountStatusCode', namespaces) or self.safe_find(account_data, 'a:CurrentAccountStatusCode', namespaces),
-              
-            }
-            accounts.append(account)
+        accounts = []
+        for account_data in accounts_elem:
+            if _local_name(account_data.tag) != 'AccountTaxIdData':
+                continue
+            fields = _child_texts(account_data, _ACCOUNT_FIELDS)
+            accounts.append({
+                'account_number': fields.get('AccountNumber'),
+                'account_type': fields.get('MajorAccountTypeCode'),
+                'product_code': fields.get('CurrentMinorAccountTypeCode'),
+                'balance': self.format_currency(fields.get('BalanceAmount')),
+                'available_balance': self.format_currency(fields.get('AvailableBalance')),
+                'date_opened': fields.get('DateAccountOpened'),
+                'status': fields.get('CurrentAccountStatusCode'),
+            })
         self.logger.info(f"Parsed {len(accounts)} accounts after processing")
         return accounts
 
@@ -760,6 +1100,7 @@ class DNAApiClient:
             self.logger.error(f"Invalid date format for date_birth: {date_birth}")
             return None
 
+    @coalesced('transactions', key=lambda acctNbr, limit=10: (str(acctNbr), limit))
     def get_financial_transactions(self, acctNbr, limit=10):
         self.logger.info(f"[DNA_CLIENT] Retrieving financial transactions for account: {acctNbr}")
         try:
@@ -777,17 +1118,10 @@ class DNAApiClient:
             return None
         
         # Construct request body directly - ENSURE 7703 REQUEST TYPE IS USED
-        request_body = f"""
-            <RequestBase i:type="AccountTransactionHistoryRequest" xmlns:i="http://www.w3.org/2001/XMLSchema-instance">
-              <MethodNumber>2</MethodNumber>
-              <ReferenceNumber>{html.escape(str(acctNbr))}</ReferenceNumber>
-              <RequestTypeCode>7703</RequestTypeCode>
-              <AccountNumber>{html.escape(str(acctNbr))}</AccountNumber>
-              <MaxReturnCount>{limit}</MaxReturnCount>
-            </RequestBase>"""
+        request_body = self._prepare_transaction_history_request(acctNbr, limit)
 
         # Log the request body for debugging
-        self.logger.debug(f"Transaction request body for account {acctNbr}:\n{request_body}")
+        self._debug_xml(f"Transaction request body for account {acctNbr}", request_body, pretty=False)
 
         # Prepare full envelope using helper (Keep consistency)
         full_request_xml = self._prepare_submit_request_envelope(request_body)
@@ -802,7 +1136,7 @@ class DNAApiClient:
         
         self.logger.info(f"[DNA_CLIENT_API_CALL] Attempting to fetch financial transactions via API for account: {acctNbr}")
         try:
-            response = self._make_request(self.dna_endpoint, headers, full_request_xml)
+            response = self._make_request(self.dna_endpoint, headers, full_request_xml, hedge=True)
             if response is None:
                  self.logger.warning(f"API request failed when fetching transactions for account {acctNbr}")
                  return None
@@ -816,114 +1150,310 @@ class DNAApiClient:
             self.logger.error(f"Unexpected error getting transactions for account {acctNbr}: {str(e)}", exc_info=True)
             return None
 
-    def parse_financial_transactions(self, response_content):
-        # Simpler parser based on user feedback
-        self.logger.debug("Parsing financial transactions from response (Simpler Logic)")
-        try:
-            # Ensure response_content is bytes for ET.fromstring
-            if isinstance(response_content, str):
-                response_content = response_content.encode('utf-8')
+    def _prepare_transaction_history_request(self, acctNbr, limit):
+        """Builds one 7703 AccountTransactionHistoryRequest; ReferenceNumber echoes the account number."""
+        return f"""
+            <RequestBase i:type="AccountTransactionHistoryRequest" xmlns:i="http://www.w3.org/2001/XMLSchema-instance">
+              <MethodNumber>2</MethodNumber>
+              <ReferenceNumber>{html.escape(str(acctNbr))}</ReferenceNumber>
+              <RequestTypeCode>7703</RequestTypeCode>
+              <AccountNumber>{html.escape(str(acctNbr))}</AccountNumber>
+              <MaxReturnCount>{limit}</MaxReturnCount>
+            </RequestBase>"""
 
-            root = ET.fromstring(response_content)
-            self.logger.debug(f"Financial transactions response XML: {self.prettify_xml(ET.tostring(root, encoding='unicode'))}")
+    @coalesced('transactions_bulk', key=lambda account_numbers, limit=10: (frozenset(str(acct) for acct in account_numbers if acct), limit))
+    def get_financial_transactions_bulk(self, account_numbers, limit=10):
+        """
+        Fetches transaction history for several accounts in a single SubmitRequest by packing one
+        7703 RequestBase per account into the <Requests> collection.
 
-            # Check if the response was successful
-            namespaces = {
-                's': 'http://schemas.xmlsoap.org/soap/envelope/',
-                'core': 'http://www.opensolutions.com/CoreApi',
-                'a': 'http://schemas.datacontract.org/2004/07/OpenSolutions.CoreApiService.Services.Messages',
-                'i': 'http://www.w3.org/2001/XMLSchema-instance'
-            }
-            
-            # First check if the overall request was successful
-            user_auth_elem = root.find('.//core:UserAuthentication', namespaces)
-            if user_auth_elem is not None:
-                overall_successful_elem = user_auth_elem.find('core:WasSuccessful', namespaces)
-                if overall_successful_elem is None or overall_successful_elem.text.lower() != 'true':
-                    self.logger.error("Overall API request failed (UserAuthentication WasSuccessful is not 'true').")
-                    return None
-            
-            # Find the specific response for transaction history
-            response_base = None
-            for resp in root.findall('.//core:Responses/core:ResponseBase', namespaces):
-                if resp.get('{' + namespaces['i'] + '}type') == 'AccountTransactionHistoryResponse':
-                    response_base = resp
-                    break
-            
-            if response_base is None:
-                self.logger.error("Could not find AccountTransactionHistoryResponse in the response.")
+        Returns a dict of account number -> list of transactions (None for an account whose
+        response failed), or None if the whole call failed.
+        """
+        account_numbers = list(dict.fromkeys(str(acct) for acct in account_numbers if acct))
+        if not account_numbers:
+            return {}
+        self.logger.info(f"[DNA_CLIENT] Retrieving financial transactions for {len(account_numbers)} accounts in one request")
+        try:
+            if not self.ensure_authentication():
+                self.logger.error(f"Authentication failed for bulk transactions ({len(account_numbers)} accounts)")
                 return None
-            
-            # Check if the specific response was successful
-            specific_successful_elem = response_base.find('a:WasSuccessful', namespaces)
-            if specific_successful_elem is not None and specific_successful_elem.text.lower() != 'true':
-                self.logger.warning("AccountTransactionHistoryResponse WasSuccessful is not 'true'.")
-                # Check for errors
-                errors_elem = response_base.find('a:Errors', namespaces)
-                if errors_elem is not None:
-                    for error in errors_elem.findall('a:Error', namespaces):
-                        err_msg = self.safe_find(error, 'a:ErrorMessage', namespaces)
-                        if err_msg:
-                            self.logger.error(f"Error in transaction response: {err_msg}")
+        except Exception as auth_err:
+            self.logger.warning(f"DNA authentication failed before getting bulk transactions: {auth_err}")
+            return None
+
+        request_body = "".join(self._prepare_transaction_history_request(acct, limit) for acct in account_numbers)
+        full_request_xml = self._prepare_submit_request_envelope(request_body)
+        if full_request_xml is None:
+            self.logger.warning("Failed to prepare request envelope for bulk account transactions")
+            return None
+
+        headers = {
+            'Content-Type': 'text/xml; charset=utf-8',
+            'SOAPAction': '"http://www.opensolutions.com/CoreApi/ICoreApiService/SubmitRequest"'
+        }
+
+        self.logger.info(f"[DNA_CLIENT_API_CALL] Attempting to fetch financial transactions via API for accounts: {', '.join(account_numbers)}")
+        try:
+            response = self._make_request(self.dna_endpoint, headers, full_request_xml, hedge=True)
+            if response is None:
+                self.logger.warning(f"API request failed when fetching bulk transactions for accounts {', '.join(account_numbers)}")
                 return None
+            self.logger.info(f"[DNA_CLIENT_API_SUCCESS] Successfully received API response for financial transactions for {len(account_numbers)} accounts")
+            return self.parse_financial_transactions_bulk(response.content, account_numbers)
+        except Exception as e:
+            self.logger.error(f"Unexpected error getting bulk transactions for accounts {', '.join(account_numbers)}: {str(e)}", exc_info=True)
+            return None
 
-            # Now find the transactions
-            transactions = []
-            # Use findall with './/' to search anywhere in the tree for 'a:Rtxn'
-            rtxn_elements = response_base.findall('.//a:Rtxn', namespaces)
-            if not rtxn_elements:
-                # Try alternate paths if the expected path doesn't work
-                rtxn_elements = root.findall('.//a:Rtxn', namespaces)
-                
-            self.logger.info(f"Found {len(rtxn_elements)} 'a:Rtxn' elements.")
-
-            for transaction in rtxn_elements:
-                act_date_time = self.safe_find(transaction, 'a:ActivityDateTime', namespaces)
-                date, time = act_date_time.split('T') if act_date_time and 'T' in act_date_time else (act_date_time, None)
-
-                amount = self.safe_find(transaction, 'a:TransactionAmount', namespaces)
-                formatted_amount = "$0.00"
-                if amount:
-                    try:
-                        amount_float = float(amount)
-                        formatted_amount = f"${abs(amount_float):.2f}"
-                        if amount_float < 0:
-                            formatted_amount = f"-{formatted_amount}"
-                    except ValueError:
-                         self.logger.warning(f"Could not format transaction amount: {amount}")
-
-                transaction_type = self.safe_find(transaction, 'a:RtxnTypeCode', namespaces)
-                # Prioritize ExternalRtxnDescription if available
-                description = self.safe_find(transaction, 'a:ExternalRtxnDescription', namespaces)
-                if not description:
-                    # Fallback to internal description or type code mapping
-                    description = self.safe_find(transaction, 'a:RtxnDescription', namespaces)
-                    if not description:
-                         description = self.transaction_type_descriptions.get(transaction_type, f'Type: {transaction_type}')
-
-                trans_data = {
-                    'date': date,
-                    'time': time.split('.')[0] if time else None, # Remove milliseconds
-                    'amount': formatted_amount,
-                    'transaction_type': transaction_type,
-                    'description': description,
-                    'source': self.safe_find(transaction, 'a:RtxnSourceCd', namespaces),
-                }
-                transactions.append(trans_data)
+    @coalesced('transactions_refresh', key=lambda history, window=DNA_TXN_REFRESH_WINDOW: (
+        frozenset((str(acct), entry[0]) for acct, entry in history.items() if acct), window))
+    def refresh_financial_transactions_bulk(self, history, window=DNA_TXN_REFRESH_WINDOW):
+        """
+        Brings cached transaction histories up to date. history maps account number -> (limit, cached
+        transactions newest first), where the cached list holds the account's newest `limit`
+        transactions as of the last fetch. Only the newest `window` transactions of each account are
+        requested and merged in; accounts whose new activity does not fit in that window are fetched
+        again in full (up to their limit).
 
+        Returns the same shape as get_financial_transactions_bulk.
+        """
+        history = {str(acct): entry for acct, entry in history.items() if acct}
+        if not history:
+            return {}
+        incremental = [acct for acct, (limit, _) in history.items() if window < limit]
+        recent = self.get_financial_transactions_bulk(incremental, limit=window) if incremental else {}
+        if recent is None:
+            return None
+
+        results = {}
+        full = []
+        for acct, (limit, cached) in history.items():
+            merged = None
+            if recent.get(acct) is not None:
+                merged = merge_recent_transactions(cached, recent[acct], window, limit)
+            if merged is None:
+                full.append(acct)
+            else:
+                results[acct] = merged
+        self.logger.info(f"[DNA_CLIENT] Refreshed {len(results)} cached transaction histories incrementally; {len(full)} need a full fetch")
+
+        for limit in sorted({history[acct][0] for acct in full}):
+            group = [acct for acct in full if history[acct][0] == limit]
+            fetched = self.get_financial_transactions_bulk(group, limit=limit)
+            for acct in group:
+                results[acct] = fetched.get(acct) if fetched is not None else None
+        return results
+
+    def parse_financial_transactions_bulk(self, response_content, account_numbers):
+        """
+        Splits a multi-request 7703 response into per-account transaction lists. Responses are matched
+        on their ReferenceNumber when DNA echoes it, otherwise by position in the request.
+        """
+        try:
+            results = {acct: None for acct in account_numbers}
+            collected = {}
+            overall_ok = True
+            for kind, index, value in self._iter_transaction_history_events(response_content):
+                if kind == 'txn':
+                    collected.setdefault(index, []).append(value)
+                elif kind == 'response':
+                    reference = value['reference']
+                    if reference in results:
+                        acct = reference
+                    elif index < len(account_numbers):
+                        acct = account_numbers[index]
+                    else:
+                        self.logger.warning(f"Unmatched AccountTransactionHistoryResponse (reference {reference}) in bulk response.")
+                        collected.pop(index, None)
+                        continue
+                    transactions = collected.pop(index, [])
+                    # The last response for an account wins, a failed one included (as the tree parser did)
+                    results[acct] = transactions if self._transaction_response_succeeded(value) else None
+                elif kind == 'overall':
+                    overall_ok = value
+
+            if not overall_ok:
+                self.logger.error("Overall API request failed (UserAuthentication WasSuccessful is not 'true').")
+                return None
+            missing = [acct for acct, txns in results.items() if txns is None]
+            if missing:
+                self.logger.warning(f"No usable transaction response for accounts: {', '.join(missing)}")
+            return results
+        except ET.ParseError as e:
+            self.logger.error(f"Failed to parse bulk financial transactions XML: {str(e)}")
+            return None
+        except Exception as e:
+            self.logger.error(f"Error parsing bulk financial transactions: {str(e)}", exc_info=True)
+            return None
+
+    def parse_financial_transactions(self, response_content):
+        """Returns the transactions in a 7703 response as a list, or None if the response failed or could not be parsed."""
+        try:
+            transactions = list(self.iter_financial_transactions(response_content))
             self.logger.info(f"Parsed {len(transactions)} financial transactions")
             return transactions
+        except DNAApiError as e:
+            self.logger.error(str(e))
+            return None
         except ET.ParseError as e:
             self.logger.error(f"Failed to parse financial transactions XML: {str(e)}")
-            # Log the problematic content if parsing fails
-            self.logger.debug(f"Problematic XML:\n{response_content.decode('utf-8', errors='ignore')}")
-            return None # Return None on parsing error
+            self._debug_xml("Problematic XML", response_content, pretty=False)
+            return None
         except Exception as e:
-            # Catch any other unexpected errors during parsing
             self.logger.error(f"Error parsing financial transactions: {str(e)}", exc_info=True)
-            return None # Return None on other errors
+            return None
 
+    def iter_financial_transactions(self, response_content):
+        """
+        Streams the transactions of a single-account 7703 response, yielding each one as soon as its
+        Rtxn element has been read. Memory stays flat however many transactions the response holds.
+
+        Raises DNAApiError once the document has been read if the request or the transaction
+        response failed (success flags may follow the transactions, so a consumer can already
+        have received some), and ET.ParseError for malformed XML.
+        """
+        self._debug_xml("Financial transactions response XML", response_content)
+        yielded = 0
+        others = []  # Rtxns outside the first history response; only used if that response has none
+        first_response = None
+        overall_ok = True
+        for kind, index, value in self._iter_transaction_history_events(response_content):
+            if kind == 'txn' and index == 0:
+                yielded += 1
+                yield value
+            elif kind in ('txn', 'orphan'):
+                if not yielded:
+                    others.append(value)
+            elif kind == 'response' and index == 0:
+                first_response = value
+            elif kind == 'overall':
+                overall_ok = value
+
+        if not overall_ok:
+            raise DNAApiError("Overall API request failed (UserAuthentication WasSuccessful is not 'true').")
+        if first_response is None:
+            raise DNAApiError("Could not find AccountTransactionHistoryResponse in the response.")
+        if not self._transaction_response_succeeded(first_response):
+            raise DNAApiError("AccountTransactionHistoryResponse WasSuccessful is not 'true'.")
+        if not yielded:
+            # Same fallback as the tree parser had: Rtxn elements found anywhere in the document
+            for transaction in others:
+                yield transaction
+
+    def _transaction_response_succeeded(self, response_state):
+        was_successful = response_state['was_successful']
+        if was_successful is None or was_successful.lower() == 'true':
+            return True
+        self.logger.warning("AccountTransactionHistoryResponse WasSuccessful is not 'true'.")
+        for err_msg in response_state['errors']:
+            self.logger.error(f"Error in transaction response: {err_msg}")
+        return False
+
+    def _iter_transaction_history_events(self, response_content):
+        """
+        Single streaming pass over a 7703 SubmitRequest response using iterparse. Yields:
+          ('txn', n, transaction)     an Rtxn inside the n-th AccountTransactionHistoryResponse
+          ('orphan', None, transaction) an Rtxn outside any history response
+          ('response', n, state)      end of the n-th history response: reference, was_successful, errors
+          ('overall', None, ok)       once, at the end: False if UserAuthentication reported failure
+        Every element is cleared and detached from its parent once read.
+        """
+        if isinstance(response_content, str):
+            response_content = response_content.encode('utf-8')
+
+        stack = []
+        response_index = -1
+        response_depth = None
+        response_state = None
+        rtxn_depth = None
+        rtxn_fields = None
+        auth_depth = None
+        auth_seen = False
+        overall_ok = True
+
+        for event, elem in ET.iterparse(io.BytesIO(response_content), events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                depth = len(stack)
+                if (tag == _TAG_RESPONSE_BASE and response_depth is None and stack and stack[-1].tag == _TAG_RESPONSES
+                        and elem.get(_ATTR_XSI_TYPE) == 'AccountTransactionHistoryResponse'):
+                    response_index += 1
+                    response_depth = depth
+                    response_state = {'reference': None, 'was_successful': None, 'errors': []}
+                elif tag == _TAG_RTXN and rtxn_depth is None:
+                    rtxn_depth = depth
+                    rtxn_fields = {}
+                elif tag == _TAG_USER_AUTHENTICATION and not auth_seen:
+                    # Only the first UserAuthentication counts; it must contain WasSuccessful == 'true'
+                    auth_seen = True
+                    auth_depth = depth
+                    overall_ok = False
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            depth = len(stack)
+            parent = stack[-1] if stack else None
+
+            if rtxn_depth is not None:
+                if depth == rtxn_depth + 1 and tag in _RTXN_FIELDS:
+                    rtxn_fields.setdefault(_RTXN_FIELDS[tag], elem.text)
+                elif depth == rtxn_depth:
+                    transaction = self._transaction_from_fields(rtxn_fields)
+                    rtxn_depth = rtxn_fields = None
+                    if response_depth is not None:
+                        yield 'txn', response_index, transaction
+                    else:
+                        yield 'orphan', None, transaction
+
+            if response_depth is not None:
+                if depth == response_depth + 1:
+                    if tag == _TAG_WAS_SUCCESSFUL:
+                        response_state['was_successful'] = elem.text or ''
+                    elif tag == _TAG_REFERENCE_NUMBER:
+                        response_state['reference'] = elem.text
+                elif depth == response_depth + 3 and tag == _TAG_ERROR_MESSAGE and elem.text:
+                    response_state['errors'].append(elem.text)
+                elif depth == response_depth:
+                    yield 'response', response_index, response_state
+                    response_depth = response_state = None
+
+            if auth_depth is not None:
+                if depth == auth_depth + 1 and tag == _TAG_CORE_WAS_SUCCESSFUL:
+                    overall_ok = (elem.text or '').lower() == 'true'
+                elif depth == auth_depth:
+                    auth_depth = None
+
+            elem.clear()
+            if parent is not None:
+                parent.remove(elem)
+
+        yield 'overall', None, overall_ok
+
+    def _transaction_from_fields(self, fields):
+        """Builds a Transaction from the text of one Rtxn's child elements."""
+        amount = fields.get('TransactionAmount')
+        amount_cents = 0
+        if amount:
+            try:
+                amount_cents = parse_amount_cents(amount)
+            except ValueError:
+                 self.logger.warning(f"Could not format transaction amount: {amount}")
 
+        transaction_type = fields.get('RtxnTypeCode')
+        # Prioritize ExternalRtxnDescription if available
+        description = fields.get('ExternalRtxnDescription')
+        if not description:
+            # Fallback to internal description or type code mapping
+            description = fields.get('RtxnDescription')
+            if not description:
+                 description = self.transaction_type_descriptions.get(transaction_type, f'Type: {transaction_type}')
+
+        return Transaction.from_activity(fields.get('ActivityDateTime'), amount_cents, transaction_type,
+                                         description, fields.get('RtxnSourceCd'))
+
+
+    @coalesced('member_info', key=lambda member_number: str(member_number))
     def get_member_info_by_member_number(self, member_number):
         """
         Fetches member information directly using Member Number (ReqTypCd 7725, Method 3).
@@ -938,14 +1468,7 @@ class DNAApiClient:
             self.logger.warning(f"DNA authentication failed before getting member info for {member_number}: {auth_err}")
             return None
 
-        # Construct the request body for GetTaxIdDataRequest (7725) using Member Number (Method 3)
-        request_body = f"""
-            <RequestBase i:type="GetTaxIdDataRequest" xmlns:i="http://www.w3.org/2001/XMLSchema-instance">
-              <MethodNumber>3</MethodNumber>
-              <ReferenceNumber>{html.escape(str(member_number))}</ReferenceNumber>
-              <RequestTypeCode>7725</RequestTypeCode>
-            </RequestBase>"""
-
+        request_body = self._prepare_member_info_request(member_number)
         full_request_xml = self._prepare_submit_request_envelope(request_body)
         if full_request_xml is None:
             self.logger.warning(f"Failed to prepare request envelope for member number {member_number}")
@@ -958,17 +1481,80 @@ class DNAApiClient:
 
         try:
             self.logger.info(f"[DNA_CLIENT_API_CALL] Attempting to fetch member info via API for member number: {member_number}")
-            response = self._make_request(self.dna_endpoint, headers, full_request_xml)
+            response = self._make_request(self.dna_endpoint, headers, full_request_xml, hedge=True)
             if response is None:
                 self.logger.warning(f"API request failed when fetching member info for member number {member_number}")
                 return None
             self.logger.info(f"[DNA_CLIENT_API_SUCCESS] Successfully received API response for member info: {member_number}")
-            self.logger.debug(f"Full XML response before parsing:\n{self.prettify_xml(response.content)}")
+            self._debug_xml("Full XML response before parsing", response.content)
             return self.parse_member_info(response.content)
         except Exception as e:
             self.logger.error(f"Unexpected error getting member info for member {member_number}: {str(e)}", exc_info=True)
             return None
             
+    def _prepare_member_info_request(self, member_number):
+        """RequestBase for GetTaxIdDataRequest (7725) using Member Number (Method 3)."""
+        return f"""
+            <RequestBase i:type="GetTaxIdDataRequest" xmlns:i="http://www.w3.org/2001/XMLSchema-instance">
+              <MethodNumber>3</MethodNumber>
+              <ReferenceNumber>{html.escape(str(member_number))}</ReferenceNumber>
+              <RequestTypeCode>7725</RequestTypeCode>
+            </RequestBase>"""
+
+    @coalesced('member_info_bulk', key=lambda member_numbers, chunk_size=None: (
+        frozenset(str(member_number) for member_number in member_numbers if member_number), chunk_size))
+    def get_member_info_bulk(self, member_numbers, chunk_size=None):
+        """
+        Fetches member information for several members by packing one 7725 (Method 3) RequestBase per
+        member into each SubmitRequest, chunk_size members (DNA_MEMBER_INFO_CHUNK_SIZE by default) at a time.
+
+        Returns a dict of member number -> member info, or None if every chunk failed. A member DNA
+        reported as not found maps to None; members of a failed chunk (or without a response of their
+        own) are left out, so callers can retry them.
+        """
+        member_numbers = list(dict.fromkeys(str(member_number) for member_number in member_numbers if member_number))
+        if not member_numbers:
+            return {}
+        chunk_size = max(1, int(chunk_size or DNA_MEMBER_INFO_CHUNK_SIZE))
+        self.logger.info(f"[DNA_CLIENT] Retrieving member info for {len(member_numbers)} members in chunks of {chunk_size}")
+        try:
+            if not self.ensure_authentication():
+                self.logger.error(f"Authentication failed for bulk member info ({len(member_numbers)} members)")
+                return None
+        except Exception as auth_err:
+            self.logger.warning(f"DNA authentication failed before getting bulk member info: {auth_err}")
+            return None
+
+        headers = {
+            'Content-Type': 'text/xml; charset=utf-8',
+            'SOAPAction': '"http://www.opensolutions.com/CoreApi/ICoreApiService/SubmitRequest"'
+        }
+        results = {}
+        any_succeeded = False
+        for start in range(0, len(member_numbers), chunk_size):
+            chunk = member_numbers[start:start + chunk_size]
+            chunk_results = None
+            full_request_xml = self._prepare_submit_request_envelope(
+                "".join(self._prepare_member_info_request(member_number) for member_number in chunk))
+            if full_request_xml is None:
+                self.logger.warning("Failed to prepare request envelope for bulk member info")
+            else:
+                self.logger.info(f"[DNA_CLIENT_API_CALL] Attempting to fetch member info via API for members: {', '.join(chunk)}")
+                try:
+                    response = self._make_request(self.dna_endpoint, headers, full_request_xml, hedge=True)
+                    if response is None:
+                        self.logger.warning(f"API request failed when fetching bulk member info for members {', '.join(chunk)}")
+                    else:
+                        self.logger.info(f"[DNA_CLIENT_API_SUCCESS] Successfully received API response for member info for {len(chunk)} members")
+                        chunk_results = self.parse_member_info_bulk(response.content, chunk)
+                except Exception as e:
+                    self.logger.error(f"Unexpected error getting bulk member info for members {', '.join(chunk)}: {str(e)}", exc_info=True)
+            if chunk_results is None:
+                continue
+            any_succeeded = True
+            results.update(chunk_results)
+        return results if any_succeeded else None
+
     def get_person_detail_by_member_number(self, member_number):
         """
         Fetches person details directly using Member Number (ReqTypCd 7711).
@@ -982,6 +1568,8 @@ class DNAApiClient:
         try:
             # Use the new method that directly queries by member number
             return self.get_member_info_by_member_number(member_number)
+        except DeadlineExceeded:
+            raise # Gave up waiting on a coalesced lookup; the caller reports it as running out of time
         except Exception as e:
             self.logger.error(f"Unexpected error getting person details for member {member_number}: {str(e)}", exc_info=True)
             return None
@@ -0,0 +1,367 @@
+import concurrent.futures
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+
+import deadline
+from circuit_breaker import CircuitBreaker, CircuitOpenError, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+from deadline import DeadlineExceeded
+
+
+RETRY_STATUSES = frozenset({502, 503, 504})
+LATENCY_SAMPLES = 200   # Recent successful call latencies kept per endpoint for the hedge delay
+DEADLINE_SLACK = 0.05   # A timeout with at most this many budget seconds left is the budget running out
+
+
+class _TrackingAdapter(HTTPAdapter):
+    """HTTPAdapter that counts concurrent requests per host so pool saturation can be reported."""
+
+    def __init__(self, transport, **kwargs):
+        self._transport = transport
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        host = urlsplit(request.url).netloc
+        self._transport._enter(host)
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            self._transport._exit(host)
+
+
+class HttpTransport:
+    """
+    Keep-alive requests.Session shared by every call a client makes to one upstream.
+
+    - Connection pools hold pool_size connections per host; requests beyond that still run but are
+      counted as saturated (their extra connections are discarded after use), so the pool can be sized.
+    - Timeouts are split into connect_timeout and read_timeout.
+    - Retries use exponential backoff with full jitter. Failures where the request never reached the
+      server (connection refused, connect timeout) are always retried; read timeouts, dropped
+      connections and 502/503/504 responses are only retried for calls marked idempotent.
+    - Each endpoint URL has a circuit breaker. Connection failures, timeouts and 502/503/504 responses
+      count as failures; while an endpoint's circuit is open, requests to it raise CircuitOpenError
+      immediately instead of waiting on timeouts.
+    - Inside a latency budget (deadline.py) each attempt's timeouts are capped by the time left, and
+      DeadlineExceeded is raised instead of starting, retrying or waiting on a call past it.
+    - With hedging enabled, idempotent calls sent with hedge=True get a duplicate request when they
+      have not answered within the endpoint's recent hedge_percentile latency; the first answer wins.
+    """
+
+    def __init__(self, name, pool_size=10, connect_timeout=5.0, read_timeout=60.0, retries=2,
+                 backoff=0.5, backoff_max=8.0, verify=True, retry_statuses=RETRY_STATUSES,
+                 circuit_enabled=True, circuit_failure_rate=0.5, circuit_min_calls=5, circuit_window=60.0,
+                 circuit_open_seconds=30.0, hedge_enabled=False, hedge_percentile=95, hedge_min_delay=0.05,
+                 hedge_min_samples=20):
+        self.name = name
+        self.pool_size = max(1, int(pool_size))
+        self.connect_timeout = float(connect_timeout)
+        self.read_timeout = float(read_timeout)
+        self.retries = max(0, int(retries))
+        self.backoff = float(backoff)
+        self.backoff_max = float(backoff_max)
+        self.verify = verify
+        self.retry_statuses = frozenset(retry_statuses)
+        self.circuit_enabled = circuit_enabled
+        self._circuit_settings = {'failure_rate': circuit_failure_rate, 'min_calls': circuit_min_calls,
+                                  'window': circuit_window, 'open_seconds': circuit_open_seconds}
+        self._breakers = {}
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = min(100.0, max(0.0, float(hedge_percentile)))
+        self.hedge_min_delay = float(hedge_min_delay)
+        self.hedge_min_samples = max(1, int(hedge_min_samples))
+        self._latencies = {}            # endpoint -> deque of recent successful call latencies (seconds)
+        self._hedge_executor = (ThreadPoolExecutor(max_workers=self.pool_size * 2, thread_name_prefix=f'{name}-hedge')
+                                if hedge_enabled else None)
+
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'saturated_requests': 0,
+            'max_in_flight': 0,
+            'fast_failures': 0,
+            'deadline_exceeded': 0,
+            'hedged': 0,
+            'hedge_wins': 0,
+        }
+
+        self.session = requests.Session()
+        # Retries are handled in request() so the idempotency rules above apply; the adapter never retries.
+        adapter = _TrackingAdapter(self, pool_connections=4, pool_maxsize=self.pool_size, max_retries=0, pool_block=False)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._adapter = adapter
+
+    @classmethod
+    def from_env(cls, prefix, name=None, default_pool_size=10, default_read_timeout=60.0, verify=True):
+        """Builds a transport from <PREFIX>_HTTP_* environment variables."""
+        return cls(
+            name or prefix.lower(),
+            pool_size=int(os.getenv(f'{prefix}_HTTP_POOL_SIZE', default_pool_size)),
+            connect_timeout=float(os.getenv(f'{prefix}_HTTP_CONNECT_TIMEOUT', 5)),
+            read_timeout=float(os.getenv(f'{prefix}_HTTP_READ_TIMEOUT', default_read_timeout)),
+            retries=int(os.getenv(f'{prefix}_HTTP_RETRIES', 2)),
+            backoff=float(os.getenv(f'{prefix}_HTTP_BACKOFF', 0.5)),
+            backoff_max=float(os.getenv(f'{prefix}_HTTP_BACKOFF_MAX', 8)),
+            verify=verify,
+            circuit_enabled=os.getenv(f'{prefix}_CIRCUIT_ENABLED', 'true').lower() in ('true', '1', 't'),
+            circuit_failure_rate=float(os.getenv(f'{prefix}_CIRCUIT_FAILURE_RATE', 0.5)),
+            circuit_min_calls=int(os.getenv(f'{prefix}_CIRCUIT_MIN_CALLS', 5)),
+            circuit_window=float(os.getenv(f'{prefix}_CIRCUIT_WINDOW', 60)),
+            circuit_open_seconds=float(os.getenv(f'{prefix}_CIRCUIT_OPEN_SECONDS', 30)),
+            hedge_enabled=os.getenv(f'{prefix}_HEDGE_ENABLED', 'false').lower() in ('true', '1', 't'),
+            hedge_percentile=float(os.getenv(f'{prefix}_HEDGE_PERCENTILE', 95)),
+            hedge_min_delay=float(os.getenv(f'{prefix}_HEDGE_MIN_DELAY', 0.05)),
+            hedge_min_samples=int(os.getenv(f'{prefix}_HEDGE_MIN_SAMPLES', 20)),
+        )
+
+    # --- Requests ---------------------------------------------------------
+
+    def post(self, url, idempotent=False, hedge=False, **kwargs):
+        return self.request('POST', url, idempotent=idempotent, hedge=hedge, **kwargs)
+
+    def request(self, method, url, idempotent=False, timeout=None, hedge=False, **kwargs):
+        """
+        Sends a request with this transport's timeouts and retry policy. Raises the usual
+        requests exceptions once retries are exhausted, CircuitOpenError while the endpoint's
+        circuit is open, or DeadlineExceeded when the current latency budget runs out; HTTP error
+        statuses are returned, not raised. hedge=True lets an idempotent call be hedged.
+        """
+        kwargs.setdefault('verify', self.verify)
+        timeout = timeout or (self.connect_timeout, self.read_timeout)
+        if hedge and idempotent and self.hedge_enabled:
+            return self._hedged_request(method, url, timeout, kwargs)
+        return self._send(method, url, idempotent, timeout, kwargs)
+
+    def _send(self, method, url, idempotent, timeout, kwargs):
+        endpoint = self._endpoint(url)
+        breaker = self.breaker(url) if self.circuit_enabled else None
+        attempt = 0
+        while True:
+            try:
+                attempt_timeout = deadline.clip_timeout(timeout)
+            except DeadlineExceeded:
+                with self._lock:
+                    self._stats['deadline_exceeded'] += 1
+                raise
+            if breaker is not None and not breaker.allow():
+                with self._lock:
+                    self._stats['fast_failures'] += 1
+                raise CircuitOpenError(breaker.name, breaker.retry_in())
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, timeout=attempt_timeout, **kwargs)
+            except requests.RequestException as e:
+                left = deadline.remaining()
+                if isinstance(e, requests.Timeout) and left is not None and left <= DEADLINE_SLACK:
+                    # Cut short by the latency budget; any other timeout counts against the endpoint
+                    if breaker is not None:
+                        breaker.cancel()
+                    deadline.mark_exceeded()
+                    with self._lock:
+                        self._stats['deadline_exceeded'] += 1
+                    raise DeadlineExceeded(f"{method} {url} did not answer within the remaining latency budget") from e
+                if breaker is not None:
+                    breaker.record(False)
+                if attempt < self.retries and self._should_retry_error(e, idempotent):
+                    attempt += 1
+                    self._sleep_before_retry(attempt, method, url, f"{type(e).__name__}: {e}")
+                    continue
+                with self._lock:
+                    self._stats['failures'] += 1
+                raise
+            except Exception:
+                if breaker is not None:
+                    breaker.record(False)
+                raise
+
+            succeeded = response.status_code not in self.retry_statuses
+            if breaker is not None:
+                breaker.record(succeeded)
+            if succeeded:
+                self._record_latency(endpoint, time.monotonic() - started)
+            if idempotent and response.status_code in self.retry_statuses and attempt < self.retries:
+                attempt += 1
+                response.close()
+                self._sleep_before_retry(attempt, method, url, f"HTTP {response.status_code}")
+                continue
+            return response
+
+    def _hedged_request(self, method, url, timeout, kwargs):
+        """
+        Sends the request and, if it has not answered after hedge_delay(url), a duplicate. The first
+        response received is returned and the other one is discarded when it arrives. Plain request
+        while too few latencies are known or the latency budget would not cover the wait.
+        """
+        delay = self.hedge_delay(url)
+        left = deadline.remaining()
+        if delay is None or (left is not None and left <= delay):
+            return self._send(method, url, True, timeout, kwargs)
+
+        primary = self._submit_attempt(method, url, timeout, kwargs)
+        try:
+            return primary.result(timeout=delay)
+        except concurrent.futures.TimeoutError:
+            pass
+        with self._lock:
+            self._stats['hedged'] += 1
+        logging.info(f"[HTTP {self.name}] {method} {url} has not answered in {delay * 1000:.0f}ms; sending a hedged request")
+        hedge = self._submit_attempt(method, url, timeout, kwargs)
+
+        errors = {}
+        for future in concurrent.futures.as_completed((primary, hedge)):
+            try:
+                response = future.result()
+            except Exception as e:
+                errors[future] = e
+                continue
+            other = hedge if future is primary else primary
+            other.add_done_callback(_discard_response)
+            if future is hedge:
+                with self._lock:
+                    self._stats['hedge_wins'] += 1
+            return response
+        raise errors[primary]
+
+    def _submit_attempt(self, method, url, timeout, kwargs):
+        # Each attempt runs in its own copy of the caller's context so the latency budget carries over
+        return self._hedge_executor.submit(contextvars.copy_context().run, self._send, method, url, True, timeout, kwargs)
+
+    def hedge_delay(self, url):
+        """Seconds to wait before hedging a call to url's endpoint, or None until hedge_min_samples latencies are known."""
+        samples = self._latencies.get(self._endpoint(url))
+        if samples is None:
+            return None
+        with self._lock:
+            if len(samples) < self.hedge_min_samples:
+                return None
+            ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return max(self.hedge_min_delay, ordered[index])
+
+    def breaker(self, url):
+        """Returns the circuit breaker for the endpoint (scheme, host and path) of url."""
+        endpoint = self._endpoint(url)
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(endpoint)
+                if breaker is None:
+                    breaker = self._breakers[endpoint] = CircuitBreaker(f"{self.name} {endpoint}", **self._circuit_settings)
+        return breaker
+
+    def circuit_state(self, url=None):
+        """
+        Circuit state for url's endpoint, or without url the worst state across the endpoints used so far
+        ('open' if any is open). Always 'closed' when circuit breaking is disabled.
+        """
+        if not self.circuit_enabled:
+            return STATE_CLOSED
+        if url is not None:
+            return self.breaker(url).state
+        states = {breaker.state for breaker in list(self._breakers.values())}
+        for state in (STATE_OPEN, STATE_HALF_OPEN):
+            if state in states:
+                return state
+        return STATE_CLOSED
+
+    def stats(self):
+        """Returns request/retry counters, circuit states and per-host pool usage for sizing the pool."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['in_flight'] = sum(self._in_flight.values())
+        snapshot.update({'name': self.name, 'pool_size': self.pool_size,
+                         'connect_timeout': self.connect_timeout, 'read_timeout': self.read_timeout})
+        hosts = {}
+        try:
+            pools = self._adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                    'connections_opened': pool.num_connections,
+                    'requests': pool.num_requests,
+                    'idle': pool.pool.qsize() if pool.pool is not None else 0,
+                }
+        except Exception as e:
+            logging.debug(f"[HTTP {self.name}] Could not read pool statistics: {e}")
+        snapshot['hosts'] = hosts
+        snapshot['circuits'] = {endpoint: breaker.stats() for endpoint, breaker in list(self._breakers.items())}
+        if self.hedge_enabled:
+            snapshot['hedge_delays'] = {endpoint: self.hedge_delay(endpoint) for endpoint in list(self._latencies)}
+        return snapshot
+
+    # --- Internals --------------------------------------------------------
+
+    @staticmethod
+    def _endpoint(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+    def _record_latency(self, endpoint, seconds):
+        with self._lock:
+            samples = self._latencies.get(endpoint)
+            if samples is None:
+                samples = self._latencies[endpoint] = deque(maxlen=LATENCY_SAMPLES)
+            samples.append(seconds)
+
+    @staticmethod
+    def _failed_before_send(error):
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+    def _should_retry_error(self, error, idempotent):
+        if self._failed_before_send(error):
+            return True
+        # Anything else may have reached the server, so only safe-to-repeat calls are retried
+        return idempotent and isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    def _sleep_before_retry(self, attempt, method, url, reason):
+        # Exponential backoff with full jitter: uniform(0, min(cap, base * 2^(attempt-1)))
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * (2 ** (attempt - 1))))
+        left = deadline.remaining()
+        if left is not None and delay >= left:
+            deadline.mark_exceeded()
+            with self._lock:
+                self._stats['deadline_exceeded'] += 1
+            raise DeadlineExceeded(f"{method} {url} failed ({reason}) with no latency budget left to retry")
+        with self._lock:
+            self._stats['retries'] += 1
+        logging.warning(f"[HTTP {self.name}] {method} {url} failed ({reason}); retry {attempt}/{self.retries} in {delay:.2f}s")
+        time.sleep(delay)
+
+    def _enter(self, host):
+        with self._lock:
+            in_flight = self._in_flight.get(host, 0) + 1
+            self._in_flight[host] = in_flight
+            self._stats['requests'] += 1
+            if in_flight > self.pool_size:
+                self._stats['saturated_requests'] += 1
+            if in_flight > self._stats['max_in_flight']:
+                self._stats['max_in_flight'] = in_flight
+
+    def _exit(self, host):
+        with self._lock:
+            self._in_flight[host] -= 1
+
+
+def _discard_response(future):
+    """Done-callback for the losing request of a hedged pair: releases its connection back to the pool."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
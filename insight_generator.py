@@ -51,14 +51,14 @@ Format exactly as:
 
 def format_transactions(transactions):
     """
-    Format each transaction dict into:
+    Format each Transaction into:
       YYYY-MM-DD: Description ($X,XXX.XX)
     """
     lines = []
     for tx in transactions:
-        date = tx.get('date', '')
-        desc = tx.get('description', '')
-        amt  = tx.get('amount', '')
+        date = tx.date.isoformat() if tx.date else ''
+        desc = tx.description or ''
+        amt  = tx.amount
         lines.append(f"{date}: {desc} ({amt})")
     return "\n".join(lines)
 
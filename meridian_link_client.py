@@ -4,22 +4,33 @@ import xml.etree.ElementTree as ET
 import logging
 import traceback
 import hashlib
+import hmac
 import base64
 import os
 import xml.dom.minidom
 import os
+from http_transport import HttpTransport
+from circuit_breaker import CircuitOpenError
+from deadline import DeadlineExceeded
+from single_flight import SingleFlight, coalesced
 
 
 # Configure logging if not already configured by the main app
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+_SSN_KEY = os.urandom(32)   # Per-process HMAC key: keys cannot be matched to SSNs outside this process
+
+def ssn_key(ssn):
+    """HMAC of an SSN, used instead of the SSN wherever a lookup is keyed by it (coalescing, app.ml_cache)."""
+    return hmac.new(_SSN_KEY, str(ssn).strip().encode('utf-8'), hashlib.sha256).hexdigest()
+
 class MeridianLinkError(Exception):
     """Custom exception for MeridianLink client errors."""
     pass
 
 class MeridianLinkClient:
-    def __init__(self, logger, verify_ssl=False): # Removed config, added verify_ssl consistency
+    def __init__(self, logger, verify_ssl=False, pool_size=None): # Removed config, added verify_ssl consistency
         # Load configuration directly from environment variables
         self.user_id = os.getenv('ML_API_USER_ID')
         self.password = os.getenv('ML_API_PASSWORD')
@@ -28,6 +39,11 @@ class MeridianLinkClient:
 
         self.logger = logger
         self.verify_ssl = verify_ssl # Added for consistency
+        # Shared keep-alive transport; ML_HTTP_* variables tune pool size, timeouts and retries
+        self.transport = HttpTransport.from_env('ML', name='meridianlink', default_pool_size=pool_size or 10,
+                                                default_read_timeout=30, verify=self.verify_ssl)
+        # Concurrent lookups of the same SSN or loan share one upstream call
+        self.single_flight = SingleFlight('meridianlink')
 
         # Basic check for essential config
         if not all([self.user_id, self.password, self.api_url, self.get_loan_url]):
@@ -77,6 +93,7 @@ class MeridianLinkClient:
             print(f"Error decoding {encoded}: {str(e)}")
             raise
 
+    @coalesced('search', key=ssn_key)
     def query_meridian_link(self, ssn):
         try:
             xml_payload = f"""
@@ -89,7 +106,8 @@ class MeridianLinkClient:
             self.logger.debug(f"Request payload: {xml_payload}")
 
             # Use verify=self.verify_ssl
-            response = requests.post(self.api_url, data=xml_payload, headers={'Content-Type': 'application/xml'}, verify=self.verify_ssl, timeout=30) # Added timeout
+            # SEARCH_QUERY is read-only, so it may be retried on timeouts and gateway errors
+            response = self.transport.post(self.api_url, data=xml_payload, headers={'Content-Type': 'application/xml'}, idempotent=True)
             response.raise_for_status()
 
             self.logger.info(f"[ML_CLIENT_API_SUCCESS] Successfully received API response from Meridian Link (Search) for SSN ending: {ssn[-4:] if ssn else 'N/A'}. Status code: {response.status_code}")
@@ -97,10 +115,18 @@ class MeridianLinkClient:
             
             root = ET.fromstring(response.content)
             search_results = root.find('.//SEARCH_RESULTS')
-            
-            if search_results is None or len(search_results) == 0:
-                self.logger.warning(f"No loan applications found for SSN: {ssn}")
+
+            if search_results is None:
+                error = root.find('.//ERROR')
+                if error is not None:
+                    self.logger.error(f"Meridian Link API (Search) returned an error: {error.text}")
+                else:
+                    self.logger.warning(f"No search results in Meridian Link response for SSN ending: {ssn[-4:] if ssn else 'N/A'}")
                 return None
+            if len(search_results) == 0:
+                # A definite "no loans" answer; [] lets callers (and the app's cache) tell it apart from a failure
+                self.logger.info(f"No loan applications found for SSN ending: {ssn[-4:] if ssn else 'N/A'}")
+                return []
             
             loans = []
             for loan in search_results.findall('LOAN'):
@@ -121,11 +147,18 @@ class MeridianLinkClient:
             self.logger.debug(f"Parsed result: {loans}")
             
             return loans
+        except CircuitOpenError as e:
+            self.logger.warning(f"Meridian Link API (Search) unavailable: {e}")
+            return None
+        except DeadlineExceeded as e:
+            self.logger.warning(f"Latency budget exhausted; gave up on Meridian Link API (Search): {e}")
+            return None
         except Exception as e:
             self.logger.error(f"Error querying Meridian Link API (Search): {str(e)}", exc_info=True)
             # flash(f"Error querying Meridian Link API: {str(e)}", "error") # Flashing should happen in the route handler
             return None # Return None on error
 
+    @coalesced('get_loan')
     def query_meridian_link_get_loan(self, loan_id):
         self.logger.debug(f"Entering query_meridian_link_get_loan method with loan_id: {loan_id}")
 
@@ -145,6 +178,12 @@ class MeridianLinkClient:
                 self.logger.warning(f"Failed to parse loan details for loan_id: {loan_id}")
 
             return parsed_result
+        except CircuitOpenError as e:
+            self.logger.warning(f"Meridian Link API (Get Loan) unavailable: {e}")
+            return None
+        except DeadlineExceeded as e:
+            self.logger.warning(f"Latency budget exhausted; gave up on Meridian Link API (Get Loan): {e}")
+            return None
         except requests.RequestException as e:
             self.logger.error(f"Request to Meridian Link API failed: {str(e)}")
             return None
@@ -171,7 +210,7 @@ class MeridianLinkClient:
         self.logger.debug(f"Request payload: {xml_payload}")
 
         # Use verify=self.verify_ssl
-        response = requests.post(self.get_loan_url, data=xml_payload, headers={'Content-Type': 'application/xml'}, verify=self.verify_ssl, timeout=30) # Added timeout
+        response = self.transport.post(self.get_loan_url, data=xml_payload, headers={'Content-Type': 'application/xml'}, idempotent=True)
         response.raise_for_status()
 
         self.logger.info(f"[ML_CLIENT_API_SUCCESS] Successfully received API response from Meridian Link (Get Loan). Status code: {response.status_code}")
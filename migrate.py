@@ -0,0 +1,134 @@
+# waiting/migrate.py - Versioned schema migrations for the kiosk table
+#
+# Usage:
+#   python migrate.py            Apply all pending migrations in migrations/
+#   python migrate.py --list     Show applied and pending migrations
+#   python migrate.py --dry-run  Print the SQL that would run without executing it
+import os
+import re
+import sys
+import logging
+
+import database
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATIONS_TABLE = os.getenv('DB_MIGRATIONS_TABLE', 'KioskSchemaMigrations')
+
+# Batches are separated by a line containing only GO (as in SSMS/sqlcmd scripts)
+_BATCH_SEPARATOR = re.compile(r'^\s*GO\s*$', re.IGNORECASE | re.MULTILINE)
+# A migration containing this line runs in autocommit mode, so every statement (e.g. each chunk of a
+# backfill loop) commits on its own. Such a migration is not rolled back on failure and must be safe to re-run.
+_NO_TRANSACTION = re.compile(r'^\s*--\s*migrate:\s*no-transaction\s*$', re.IGNORECASE | re.MULTILINE)
+
+
+def discover_migrations():
+    """Returns (version, path) pairs for every migrations/NNNN_*.sql file, in version order."""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.match(r'^(\d{4})_.+\.sql$', filename)
+        if match:
+            migrations.append((match.group(1), os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def read_migration(path):
+    """Reads a migration file with the kiosk table name substituted."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().replace('{table}', database.DB_KIOSK_TABLE)
+
+
+def load_batches(sql):
+    """Splits a migration into its GO-separated batches."""
+    return [batch.strip() for batch in _BATCH_SEPARATOR.split(sql) if batch.strip()]
+
+
+def is_transactional(sql):
+    return not _NO_TRANSACTION.search(sql)
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute(f"""
+        IF OBJECT_ID('{MIGRATIONS_TABLE}') IS NULL
+            CREATE TABLE {MIGRATIONS_TABLE} (
+                Version NVARCHAR(20) NOT NULL PRIMARY KEY,
+                Name NVARCHAR(200) NOT NULL,
+                AppliedDate DATETIME NOT NULL DEFAULT GETDATE()
+            )
+    """)
+
+
+def get_applied_versions(cursor):
+    cursor.execute(f"SELECT Version FROM {MIGRATIONS_TABLE}")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def run(dry_run=False, list_only=False):
+    if not database.DB_KIOSK_TABLE:
+        logging.error("DB_KIOSK_TABLE is not set; cannot run migrations.")
+        return 1
+
+    migrations = discover_migrations()
+    if dry_run:
+        for version, path in migrations:
+            print(f"-- Migration {version}: {os.path.basename(path)}")
+            for batch in load_batches(read_migration(path)):
+                print(batch)
+                print("GO")
+        return 0
+
+    # Migrations use a dedicated connection rather than the request pool
+    conn = database.create_connection()
+    if not conn:
+        logging.error("Database connection failed; no migrations applied.")
+        return 1
+
+    cursor = conn.cursor()
+    try:
+        ensure_migrations_table(cursor)
+        conn.commit()
+        applied = get_applied_versions(cursor)
+
+        if list_only:
+            for version, path in migrations:
+                state = 'applied' if version in applied else 'pending'
+                print(f"{version}  {state:8}  {os.path.basename(path)}")
+            return 0
+
+        pending = [(version, path) for version, path in migrations if version not in applied]
+        if not pending:
+            logging.info("Schema is up to date; no pending migrations.")
+            return 0
+
+        for version, path in pending:
+            name = os.path.basename(path)
+            sql = read_migration(path)
+            transactional = is_transactional(sql)
+            logging.info(f"Applying migration {name}" + ("" if transactional else " (no transaction)"))
+            conn.autocommit = not transactional
+            try:
+                for batch in load_batches(sql):
+                    cursor.execute(batch)
+                    # Drain any result sets/row counts so the next batch runs on a clean cursor
+                    while cursor.nextset():
+                        pass
+                cursor.execute(f"INSERT INTO {MIGRATIONS_TABLE} (Version, Name) VALUES (?, ?)", (version, name))
+                if transactional:
+                    conn.commit()
+                logging.info(f"Migration {name} applied successfully.")
+            except Exception as e:
+                if transactional:
+                    conn.rollback()
+                    logging.error(f"Migration {name} failed and was rolled back: {e}")
+                else:
+                    logging.error(f"Migration {name} failed; batches already run stay applied, fix the cause and re-run: {e}")
+                return 1
+            finally:
+                conn.autocommit = False
+        return 0
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(run(dry_run='--dry-run' in sys.argv, list_only='--list' in sys.argv))
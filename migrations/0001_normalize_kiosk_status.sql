@@ -0,0 +1,55 @@
+-- 0001: Canonical queue Status values and an index-friendly layout for the kiosk table.
+--
+-- {table} is replaced with DB_KIOSK_TABLE by migrate.py. Batches are separated by GO lines.
+-- The backfill runs in chunks below SQL Server's ~5000-lock escalation threshold, and the runner
+-- commits each chunk on its own (no-transaction below), so a table with years of history is never
+-- locked as a whole. Every step is safe to re-run if the migration stops part way.
+-- migrate: no-transaction
+
+-- 1. Backfill NULL statuses (legacy rows treated as waiting) to the canonical 'Waiting', and normalize
+--    casing/whitespace of known statuses ('WAITING', 'handled ', ...). The loop walks the clustered
+--    FacingMemberID range 4000 ids at a time, so each chunk is a range seek and the table is read once
+--    in total, instead of every UPDATE TOP chunk scanning from the start for rows still to fix.
+--    A binary collation is used for the inequality because the column collation is case-insensitive.
+DECLARE @id INT, @last INT;
+SELECT @id = MIN(FacingMemberID), @last = MAX(FacingMemberID) FROM {table};
+WHILE @id <= @last
+BEGIN
+    UPDATE {table}
+    SET Status = CASE WHEN Status IS NULL OR UPPER(LTRIM(RTRIM(Status))) = 'WAITING' THEN 'Waiting' ELSE 'Handled' END
+    WHERE FacingMemberID >= @id AND FacingMemberID < @id + 4000
+      AND (Status IS NULL
+           OR (UPPER(LTRIM(RTRIM(Status))) IN ('WAITING', 'HANDLED')
+               AND Status COLLATE Latin1_General_BIN NOT IN ('Waiting', 'Handled')));
+    SET @id = @id + 4000;
+END
+GO
+
+-- 2. New rows default to 'Waiting' even if a writer omits Status.
+IF NOT EXISTS (
+    SELECT 1 FROM sys.default_constraints
+    WHERE parent_object_id = OBJECT_ID('{table}') AND name = 'DF_FacingMembers_Status'
+)
+    ALTER TABLE {table} ADD CONSTRAINT DF_FacingMembers_Status DEFAULT ('Waiting') FOR Status;
+GO
+
+-- 3. Covering index for status lookups ordered by check-in time (handled list, counts).
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('{table}') AND name = 'IX_FacingMembers_Status_CreatedDate'
+)
+    CREATE NONCLUSTERED INDEX IX_FacingMembers_Status_CreatedDate
+        ON {table} (Status, CreatedDate)
+        INCLUDE (Name, HelpTopic, SubIssue, UpdatedDate, MemberNumber);
+GO
+
+-- 4. Small filtered index holding only the live queue, so the waiting list stays cheap as history grows.
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('{table}') AND name = 'IX_FacingMembers_Waiting'
+)
+    CREATE NONCLUSTERED INDEX IX_FacingMembers_Waiting
+        ON {table} (CreatedDate)
+        INCLUDE (Status, Name, HelpTopic, SubIssue, UpdatedDate, MemberNumber)
+        WHERE Status = 'Waiting';
+GO
@@ -0,0 +1,18 @@
+-- 0002: Row versioning for the incremental queue change feed (database.get_queue_changes).
+--
+-- SQL Server bumps a ROWVERSION column on every insert and update, so "everything changed since token T"
+-- becomes an index seek on RowVer > T. Adding the column rewrites the table once; run it off-hours on
+-- large tables.
+
+IF COL_LENGTH('{table}', 'RowVer') IS NULL
+    ALTER TABLE {table} ADD RowVer ROWVERSION;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('{table}') AND name = 'IX_FacingMembers_RowVer'
+)
+    CREATE NONCLUSTERED INDEX IX_FacingMembers_RowVer
+        ON {table} (RowVer)
+        INCLUDE (Status, Name, HelpTopic, SubIssue, CreatedDate, UpdatedDate, MemberNumber);
+GO
@@ -0,0 +1,144 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from cachetools import TTLCache
+
+
+class PrefetchService:
+    """
+    Long-lived pool of worker threads that runs handler(key, payload) for queued keys.
+
+    Work is deduplicated by key: a key that is already queued keeps a single entry (moved up if
+    resubmitted with a better priority), a key that is in flight is not queued again, and a key that
+    completed within recent_ttl seconds is skipped. Lower priority values run first.
+    """
+
+    def __init__(self, handler, workers=2, max_queue=500, recent_ttl=60, name='prefetch'):
+        self._handler = handler
+        self.workers = max(1, int(workers))
+        self.max_queue = max(1, int(max_queue))
+        self.name = name
+
+        self._lock = threading.Condition(threading.Lock())
+        self._heap = []                 # [priority, seq, key] entries; key is None once superseded
+        self._queued = {}               # key -> (heap entry, payload)
+        self._in_flight = set()
+        self._recent = TTLCache(maxsize=max(self.max_queue, 200), ttl=recent_ttl)
+        self._seq = itertools.count()
+        self._threads = []
+
+        self._stats = {
+            'submitted': 0,
+            'deduplicated': 0,
+            'reprioritized': 0,
+            'dropped_full': 0,
+            'completed': 0,
+            'failed': 0,
+            'total_run_ms': 0.0,
+            'max_run_ms': 0.0,
+        }
+
+    # --- Public API -------------------------------------------------------
+
+    def submit(self, key, priority, payload=None):
+        """Queues key for prefetching. Returns True if new work was queued or an entry was moved up."""
+        with self._lock:
+            if key in self._in_flight or key in self._recent:
+                self._stats['deduplicated'] += 1
+                return False
+
+            existing = self._queued.get(key)
+            if existing is not None:
+                entry = existing[0]
+                if priority >= entry[0]:
+                    self._stats['deduplicated'] += 1
+                    return False
+                entry[2] = None  # Superseded; skipped when popped
+                self._stats['reprioritized'] += 1
+            elif len(self._queued) >= self.max_queue:
+                self._stats['dropped_full'] += 1
+                logging.warning(f"[Prefetch] '{self.name}' queue is full ({self.max_queue}); dropping prefetch for {key}.")
+                return False
+            else:
+                self._stats['submitted'] += 1
+
+            entry = [priority, next(self._seq), key]
+            self._queued[key] = (entry, payload)
+            heapq.heappush(self._heap, entry)
+            self._ensure_workers_locked()
+            self._lock.notify()
+            return True
+
+    def pending_keys(self, limit):
+        """Returns up to limit keys that are in flight or queued: in-flight keys first, then queued ones by priority."""
+        with self._lock:
+            keys = list(self._in_flight)[:limit]
+            entries = heapq.nsmallest(limit - len(keys), (entry for entry in self._heap if entry[2] is not None))
+        return keys + [entry[2] for entry in entries]
+
+    def forget(self, key):
+        """Drops the 'recently completed' marker so the key can be prefetched again (e.g. after a data change)."""
+        with self._lock:
+            self._recent.pop(key, None)
+
+    def stats(self):
+        """Returns queue depth, in-flight work and completion counters for monitoring."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'name': self.name,
+                'workers': self.workers,
+                'queue_depth': len(self._queued),
+                'in_flight': len(self._in_flight),
+                'recently_completed': len(self._recent),
+            })
+        runs = (snapshot['completed'] + snapshot['failed']) or 1
+        snapshot['avg_run_ms'] = round(snapshot.pop('total_run_ms') / runs, 3)
+        snapshot['max_run_ms'] = round(snapshot['max_run_ms'], 3)
+        return snapshot
+
+    # --- Internals --------------------------------------------------------
+
+    def _ensure_workers_locked(self):
+        # Workers start on first use so importing the app (e.g. for migrations) spawns no threads
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"{self.name}-worker-{len(self._threads) + 1}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _next_locked(self):
+        while True:
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                key = entry[2]
+                if key is None:
+                    continue
+                _, payload = self._queued.pop(key)
+                self._in_flight.add(key)
+                return key, payload
+            self._lock.wait()
+
+    def _work(self):
+        while True:
+            with self._lock:
+                key, payload = self._next_locked()
+
+            started = time.monotonic()
+            succeeded = False
+            try:
+                self._handler(key, payload)
+                succeeded = True
+            except Exception as e:
+                logging.warning(f"[Prefetch] '{self.name}' prefetch for {key} failed: {e}", exc_info=True)
+            run_ms = (time.monotonic() - started) * 1000
+
+            with self._lock:
+                self._in_flight.discard(key)
+                self._recent[key] = True
+                self._stats['completed' if succeeded else 'failed'] += 1
+                self._stats['total_run_ms'] += run_ms
+                if run_ms > self._stats['max_run_ms']:
+                    self._stats['max_run_ms'] = run_ms
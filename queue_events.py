@@ -0,0 +1,218 @@
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+
+class QueueSubscription:
+    """A single dashboard's view of the watcher: a bounded inbox of change events."""
+
+    def __init__(self, max_pending=100):
+        self.events = queue.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def offer(self, event):
+        """Queues an event; returns False when the inbox is full and the subscriber has fallen behind."""
+        if self.overflowed:
+            return False
+        try:
+            self.events.put_nowait(event)
+            return True
+        except queue.Full:
+            # A stalled client missed events; it gets a reset instead of an unbounded backlog
+            self.overflowed = True
+            return False
+
+
+class QueueWatcher:
+    """
+    Polls the kiosk change feed once per server process and fans the deltas out to every
+    connected dashboard (SSE subscribers and long-poll requests), so the database is queried
+    once per interval no matter how many staff screens are open.
+
+    fetch_changes(token) must behave like database.get_queue_changes; transform(row) converts
+    a changed row into the payload sent to browsers. on_rows, if given, receives each batch of
+    raw changed rows on the watcher thread (e.g. to start background work for new check-ins).
+    """
+
+    def __init__(self, fetch_changes, transform, interval=3.0, idle_after=60.0, history_size=200, on_rows=None):
+        self._fetch_changes = fetch_changes
+        self._transform = transform
+        self._on_rows = on_rows
+        self.interval = float(interval)
+        self.idle_after = float(idle_after)
+
+        self._lock = threading.Condition(threading.Lock())
+        self._wake = threading.Event()
+        self._thread = None
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)  # (token_before, token_after, changes)
+        self._token = None
+        self._last_interest = 0.0
+
+        self._stats = {'polls': 0, 'poll_errors': 0, 'events_published': 0, 'rows_published': 0,
+                       'subscriber_overflows': 0, 'catch_up_queries': 0}
+
+    # --- Public API -------------------------------------------------------
+
+    def notify(self):
+        """Wakes the watcher immediately, e.g. right after this process changed the queue."""
+        self._wake.set()
+
+    def subscribe(self, max_pending=100):
+        subscription = QueueSubscription(max_pending)
+        with self._lock:
+            self._subscribers.add(subscription)
+            self._last_interest = time.monotonic()
+        self._ensure_started()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def backlog_since(self, since_token):
+        """
+        Returns (token, changes) accumulated after since_token, or None when the client must reload.
+        Served from recent history when possible, otherwise from a single catch-up query.
+        """
+        self._ensure_started()
+        with self._lock:
+            self._last_interest = time.monotonic()
+            backlog = self._backlog_locked(since_token)
+        if backlog is None:
+            return self._catch_up(since_token)
+        return backlog
+
+    def wait_for_changes(self, since_token, timeout):
+        """Long-poll fallback: blocks up to timeout seconds for changes after since_token."""
+        self._ensure_started()
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                self._last_interest = time.monotonic()
+                backlog = self._backlog_locked(since_token)
+                if backlog is None:
+                    break
+                if backlog[1]:
+                    return backlog
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return backlog
+                self._lock.wait(remaining)
+        return self._catch_up(since_token)
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'subscribers': len(self._subscribers),
+                'token': self._token,
+                'history': len(self._history),
+                'running': self._thread is not None and self._thread.is_alive(),
+                'interval_seconds': self.interval,
+            })
+        return snapshot
+
+    @staticmethod
+    def format_sse(event_name, payload):
+        return f"event: {event_name}\ndata: {json.dumps(payload)}\n\n"
+
+    # --- Internals --------------------------------------------------------
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='queue-watcher', daemon=True)
+            self._thread.start()
+        logging.info("[Queue Watcher] Started kiosk queue watcher thread.")
+
+    def _backlog_locked(self, since_token):
+        if self._token is None or since_token is None:
+            # Before the watcher's first poll nothing is known about changes after since_token:
+            # the caller answers from a catch-up query instead.
+            return None
+        if since_token >= self._token:
+            return since_token, []
+        changes = []
+        covered = False
+        for token_before, token_after, event_changes in self._history:
+            if token_after <= since_token:
+                continue
+            if token_before > since_token and not covered:
+                return None  # Gap between the client's token and the oldest retained event
+            covered = True
+            changes.extend(event_changes)
+        if not covered:
+            return None
+        return self._token, changes
+
+    def _catch_up(self, since_token):
+        # Client's token predates the retained history (e.g. page rendered before the watcher started):
+        # one direct query brings it forward, or it reloads if the gap is too large or the token is unusable.
+        if since_token is None:
+            return None
+        with self._lock:
+            self._stats['catch_up_queries'] += 1
+        result, error = self._fetch_changes(since_token)
+        if error or result.get('has_more'):
+            return None
+        return result['token'], [self._transform(row) for row in result['changes']]
+
+    def _has_interest(self):
+        with self._lock:
+            return bool(self._subscribers) or time.monotonic() - self._last_interest < self.idle_after
+
+    def _run(self):
+        while True:
+            if self._has_interest():
+                try:
+                    self._poll()
+                except Exception as e:
+                    logging.error(f"[Queue Watcher] Unexpected error polling kiosk queue changes: {e}", exc_info=True)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _poll(self):
+        has_more = True
+        while has_more:
+            result, error = self._fetch_changes(self._token)
+            with self._lock:
+                self._stats['polls'] += 1
+            if error:
+                with self._lock:
+                    self._stats['poll_errors'] += 1
+                logging.warning(f"[Queue Watcher] Could not fetch kiosk queue changes: {error}")
+                return
+
+            token_before = self._token
+            token_after = result['token']
+            has_more = result.get('has_more', False)
+            if token_before is None:
+                # First poll only establishes the starting point
+                with self._lock:
+                    self._token = token_after
+                    self._lock.notify_all()
+                return
+
+            changes = [self._transform(row) for row in result['changes']]
+            with self._lock:
+                self._token = token_after
+                if changes:
+                    self._history.append((token_before, token_after, changes))
+                    self._stats['events_published'] += 1
+                    self._stats['rows_published'] += len(changes)
+                    event = {'token': token_after, 'changes': changes}
+                    for subscription in list(self._subscribers):
+                        if not subscription.overflowed and not subscription.offer(event):
+                            self._stats['subscriber_overflows'] += 1
+                self._lock.notify_all()
+
+            if changes and self._on_rows is not None:
+                try:
+                    self._on_rows(result['changes'])
+                except Exception as e:
+                    logging.warning(f"[Queue Watcher] Change hook failed: {e}")
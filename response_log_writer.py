@@ -0,0 +1,151 @@
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class ResponseLogWriter:
+    """
+    Writes a sample of raw API responses to files on a background thread.
+
+    submit() never blocks the caller: responses that are not sampled, or that arrive while the
+    bounded queue is full, are dropped. The directory is capped by file count, total bytes and
+    file age; the oldest files are removed first.
+    """
+
+    def __init__(self, directory, enabled=False, sample_rate=1.0, max_files=500, max_total_bytes=50 * 1024 * 1024,
+                 max_file_bytes=2 * 1024 * 1024, retention_days=7, max_pending=100, formatter=None,
+                 prefix='full_response'):
+        self.directory = directory
+        self.enabled = enabled
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        self.max_files = max(1, int(max_files))
+        self.max_total_bytes = max(1, int(max_total_bytes))
+        self.max_file_bytes = max(1, int(max_file_bytes))
+        self.retention_seconds = float(retention_days) * 86400
+        self.prefix = prefix
+        self._formatter = formatter
+
+        self._queue = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._files = None          # deque of (mtime, path, size), oldest first; loaded on first write
+        self._total_bytes = 0
+        self._stats = {'submitted': 0, 'skipped_sampling': 0, 'dropped_full': 0, 'written': 0,
+                       'write_errors': 0, 'pruned': 0}
+
+    def submit(self, text):
+        """
+        Queues text for writing if logging is enabled and the sample selects it. Returns True if queued.
+        text may be a callable returning it, which is only called for a response the sample selects.
+        """
+        if not self.enabled or not text:
+            return False
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            with self._lock:
+                self._stats['skipped_sampling'] += 1
+            return False
+        if callable(text):
+            text = text()
+            if not text:
+                return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((datetime.now(), text))
+        except queue.Full:
+            with self._lock:
+                self._stats['dropped_full'] += 1
+            return False
+        with self._lock:
+            self._stats['submitted'] += 1
+        return True
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'enabled': self.enabled,
+                'sample_rate': self.sample_rate,
+                'pending': self._queue.qsize(),
+                'files': len(self._files) if self._files is not None else None,
+                'total_bytes': self._total_bytes if self._files is not None else None,
+            })
+        return snapshot
+
+    # --- Internals --------------------------------------------------------
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='response-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            received_at, text = self._queue.get()
+            try:
+                self._write(received_at, text)
+            except Exception as e:
+                with self._lock:
+                    self._stats['write_errors'] += 1
+                logging.error(f"[Response Log] Could not write response log to {self.directory}: {e}")
+
+    def _write(self, received_at, text):
+        if self._files is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load_existing()
+
+        if self._formatter is not None:
+            try:
+                text = self._formatter(text)
+            except Exception:
+                pass  # Keep the raw text if it cannot be formatted
+        data = text.encode('utf-8', errors='replace') if isinstance(text, str) else bytes(text)
+        if len(data) > self.max_file_bytes:
+            data = data[:self.max_file_bytes] + b'\n<!-- truncated -->\n'
+
+        file_path = os.path.join(self.directory, f"{self.prefix}_{received_at.strftime('%Y%m%d_%H%M%S_%f')}.xml")
+        with open(file_path, 'wb') as file:
+            file.write(data)
+
+        with self._lock:
+            self._files.append((time.time(), file_path, len(data)))
+            self._total_bytes += len(data)
+            self._stats['written'] += 1
+        self._prune()
+
+    def _load_existing(self):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(self.prefix) and os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, path, stat.st_size))
+        files.sort()
+        with self._lock:
+            self._files = deque(files)
+            self._total_bytes = sum(size for _, _, size in files)
+        self._prune()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        while True:
+            with self._lock:
+                if not self._files:
+                    return
+                mtime, path, size = self._files[0]
+                if (len(self._files) <= self.max_files and self._total_bytes <= self.max_total_bytes
+                        and mtime >= cutoff):
+                    return
+                self._files.popleft()
+                self._total_bytes -= size
+                self._stats['pruned'] += 1
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging.warning(f"[Response Log] Could not remove old response log {path}: {e}")
@@ -0,0 +1,97 @@
+import functools
+import threading
+
+import deadline
+from deadline import DeadlineExceeded
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters', 'cut_short')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self.cut_short = False
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: while a call for a key is running, other callers with the
+    same key wait for it and receive its result (or its exception) instead of starting their own.
+    Nothing is cached once the call finishes. Waiters give up with DeadlineExceeded when their
+    latency budget (deadline.py) runs out. A call the leader's own budget cut short is not shared:
+    its waiters issue the call again under their own budgets.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {'calls': 0, 'executed': 0, 'coalesced': 0, 'errors': 0, 'reissued': 0}
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats['coalesced'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats['executed'] += 1
+                leader = True
+
+        if not leader:
+            # A waiter inside a latency budget stops waiting when its budget runs out; the call itself goes on
+            if not call.done.wait(deadline.remaining()):
+                deadline.mark_exceeded()
+                with self._lock:
+                    call.waiters -= 1
+                raise DeadlineExceeded(f"Latency budget ran out waiting for the in-flight '{self.name}' call")
+            if call.cut_short:
+                # The leader's budget ran out, so its result (or DeadlineExceeded) says nothing about this caller's
+                with self._lock:
+                    self._stats['reissued'] += 1
+                return self.do(key, func, *args, **kwargs)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        finally:
+            call.cut_short = deadline.exceeded()
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['in_flight'] = len(self._calls)
+            snapshot['waiting'] = sum(call.waiters for call in self._calls.values())
+        snapshot['name'] = self.name
+        return snapshot
+
+
+def coalesced(operation, key=None):
+    """
+    Method decorator routing calls through the instance's single_flight, keyed by (operation, key(*args)).
+    key defaults to the positional and keyword arguments as given.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            call_key = key(*args, **kwargs) if key is not None else args + tuple(sorted(kwargs.items()))
+            return self.single_flight.do((operation, call_key), method, self, *args, **kwargs)
+        return wrapper
+    return decorator
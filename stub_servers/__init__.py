@@ -0,0 +1,4 @@
+"""
+Local stand-ins for the DNA (PIE sign-on + CoreApi SubmitRequest) and MeridianLink (SEARCH_QUERY,
+GET_LOAN) APIs, for benchmarking and offline development. Run with python -m stub_servers.
+"""
@@ -0,0 +1,62 @@
+import argparse
+import logging
+import threading
+
+from werkzeug.serving import make_server
+
+from stub_servers import dna, meridian_link
+
+
+def stub_env(host, dna_port, ml_port):
+    """The application environment variables that point DNAApiClient and MeridianLinkClient at the stubs."""
+    dna_base = f"http://{host}:{dna_port}"
+    ml_base = f"http://{host}:{ml_port}"
+    return {
+        'PIE_ENDPOINT': dna_base + dna.PIE_PATH,
+        'DNA_ENDPOINT': dna_base + dna.DNA_PATH,
+        'DEVICE_ID': 'STUB',
+        'USER_ID': dna.STUB_DNA_USER_ID or 'stub',
+        'PASSWORD': dna.STUB_DNA_PASSWORD or 'stub',
+        'PROD_ENV_CD': 'TEST',
+        'PROD_DEF_CD': 'DNA',
+        'APPLICATION_ID': 'STUB',
+        'NTWK_NODE_NAME': 'STUB',
+        'ML_API_URL': ml_base + meridian_link.SEARCH_PATH,
+        'ML_API_GET_LOAN_URL': ml_base + meridian_link.GET_LOAN_PATH,
+        'ML_API_USER_ID': meridian_link.STUB_ML_USER_ID or 'stub',
+        'ML_API_PASSWORD': meridian_link.STUB_ML_PASSWORD or 'stub',
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the DNA and MeridianLink stub servers.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--dna-port', type=int, default=9101)
+    parser.add_argument('--ml-port', type=int, default=9102)
+    parser.add_argument('--print-env', action='store_true',
+                        help="print the application environment variables for these stubs and exit")
+    args = parser.parse_args()
+
+    env = stub_env(args.host, args.dna_port, args.ml_port)
+    if args.print_env:
+        for name, value in env.items():
+            print(f"{name}={value}")
+        return
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)   # No per-request access log under load
+    servers = [make_server(args.host, args.dna_port, dna.create_app(), threaded=True),
+               make_server(args.host, args.ml_port, meridian_link.create_app(), threaded=True)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"DNA stub on {env['PIE_ENDPOINT']} and {env['DNA_ENDPOINT']}")
+    logging.info(f"MeridianLink stub on {env['ML_API_URL']} and {env['ML_API_GET_LOAN_URL']}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
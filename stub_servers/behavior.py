@@ -0,0 +1,226 @@
+import math
+import os
+import random
+import threading
+import time
+
+from flask import jsonify, request
+
+
+def parse_latency(spec):
+    """
+    Parses a latency distribution into a function rng -> seconds. Accepted forms:
+
+      0.2 | fixed:0.2            always 0.2s
+      uniform:0.1:0.5            uniform between 0.1s and 0.5s
+      normal:0.3:0.05            normal with mean 0.3s, standard deviation 0.05s (never below 0)
+      lognormal:0.15:0.5         log-normal with median 0.15s and sigma 0.5 (long right tail)
+      exp:0.2                    exponential with mean 0.2s
+      0.95*lognormal:0.1:0.3,0.05*fixed:3
+                                 weighted mix, e.g. a fast path with a 5% tail of 3s responses
+
+    Raises ValueError for anything else.
+    """
+    spec = str(spec).strip()
+    if ',' in spec or '*' in spec:
+        components = []
+        for part in spec.split(','):
+            weight, _, component = part.strip().partition('*')
+            components.append((float(weight), parse_latency(component)))
+        total = sum(weight for weight, _ in components)
+        if total <= 0:
+            raise ValueError(f"latency mix weights must be positive: {spec!r}")
+
+        def sample_mix(rng):
+            pick = rng.random() * total
+            for weight, sample in components:
+                pick -= weight
+                if pick <= 0:
+                    return sample(rng)
+            return components[-1][1](rng)
+        return sample_mix
+
+    kind, _, args = spec.partition(':')
+    try:
+        if not args:
+            value = float(kind)
+            return lambda rng: value
+        params = [float(arg) for arg in args.split(':')]
+        if kind == 'fixed' and len(params) == 1:
+            return lambda rng: params[0]
+        if kind == 'uniform' and len(params) == 2:
+            return lambda rng: rng.uniform(params[0], params[1])
+        if kind == 'normal' and len(params) == 2:
+            return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+        if kind == 'lognormal' and len(params) == 2:
+            mu = math.log(params[0]) if params[0] > 0 else float('-inf')
+            return lambda rng: rng.lognormvariate(mu, params[1]) if params[0] > 0 else 0.0
+        if kind == 'exp' and len(params) == 1:
+            return lambda rng: rng.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"invalid latency distribution: {spec!r}")
+
+
+class StubBehavior:
+    """
+    Latency and fault injection for one stub server, configured from <PREFIX>_* environment variables
+    (e.g. STUB_DNA_LATENCY, STUB_DNA_LATENCY_7725, STUB_DNA_ERROR_RATE) and adjustable at runtime.
+
+    - latency: distribution per operation (see parse_latency), falling back to the default one.
+    - error_rate: share of calls answered with HTTP 503.
+    - fault_rate: share of calls answered with HTTP 500 and an error body.
+    - hang_rate: share of calls that only answer after hang_seconds (for timeout and budget tests).
+    """
+
+    def __init__(self, prefix, operations, default_latency='lognormal:0.15:0.5'):
+        self.prefix = prefix
+        self.operations = tuple(operations)
+        self._lock = threading.Lock()
+        seed = os.getenv('STUB_SEED')
+        self._rng = random.Random(seed) if seed is not None else random.Random()
+        self._latency_specs = {}
+        self._latency = {}
+        self.set_latency(os.getenv(f'{prefix}_LATENCY', default_latency))
+        for operation in self.operations:
+            spec = os.getenv(f'{prefix}_LATENCY_{operation.upper()}')
+            if spec:
+                self.set_latency(spec, operation)
+        self.error_rate = float(os.getenv(f'{prefix}_ERROR_RATE', 0))
+        self.fault_rate = float(os.getenv(f'{prefix}_FAULT_RATE', 0))
+        self.hang_rate = float(os.getenv(f'{prefix}_HANG_RATE', 0))
+        self.hang_seconds = float(os.getenv(f'{prefix}_HANG_SECONDS', 120))
+
+        self._in_flight = 0
+        self._stats = {'requests': 0, 'max_in_flight': 0, 'injected_errors': 0, 'injected_faults': 0,
+                       'injected_hangs': 0, 'operations': {}}
+
+    # --- Configuration ----------------------------------------------------
+
+    def set_latency(self, spec, operation=None):
+        """Sets the default latency distribution, or the one for operation."""
+        sample = parse_latency(spec)
+        with self._lock:
+            self._latency[operation] = sample
+            self._latency_specs[operation or 'default'] = spec
+
+    def update(self, settings):
+        """
+        Applies a settings dict such as {"latency": "fixed:0.5", "latency_7725": "...", "error_rate": 0.1}.
+        Raises ValueError for unknown keys or invalid values; nothing is applied in that case.
+        """
+        latencies = {}
+        rates = {}
+        for key, value in settings.items():
+            if key == 'latency':
+                latencies[None] = (value, parse_latency(value))
+            elif key.startswith('latency_') and key[len('latency_'):] in self.operations:
+                latencies[key[len('latency_'):]] = (value, parse_latency(value))
+            elif key in ('error_rate', 'fault_rate', 'hang_rate', 'hang_seconds'):
+                rates[key] = float(value)
+            else:
+                raise ValueError(f"unknown setting: {key}")
+        with self._lock:
+            for operation, (spec, sample) in latencies.items():
+                self._latency[operation] = sample
+                self._latency_specs[operation or 'default'] = spec
+            for key, value in rates.items():
+                setattr(self, key, value)
+
+    def settings(self):
+        with self._lock:
+            return {'latency': dict(self._latency_specs), 'error_rate': self.error_rate, 'fault_rate': self.fault_rate,
+                    'hang_rate': self.hang_rate, 'hang_seconds': self.hang_seconds}
+
+    # --- Per-call behaviour -----------------------------------------------
+
+    def delay(self, operation):
+        """Samples a latency in seconds for one operation."""
+        with self._lock:
+            sample = self._latency.get(operation) or self._latency[None]
+            return sample(self._rng)
+
+    def outcome(self):
+        """Draws the injected outcome of a call: None (answer normally), 'error', 'fault' or 'hang'."""
+        with self._lock:
+            roll = self._rng.random()
+            for outcome, rate, counter in (('error', self.error_rate, 'injected_errors'),
+                                           ('fault', self.fault_rate, 'injected_faults'),
+                                           ('hang', self.hang_rate, 'injected_hangs')):
+                if roll < rate:
+                    self._stats[counter] += 1
+                    return outcome
+                roll -= rate
+        return None
+
+    def call(self, operations, extra_seconds=0):
+        """
+        Context manager wrapping one request: counts it, and on exit sleeps so the request takes the
+        slowest of the sampled latencies of the operations it contained, plus extra_seconds.
+        """
+        return _Call(self, operations, extra_seconds)
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['operations'] = {operation: dict(counters) for operation, counters in self._stats['operations'].items()}
+            snapshot['in_flight'] = self._in_flight
+        for counters in snapshot['operations'].values():
+            counters['avg_latency_ms'] = round(counters.pop('total_seconds') / counters['calls'] * 1000, 1) if counters['calls'] else 0
+        return snapshot
+
+    def _enter(self, operations):
+        with self._lock:
+            self._stats['requests'] += 1
+            self._in_flight += 1
+            if self._in_flight > self._stats['max_in_flight']:
+                self._stats['max_in_flight'] = self._in_flight
+            for operation in operations:
+                counters = self._stats['operations'].setdefault(operation, {'calls': 0, 'total_seconds': 0.0})
+                counters['calls'] += 1
+
+    def _exit(self, operations, seconds):
+        with self._lock:
+            self._in_flight -= 1
+            for operation in operations:
+                self._stats['operations'][operation]['total_seconds'] += seconds
+
+
+def register_control_routes(app, behavior):
+    """Adds GET /stub/stats and GET/POST /stub/config (JSON settings, see StubBehavior.update) to a stub app."""
+    @app.route('/stub/stats', methods=['GET'])
+    def stub_stats():
+        return jsonify(behavior.stats())
+
+    @app.route('/stub/config', methods=['GET', 'POST'])
+    def stub_config():
+        if request.method == 'POST':
+            try:
+                behavior.update(request.get_json(force=True) or {})
+            except (ValueError, TypeError) as e:
+                return jsonify({'error': str(e)}), 400
+        return jsonify(behavior.settings())
+
+
+class _Call:
+    def __init__(self, behavior, operations, extra_seconds=0):
+        self._behavior = behavior
+        self._operations = list(operations) or ['unknown']
+        self._extra_seconds = extra_seconds
+
+    def __enter__(self):
+        self._started = time.monotonic()
+        self._target = max(self._behavior.delay(operation) for operation in self._operations) + self._extra_seconds
+        self._behavior._enter(self._operations)
+        return self
+
+    def hang(self):
+        """Extends this call to the configured hang time."""
+        self._target = max(self._target, self._behavior.hang_seconds)
+
+    def __exit__(self, exc_type, exc, tb):
+        left = self._target - (time.monotonic() - self._started)
+        if left > 0:
+            time.sleep(left)
+        self._behavior._exit(self._operations, time.monotonic() - self._started)
+        return False
@@ -0,0 +1,351 @@
+import html
+import logging
+import os
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+
+from flask import Flask, Response, request
+
+from stub_servers import synthetic
+from stub_servers.behavior import StubBehavior, register_control_routes
+
+
+logger = logging.getLogger(__name__)
+
+PIE_PATH = '/PIE/PrimaryInterfaceExternal.asmx'
+DNA_PATH = '/DNA/CoreApiService.svc'
+
+NS_PIE = 'http://www.opensolutions.com/'
+NS_CORE = 'http://www.opensolutions.com/CoreApi'
+NS_MESSAGES = 'http://schemas.datacontract.org/2004/07/OpenSolutions.CoreApiService.Services.Messages'
+NS_XSI = 'http://www.w3.org/2001/XMLSchema-instance'
+_ATTR_XSI_TYPE = '{%s}type' % NS_XSI
+
+# Request type codes answered by SubmitRequest, keyed by the RequestBase i:type
+REQUEST_TYPES = {
+    'PersonDetailInquiryRequest': '7711',
+    'GetTaxIdDataRequest': '7725',
+    'AccountTransactionHistoryRequest': '7703',
+}
+OPERATIONS = ('signon', 'whois', '7711', '7725', '7703')
+
+STUB_DNA_USER_ID = os.getenv('STUB_DNA_USER_ID')     # Only this UserId may sign on, if set
+STUB_DNA_PASSWORD = os.getenv('STUB_DNA_PASSWORD')   # Only this Password is accepted, if set
+STUB_DNA_TICKET_TTL = float(os.getenv('STUB_DNA_TICKET_TTL', 0))   # Seconds a WhoIs password stays valid (0 = until restart)
+STUB_DNA_MISSING_RATE = float(os.getenv('STUB_DNA_MISSING_RATE', 0.02))   # Share of member numbers answered as not found
+STUB_DNA_ACCOUNTS_PER_MEMBER = int(os.getenv('STUB_DNA_ACCOUNTS_PER_MEMBER', 3))   # Average accounts per synthetic member
+STUB_DNA_BULK_EXTRA = float(os.getenv('STUB_DNA_BULK_EXTRA', 0.01))   # Seconds added per RequestBase beyond the first
+STUB_DNA_RECORDINGS = os.getenv('STUB_DNA_RECORDINGS')   # Directory of recorded responses, e.g. 7725-123456.xml
+
+
+def _local_name(tag):
+    return tag.rpartition('}')[2] if isinstance(tag, str) else ''
+
+
+def _child_text(elem, name):
+    for child in elem:
+        if _local_name(child.tag) == name:
+            return child.text
+    return None
+
+
+def _find_local(root, name):
+    return next((elem for elem in root.iter() if _local_name(elem.tag) == name), None)
+
+
+def _soap(body):
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+  <soap:Body>
+    {body}
+  </soap:Body>
+</soap:Envelope>"""
+
+
+def _soap_fault(message, status=500):
+    body = f"""<soap:Fault><faultcode>soap:Server</faultcode><faultstring>{html.escape(message)}</faultstring></soap:Fault>"""
+    return Response(_soap(body), status=status, content_type='text/xml; charset=utf-8')
+
+
+def _errors(message):
+    return f"""<a:Errors><a:Error><a:ErrorMessage>{html.escape(message)}</a:ErrorMessage></a:Error></a:Errors>"""
+
+
+class Recordings:
+    """
+    Recorded SubmitRequest answers in a directory, named {7711|7725|7703}-{key}.xml where key is the
+    member number (7711, 7725 Method 3), person number (7725 Method 4) or account number (7703).
+    A file holds either one ResponseBase element (written with the a: and i: prefixes the stub
+    declares) or a whole SubmitRequest response such as a DNA_response_logs/ dump, from which the
+    first ResponseBase of the matching type is used.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def get(self, code, key, response_type):
+        if not self.directory:
+            return None
+        name = f"{code}-{key}.xml"
+        with self._lock:
+            if name in self._cache:
+                return self._cache[name]
+        fragment = self._load(os.path.join(self.directory, name), response_type)
+        with self._lock:
+            self._cache[name] = fragment
+        return fragment
+
+    @staticmethod
+    def _load(path, response_type):
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as f:
+            content = f.read()
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError:
+            # A bare fragment using prefixes declared by the enclosing response; serve it as written
+            text = content.decode('utf-8')
+            return text.split('?>', 1)[1].strip() if text.lstrip().startswith('<?xml') else text.strip()
+        if _local_name(root.tag) == 'ResponseBase':
+            return ET.tostring(root, encoding='unicode')
+        for elem in root.iter():
+            if _local_name(elem.tag) == 'ResponseBase' and elem.get(_ATTR_XSI_TYPE) == response_type:
+                return ET.tostring(elem, encoding='unicode')
+        logger.warning(f"[STUB_DNA] No {response_type} in recording {path}; using synthetic data.")
+        return None
+
+
+class DNAStub:
+    """Answers DirectSignon, WhoIs and SubmitRequest (7711, 7725 Methods 3 and 4, 7703) like the DNA APIs."""
+
+    def __init__(self, behavior=None, recordings_dir=STUB_DNA_RECORDINGS, missing_rate=STUB_DNA_MISSING_RATE,
+                 accounts_per_member=STUB_DNA_ACCOUNTS_PER_MEMBER, ticket_ttl=STUB_DNA_TICKET_TTL,
+                 bulk_extra=STUB_DNA_BULK_EXTRA):
+        self.behavior = behavior or StubBehavior('STUB_DNA', OPERATIONS)
+        self.recordings = Recordings(recordings_dir)
+        self.missing_rate = missing_rate
+        self.accounts_per_member = accounts_per_member
+        self.ticket_ttl = ticket_ttl
+        self.bulk_extra = bulk_extra
+        self._lock = threading.Lock()
+        self._tickets = {}     # SSO ticket -> issue time
+        self._passwords = {}   # WhoIs result (SubmitRequest password) -> expiry (monotonic) or None
+
+    # --- Dispatch ---------------------------------------------------------
+
+    def handle(self, soap_action, content):
+        action = (soap_action or '').strip('"').rstrip('/').rpartition('/')[2]
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError as e:
+            return _soap_fault(f"Malformed request XML: {e}", status=400)
+
+        if action == 'DirectSignon':
+            operations, handler = ['signon'], self._direct_signon
+        elif action == 'WhoIs':
+            operations, handler = ['whois'], self._whois
+        elif action == 'SubmitRequest':
+            requests_ = self._read_requests(root)
+            operations = [REQUEST_TYPES[request_type] for request_type, _, _ in requests_ if request_type in REQUEST_TYPES]
+            handler = lambda root: self._submit_request(root, requests_)
+        else:
+            return _soap_fault(f"Unsupported SOAPAction: {soap_action}", status=400)
+
+        with self.behavior.call(operations, extra_seconds=self.bulk_extra * max(0, len(operations) - 1)) as call:
+            outcome = self.behavior.outcome()
+            if outcome == 'error':
+                return Response('Service Unavailable', status=503, content_type='text/plain')
+            if outcome == 'fault':
+                return _soap_fault('Injected stub fault')
+            if outcome == 'hang':
+                call.hang()
+            return handler(root)
+
+    # --- Authentication ---------------------------------------------------
+
+    def _direct_signon(self, root):
+        inner = self._inner_request(root, 'DirectSignon')
+        if inner is None:
+            return _soap_fault('DirectSignon without a readable xmlRequest', status=400)
+        user_id = _child_text(inner, 'UserId')
+        password = _child_text(inner, 'Password')
+        if ((STUB_DNA_USER_ID and user_id != STUB_DNA_USER_ID) or (STUB_DNA_PASSWORD and password != STUB_DNA_PASSWORD)
+                or not user_id or not password):
+            sso_response = "<DirectSSOResponse><Errors><Error>Invalid credentials</Error></Errors></DirectSSOResponse>"
+        else:
+            ticket = uuid.uuid4().hex
+            with self._lock:
+                self._tickets[ticket] = time.time()
+            sso_response = f"<DirectSSOResponse><SSOTicket>{ticket}</SSOTicket></DirectSSOResponse>"
+        body = f"""<DirectSignonResponse xmlns="{NS_PIE}"><DirectSignonResult>{html.escape(sso_response)}</DirectSignonResult></DirectSignonResponse>"""
+        return Response(_soap(body), content_type='text/xml; charset=utf-8')
+
+    def _whois(self, root):
+        inner = self._inner_request(root, 'WhoIs')
+        ticket = None
+        if inner is not None:
+            ticket = _child_text(inner, 'LookupSSOTicket') or inner.get('SSOTicket')
+        with self._lock:
+            known = ticket in self._tickets
+            if known:
+                password = f"stub-{uuid.uuid4().hex}"
+                self._passwords[password] = time.monotonic() + self.ticket_ttl if self.ticket_ttl > 0 else None
+        if not known:
+            return _soap_fault('Unknown SSO ticket')
+        body = f"""<WhoIsResponse xmlns="{NS_PIE}"><WhoIsResult>{html.escape(password)}</WhoIsResult></WhoIsResponse>"""
+        return Response(_soap(body), content_type='text/xml; charset=utf-8')
+
+    @staticmethod
+    def _inner_request(root, operation):
+        """Parses the escaped XML document a PIE call carries in its xmlRequest element."""
+        xml_request = _find_local(root, 'xmlRequest')
+        if xml_request is None or not xml_request.text:
+            return None
+        try:
+            return ET.fromstring(xml_request.text.strip().encode('utf-8'))
+        except ET.ParseError as e:
+            logger.warning(f"[STUB_DNA] Unreadable {operation} xmlRequest: {e}")
+            return None
+
+    def _password_valid(self, password):
+        with self._lock:
+            if password not in self._passwords:
+                return False
+            expires = self._passwords[password]
+            if expires is not None and time.monotonic() > expires:
+                del self._passwords[password]
+                return False
+            return True
+
+    # --- SubmitRequest ----------------------------------------------------
+
+    @staticmethod
+    def _read_requests(root):
+        """Returns (i:type, {local name: text}, Person memberNbr) for each RequestBase in the envelope."""
+        requests_ = []
+        for elem in root.iter():
+            if _local_name(elem.tag) != 'RequestBase':
+                continue
+            fields = {}
+            member_nbr = None
+            for child in elem:
+                name = _local_name(child.tag)
+                if name == 'Person':
+                    member_nbr = child.get('memberNbr')
+                elif child.text is not None:
+                    fields[name] = child.text.strip()
+            requests_.append((elem.get(_ATTR_XSI_TYPE), fields, member_nbr))
+        return requests_
+
+    def _submit_request(self, root, requests_):
+        user_auth = _find_local(root, 'UserAuthentication')
+        password = _child_text(user_auth, 'Password') if user_auth is not None else None
+        if not self._password_valid(password):
+            return self._submit_response('', auth_error='Invalid or expired credentials')
+
+        fragments = []
+        for request_type, fields, member_nbr in requests_:
+            if request_type == 'PersonDetailInquiryRequest':
+                fragments.append(self._person_detail(member_nbr))
+            elif request_type == 'GetTaxIdDataRequest':
+                fragments.append(self._taxid_data(fields.get('MethodNumber'), fields.get('ReferenceNumber')))
+            elif request_type == 'AccountTransactionHistoryRequest':
+                fragments.append(self._transaction_history(fields))
+            else:
+                logger.warning(f"[STUB_DNA] Unsupported RequestBase type {request_type}; skipped.")
+        return self._submit_response(''.join(fragments))
+
+    @staticmethod
+    def _submit_response(responses, auth_error=None):
+        if auth_error:
+            user_auth = f"""<UserAuthentication><Errors><Error><ErrorMessage>{html.escape(auth_error)}</ErrorMessage></Error></Errors><WasSuccessful>false</WasSuccessful></UserAuthentication>"""
+        else:
+            user_auth = "<UserAuthentication><Errors /><WasSuccessful>true</WasSuccessful></UserAuthentication>"
+        content = f"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body>
+    <SubmitRequestResponse xmlns="{NS_CORE}">
+      <SubmitRequestResult xmlns:a="{NS_MESSAGES}" xmlns:i="{NS_XSI}">
+        <Responses>{responses}</Responses>
+        {user_auth}
+      </SubmitRequestResult>
+    </SubmitRequestResponse>
+  </s:Body>
+</s:Envelope>"""
+        return Response(content, content_type='text/xml; charset=utf-8')
+
+    def _person_detail(self, member_number):
+        """7711: the person number of a member."""
+        recorded = self.recordings.get('7711', member_number, 'PersonDetailInquiryResponse')
+        if recorded is not None:
+            return recorded
+        if not member_number or synthetic.is_missing(member_number, self.missing_rate):
+            return f"""<ResponseBase i:type="PersonDetailInquiryResponse">{_errors(f"No person found for member number {member_number}")}<a:WasSuccessful>false</a:WasSuccessful></ResponseBase>"""
+        return f"""<ResponseBase i:type="PersonDetailInquiryResponse"><a:Errors /><a:WasSuccessful>true</a:WasSuccessful><a:Person persNbr="{synthetic.person_number(member_number)}" memberNbr="{html.escape(member_number)}" /></ResponseBase>"""
+
+    def _taxid_data(self, method, reference):
+        """7725: member, contact details and accounts by member number (Method 3) or person number (Method 4)."""
+        reference = reference or ''
+        recorded = self.recordings.get('7725', reference, 'GetTaxIdDataResponse')
+        if recorded is not None:
+            return recorded
+        member_number = synthetic.member_number_for_person(reference) if method == '4' else reference
+        head = f"""<ResponseBase i:type="GetTaxIdDataResponse"><a:ReferenceNumber>{html.escape(reference)}</a:ReferenceNumber>"""
+        if not member_number or synthetic.is_missing(member_number, self.missing_rate):
+            return f"""{head}{_errors(f"No records found for {reference}")}<a:WasSuccessful>false</a:WasSuccessful></ResponseBase>"""
+
+        member = synthetic.member(member_number, self.accounts_per_member)
+        person_fields = ''.join(f"<{name}>{html.escape(member[name])}</{name}>" for name in (
+            'PersonNumber', 'FirstName', 'LastName', 'IsDeceased', 'LastUpdated', 'DateBirth', 'AddDate', 'MemberGroup',
+            'MemberNumber', 'TaxId'))
+        area_code, exchange, number = member['phone']
+        person_types = "<PersonType><PersonTypeCode>EMP</PersonTypeCode></PersonType>" if member['is_employee'] else ''
+        accounts = ''.join(
+            "<AccountTaxIdData>" + ''.join(f"<{name}>{html.escape(value)}</{name}>" for name, value in account.items())
+            + "</AccountTaxIdData>" for account in member['accounts'])
+        return f"""{head}<a:Errors /><a:WasSuccessful>true</a:WasSuccessful>
+<Person>{person_fields}
+<EmailAddresses><EmailAddress><Email>{html.escape(member['email'])}</Email></EmailAddress></EmailAddresses>
+<PersonPhones><GetTaxIdDataPhone><UsageCode>CELL</UsageCode><AreaCode>{area_code}</AreaCode><Exchange>{exchange}</Exchange><Number>{number}</Number></GetTaxIdDataPhone></PersonPhones>
+<PersonAddresses><GetTaxIdDataPersonOrganizationAddress><AddressLines><GetTaxIdDataAddressLine><AddressLineText>{html.escape(member['address_line'])}</AddressLineText></GetTaxIdDataAddressLine></AddressLines><CityName>{member['city']}</CityName><State>{member['state']}</State><ZipCode>{member['zip_code']}</ZipCode></GetTaxIdDataPersonOrganizationAddress></PersonAddresses>
+<PersonTypes>{person_types}</PersonTypes>
+</Person>
+<Accounts>{accounts}</Accounts></ResponseBase>"""
+
+    def _transaction_history(self, fields):
+        """7703: the newest MaxReturnCount transactions of an account."""
+        account_number = fields.get('AccountNumber') or fields.get('ReferenceNumber') or ''
+        recorded = self.recordings.get('7703', account_number, 'AccountTransactionHistoryResponse')
+        if recorded is not None:
+            return recorded
+        reference = html.escape(fields.get('ReferenceNumber') or account_number)
+        try:
+            limit = int(fields.get('MaxReturnCount') or 10)
+        except ValueError:
+            limit = 10
+        if not account_number:
+            return f"""<ResponseBase i:type="AccountTransactionHistoryResponse"><a:ReferenceNumber>{reference}</a:ReferenceNumber>{_errors("AccountNumber is required")}<a:WasSuccessful>false</a:WasSuccessful></ResponseBase>"""
+        rtxns = ''.join(
+            "<a:Rtxn>" + ''.join(f"<a:{name}>{html.escape(value)}</a:{name}>" for name, value in transaction.items()) + "</a:Rtxn>"
+            for transaction in synthetic.transactions(account_number, limit))
+        return f"""<ResponseBase i:type="AccountTransactionHistoryResponse"><a:ReferenceNumber>{reference}</a:ReferenceNumber><a:Errors /><a:WasSuccessful>true</a:WasSuccessful><a:Rtxns>{rtxns}</a:Rtxns></ResponseBase>"""
+
+
+def create_app(stub=None):
+    """Flask app serving the PIE (sign-on) and CoreApi (SubmitRequest) endpoints plus /stub/stats and /stub/config."""
+    stub = stub or DNAStub()
+    app = Flask(__name__)
+    app.config['DNA_STUB'] = stub
+
+    @app.route(PIE_PATH, methods=['POST'])
+    @app.route(DNA_PATH, methods=['POST'])
+    def soap_endpoint():
+        return stub.handle(request.headers.get('SOAPAction'), request.get_data())
+
+    register_control_routes(app, stub.behavior)
+    return app
+
@@ -0,0 +1,145 @@
+import html
+import logging
+import os
+import threading
+import xml.etree.ElementTree as ET
+
+from flask import Flask, Response, request
+
+from stub_servers import synthetic
+from stub_servers.behavior import StubBehavior, register_control_routes
+
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PATH = '/services/search.aspx'
+GET_LOAN_PATH = '/services/getloan.aspx'
+NS_CLF = 'http://www.meridianlink.com/CLF'
+OPERATIONS = ('search', 'get_loan')
+
+STUB_ML_USER_ID = os.getenv('STUB_ML_USER_ID')     # Only this api_user_id is accepted, if set
+STUB_ML_PASSWORD = os.getenv('STUB_ML_PASSWORD')   # Only this api_password is accepted, if set
+STUB_ML_RECORDINGS = os.getenv('STUB_ML_RECORDINGS')   # Directory of recorded responses: search-{ssn}.xml, loan-{loan_id}.xml
+
+
+def _attributes(values):
+    return ' '.join(f'{name}="{html.escape(str(value))}"' for name, value in values.items())
+
+
+def _error(message, status=200):
+    content = f"""<?xml version="1.0" encoding="utf-8"?>
+<OUTPUT version="1.0"><ERROR type="VALIDATION">{html.escape(message)}</ERROR></OUTPUT>"""
+    return Response(content, status=status, content_type='application/xml')
+
+
+class MeridianLinkStub:
+    """Answers the MeridianLink SEARCH_QUERY and GET_LOAN XML calls with recorded or synthetic loans."""
+
+    def __init__(self, behavior=None, recordings_dir=STUB_ML_RECORDINGS):
+        self.behavior = behavior or StubBehavior('STUB_ML', OPERATIONS)
+        self.recordings_dir = recordings_dir
+        self._lock = threading.Lock()
+        self._recorded = {}
+
+    def handle(self, operation, content):
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError as e:
+            return _error(f"Malformed request XML: {e}", status=400)
+
+        with self.behavior.call([operation]) as call:
+            outcome = self.behavior.outcome()
+            if outcome == 'error':
+                return Response('Service Unavailable', status=503, content_type='text/plain')
+            if outcome == 'fault':
+                return _error('Injected stub fault', status=500)
+            if outcome == 'hang':
+                call.hang()
+
+            login = root.find('.//LOGIN')
+            if login is None or not self._login_valid(login):
+                return _error('Invalid api_user_id or api_password')
+            if operation == 'search':
+                return self._search(root)
+            return self._get_loan(root)
+
+    @staticmethod
+    def _login_valid(login):
+        user_id = login.get('api_user_id')
+        password = login.get('api_password')
+        if STUB_ML_USER_ID and user_id != STUB_ML_USER_ID:
+            return False
+        if STUB_ML_PASSWORD and password != STUB_ML_PASSWORD:
+            return False
+        return bool(user_id and password)
+
+    def _recording(self, name):
+        if not self.recordings_dir:
+            return None
+        with self._lock:
+            if name in self._recorded:
+                return self._recorded[name]
+        path = os.path.join(self.recordings_dir, name)
+        content = None
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                content = f.read()
+        with self._lock:
+            self._recorded[name] = content
+        return content
+
+    def _search(self, root):
+        query = root.find('.//SEARCH_QUERY')
+        ssn = query.get('borrower_ssn') if query is not None else None
+        if not ssn:
+            return _error('SEARCH_QUERY requires borrower_ssn')
+        recorded = self._recording(f"search-{ssn}.xml")
+        if recorded is not None:
+            return Response(recorded, content_type='application/xml')
+        loans = ''.join(f"<LOAN {_attributes(loan)} />" for loan in synthetic.loans(ssn))
+        content = f"""<?xml version="1.0" encoding="utf-8"?>
+<OUTPUT version="1.0"><RESPONSE><SEARCH_RESULTS>{loans}</SEARCH_RESULTS></RESPONSE></OUTPUT>"""
+        return Response(content, content_type='application/xml')
+
+    def _get_loan(self, root):
+        loan = root.find('.//REQUEST/LOAN')
+        loan_id = loan.get('loan_id') if loan is not None else None
+        if not loan_id:
+            return _error('LOAN requires loan_id')
+        recorded = self._recording(f"loan-{loan_id}.xml")
+        if recorded is not None:
+            return Response(recorded, content_type='application/xml')
+
+        details = synthetic.loan_details(loan_id)
+        loan_type = details['loan_type']
+        if loan_type == 'PL':
+            body = f"""<PERSONAL_LOAN><APPLICANTS><APPLICANT credit_score="{details['credit_score']}" /></APPLICANTS>
+<FUNDING funding_date="{details['funding_date']}" amount_advanced="{details['amount_advanced']}" /></PERSONAL_LOAN>"""
+        elif loan_type == 'VL':
+            body = f"""<VEHICLE_LOAN><VEHICLES><VEHICLE vehicle_value="{details['vehicle_value']}"><INSURANCE policy_number="{details['policy_number']}" /></VEHICLE></VEHICLES>
+<CONTACTS><CONTACT_INFO contact_type="INSAGENT" company_name="{html.escape(details['insurance_company'])}" /></CONTACTS></VEHICLE_LOAN>"""
+        else:
+            body = f"""<XPRESS_LOAN><APPROVED_ACCOUNTS><ACCOUNT_TYPE account_name="{html.escape(details['account_name'])}" amount_deposit="{details['amount_deposit']}" rate="{details['rate']}" /></APPROVED_ACCOUNTS></XPRESS_LOAN>"""
+        content = f"""<?xml version="1.0" encoding="utf-8"?>
+<OUTPUT version="1.0"><RESPONSE loan_id="{html.escape(loan_id)}"><LOAN_DATA loan_number="{details['loan_number']}" loan_type="{loan_type}">
+<LOAN xmlns="{NS_CLF}">{body}</LOAN>
+</LOAN_DATA></RESPONSE></OUTPUT>"""
+        return Response(content, content_type='application/xml')
+
+
+def create_app(stub=None):
+    """Flask app serving the SEARCH_QUERY and GET_LOAN endpoints plus /stub/stats and /stub/config."""
+    stub = stub or MeridianLinkStub()
+    app = Flask(__name__)
+    app.config['ML_STUB'] = stub
+
+    @app.route(SEARCH_PATH, methods=['POST'])
+    def search():
+        return stub.handle('search', request.get_data())
+
+    @app.route(GET_LOAN_PATH, methods=['POST'])
+    def get_loan():
+        return stub.handle('get_loan', request.get_data())
+
+    register_control_routes(app, stub.behavior)
+    return app
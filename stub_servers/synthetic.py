@@ -0,0 +1,179 @@
+import random
+from datetime import date, datetime, timedelta
+
+
+# Deterministic stand-in data: the same member number, account or SSN always yields the same record,
+# so repeated runs and concurrent clients see consistent answers without any stored state.
+
+FIRST_NAMES = ('James', 'Maria', 'Robert', 'Linda', 'David', 'Patricia', 'Michael', 'Jennifer', 'Daniel', 'Elizabeth',
+               'Joseph', 'Susan', 'Thomas', 'Karen', 'Carlos', 'Nancy', 'Kevin', 'Lisa', 'Brian', 'Angela')
+LAST_NAMES = ('Smith', 'Johnson', 'Garcia', 'Brown', 'Miller', 'Davis', 'Martinez', 'Wilson', 'Anderson', 'Taylor',
+              'Thomas', 'Moore', 'Jackson', 'Martin', 'Lee', 'Perez', 'White', 'Harris', 'Clark', 'Lewis')
+STREETS = ('Main St', 'Oak Ave', 'Maple Dr', 'Cedar Ln', 'Park Blvd', 'Lakeview Rd', 'Hillcrest Way', 'River Rd')
+CITIES = (('Springfield', 'IL', '62701'), ('Madison', 'WI', '53703'), ('Columbus', 'OH', '43215'),
+          ('Fairview', 'TN', '37062'), ('Riverside', 'CA', '92501'), ('Franklin', 'MA', '02038'))
+# (major type, minor product code, balance range)
+ACCOUNT_TYPES = (('SAV', 'SHRS', (5, 25000)), ('CK', 'FCHK', (0, 8000)), ('CD', 'CD12', (1000, 50000)),
+                 ('CNS', 'AUTO', (2000, 35000)), ('MTG', 'FX30', (50000, 300000)), ('CML', 'LOC', (0, 20000)))
+# (RtxnTypeCode, description, source, sign)
+TRANSACTION_TYPES = (('DEP', 'Deposit', 'TELL', 1), ('WTH', 'Withdrawal', 'TELL', -1),
+                     ('POS', 'Debit Card Purchase', 'CARD', -1), ('ACH', 'ACH Payroll Deposit', 'ACH', 1),
+                     ('ACHD', 'ACH Debit', 'ACH', -1), ('XFR', 'Online Transfer', 'HOME', -1),
+                     ('DIV', 'Dividend', 'SYS', 1), ('FEE', 'Service Fee', 'SYS', -1))
+LOAN_TYPES = ('PL', 'VL', 'XA')
+LOAN_STATUSES = ('APPROVED', 'FUNDED', 'PENDING', 'DECLINED', 'BOOKED')
+
+
+def _rng(*parts):
+    return random.Random(':'.join(str(part) for part in parts))
+
+
+def _money(value):
+    return f"{value:.2f}"
+
+
+def is_missing(key, missing_rate):
+    """True for the share missing_rate of keys (stable per key): these are answered as not found."""
+    return missing_rate > 0 and _rng('missing', key).random() < missing_rate
+
+
+def person_number(member_number):
+    return f"8{member_number}"
+
+
+def member_number_for_person(persnbr):
+    persnbr = str(persnbr)
+    return persnbr[1:] if persnbr.startswith('8') and len(persnbr) > 1 else None
+
+
+def member(member_number, accounts_per_member=3):
+    """Returns a member record: person fields, address, contact details and accounts."""
+    member_number = str(member_number)
+    rng = _rng('member', member_number)
+    today = date.today()
+    birth = today - timedelta(days=rng.randint(18 * 365, 85 * 365))
+    added = today - timedelta(days=rng.randint(30, 20 * 365))
+    city, state, zip_code = rng.choice(CITIES)
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES)
+    accounts = []
+    for index in range(max(1, rng.randint(1, accounts_per_member * 2 - 1))):
+        major, minor, (low, high) = ACCOUNT_TYPES[0] if index == 0 else rng.choice(ACCOUNT_TYPES)
+        balance = rng.uniform(low, high)
+        accounts.append({
+            'AccountNumber': f"{member_number}{index + 1:02d}",
+            'MajorAccountTypeCode': major,
+            'CurrentMinorAccountTypeCode': minor,
+            'BalanceAmount': _money(balance),
+            'AvailableBalance': _money(balance if major in ('SAV', 'CK') else 0),
+            'DateAccountOpened': (added + timedelta(days=rng.randint(0, max(0, (today - added).days)))).isoformat() + 'T00:00:00',
+            'CurrentAccountStatusCode': 'ACT' if rng.random() > 0.1 else 'CLS',
+        })
+    return {
+        'PersonNumber': person_number(member_number),
+        'MemberNumber': member_number,
+        'FirstName': first,
+        'LastName': last,
+        'TaxId': f"9{rng.randint(0, 99999999):08d}",
+        'DateBirth': birth.isoformat() + 'T00:00:00',
+        'AddDate': added.isoformat() + 'T00:00:00',
+        'LastUpdated': (today - timedelta(days=rng.randint(0, 365))).isoformat() + 'T00:00:00',
+        'IsDeceased': 'false',
+        'MemberGroup': 'Live' if rng.random() > 0.05 else 'Closed',
+        'is_employee': rng.random() < 0.05,
+        'email': f"{first.lower()}.{last.lower()}{member_number[-3:]}@example.com",
+        'phone': (f"{rng.randint(200, 989)}", f"{rng.randint(200, 999)}", f"{rng.randint(0, 9999):04d}"),
+        'address_line': f"{rng.randint(10, 9999)} {rng.choice(STREETS)}",
+        'city': city,
+        'state': state,
+        'zip_code': zip_code,
+        'accounts': accounts,
+    }
+
+
+def transactions(account_number, limit=10):
+    """
+    Returns up to limit transactions for an account, newest first. Transaction n of an account is
+    fixed (it posts on day n counted from a per-account start date), so a later call returns the same
+    history plus whatever "posted" since, just as the incremental refresh expects.
+    """
+    account_number = str(account_number)
+    rng = _rng('account', account_number)
+    start = date.today() - timedelta(days=rng.randint(60, 400))
+    per_day = rng.choice((1, 1, 2, 3))
+    today_index = (date.today() - start).days
+    result = []
+    day = today_index
+    while day >= 0 and len(result) < limit:
+        for slot in reversed(range(per_day)):
+            tx_rng = _rng('txn', account_number, day, slot)
+            if tx_rng.random() < 0.4:
+                continue   # no transaction in this slot
+            code, description, source, sign = tx_rng.choice(TRANSACTION_TYPES)
+            posted = datetime.combine(start + timedelta(days=day), datetime.min.time()) + timedelta(
+                seconds=8 * 3600 + slot * 4 * 3600 + tx_rng.randint(0, 4 * 3600 - 1))
+            result.append({
+                'ActivityDateTime': posted.isoformat(timespec='milliseconds'),
+                'TransactionAmount': _money(sign * tx_rng.uniform(1, 1500)),
+                'RtxnTypeCode': code,
+                'ExternalRtxnDescription': description if tx_rng.random() > 0.2 else '',
+                'RtxnDescription': description,
+                'RtxnSourceCd': source,
+            })
+            if len(result) >= limit:
+                break
+        day -= 1
+    return result
+
+
+def loan_type_for(loan_id):
+    return LOAN_TYPES[sum(map(ord, str(loan_id))) % len(LOAN_TYPES)]
+
+
+def loans(ssn):
+    """Returns the MeridianLink search results (LOAN attributes) for an SSN, possibly none."""
+    ssn = str(ssn)
+    rng = _rng('loans', ssn)
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES)
+    result = []
+    for index in range(rng.choice((0, 1, 1, 2, 3))):
+        created = date.today() - timedelta(days=rng.randint(1, 900))
+        status = rng.choice(LOAN_STATUSES)
+        approved = created + timedelta(days=rng.randint(0, 5))
+        loan_id = f"{ssn[-4:]}{index + 1:02d}{rng.randint(1000, 9999)}"
+        result.append({
+            'loan_type': loan_type_for(loan_id),
+            'loan_id': loan_id,
+            'loan_num': f"L{loan_id}",
+            'loan_status': status,
+            'approval_date': approved.isoformat() if status != 'PENDING' else '',
+            'borrower_fname': first,
+            'borrower_mname': '',
+            'borrower_lname': last,
+            'create_date': created.isoformat(),
+            'last_modified_date': (created + timedelta(days=rng.randint(0, 30))).isoformat(),
+            'booking_date': (approved + timedelta(days=rng.randint(1, 10))).isoformat() if status in ('FUNDED', 'BOOKED') else '',
+        })
+    return result
+
+
+def loan_details(loan_id, loan_type=None):
+    """Returns the GET_LOAN details for a loan id; loan_type is taken from the id when not given."""
+    loan_id = str(loan_id)
+    rng = _rng('loan', loan_id)
+    loan_type = loan_type or loan_type_for(loan_id)
+    details = {'loan_number': f"L{loan_id}", 'loan_type': loan_type}
+    if loan_type == 'PL':
+        details.update({'credit_score': str(rng.randint(560, 830)),
+                        'funding_date': (date.today() - timedelta(days=rng.randint(1, 600))).isoformat(),
+                        'amount_advanced': _money(rng.uniform(1000, 25000))})
+    elif loan_type == 'VL':
+        details.update({'vehicle_value': _money(rng.uniform(8000, 60000)),
+                        'policy_number': f"POL{rng.randint(100000, 999999)}",
+                        'insurance_company': rng.choice(('Acme Mutual', 'Lakeside Insurance', 'Summit Auto Insurance'))})
+    else:
+        details.update({'account_name': rng.choice(('Share Savings', 'Free Checking', '12 Month Certificate')),
+                        'amount_deposit': _money(rng.uniform(5, 5000)),
+                        'rate': f"{rng.uniform(0.05, 4.5):.2f}"})
+    return details
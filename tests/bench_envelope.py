@@ -0,0 +1,45 @@
+"""
+Micro-benchmark of the DNA SubmitRequest envelope: the per-call f-string builder against
+DNAApiClient._prepare_submit_request_envelope, which splices the body between pre-rendered segments.
+
+    python tests/bench_envelope.py [--batch 25] [--number 20000]
+
+Builds the envelope around one 7725 RequestBase and around --batch of them (as get_member_info_bulk
+sends), best of five runs. Both builders must produce identical bytes before anything is timed.
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dna_client import DNAApiClient  # noqa: E402
+from test_envelope import authenticate, legacy_prepare_submit_request_envelope  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batch', type=int, default=25, help="RequestBase elements in the batched request")
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    client = authenticate(DNAApiClient(logging.getLogger('bench'), verify_ssl=True))
+    bodies = (('single', client._prepare_member_info_request('600100')),
+              (f'batch of {args.batch}', "".join(client._prepare_member_info_request(f'6{i:05}')
+                                                 for i in range(args.batch))))
+
+    for label, body in bodies:
+        envelope = client._prepare_submit_request_envelope(body)
+        assert envelope == legacy_prepare_submit_request_envelope(client, body)
+        print(f"{label}: {len(envelope)} bytes")
+        for name, build in (('f-string per call', lambda: legacy_prepare_submit_request_envelope(client, body)),
+                            ('pre-rendered', lambda: client._prepare_submit_request_envelope(body))):
+            seconds = min(timeit.repeat(build, number=args.number, repeat=5)) / args.number
+            print(f"  {name:18} {seconds * 1e6:8.2f} us/request")
+
+
+if __name__ == '__main__':
+    main()
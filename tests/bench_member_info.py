@@ -0,0 +1,43 @@
+"""
+Micro-benchmark of 7725 (GetTaxIdData) member info parsing: the prefix-by-prefix parser against
+DNAApiClient.parse_member_info.
+
+    python tests/bench_member_info.py [--accounts 8] [--number 2000]
+
+Parses one stub_servers member response (--accounts is the stub's average per member), best of five runs.
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dna_client import DNAApiClient  # noqa: E402
+from stub_servers.dna import DNAStub  # noqa: E402
+from test_member_info_parser import legacy_parse_member_info  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=8, help="average accounts per synthetic member")
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    client = DNAApiClient(logging.getLogger('bench'), verify_ssl=True)
+    stub = DNAStub(recordings_dir=None, missing_rate=0, accounts_per_member=args.accounts)
+    content = stub._submit_response(stub._taxid_data('3', '600100')).get_data()
+    member = client.parse_member_info(content)
+    assert member and member == legacy_parse_member_info(client, content)
+
+    print(f"member with {len(member['accounts'])} accounts, {len(content)} bytes")
+    for name, parse in (('prefix-by-prefix', lambda: legacy_parse_member_info(client, content)),
+                        ('single pass', lambda: client.parse_member_info(content))):
+        seconds = min(timeit.repeat(parse, number=args.number, repeat=5)) / args.number
+        print(f"  {name:18} {seconds * 1e6:8.1f} us/response")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Seeded benchmark of migration 0001 (Status backfill and indexes) against a scratch copy of the kiosk table.
+
+    python tests/bench_migration.py [--rows 3000000] [--sql migrations/0001_normalize_kiosk_status.sql] [--keep]
+
+Needs the DB_* settings used by the app. Seeds --rows check-ins into a new table (a few percent with NULL or
+mis-cased statuses), runs each GO batch of the migration in autocommit mode as migrate.py does, and prints
+the time per batch. Pass another --sql file (e.g. an older version from git show) to compare the two.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import migrate  # noqa: E402
+
+SCRATCH_TABLE = 'BenchFacingMembers'
+
+# Rows are generated server-side from a numbers CTE; every 50th row gets a NULL or mis-cased status
+SEED_SQL = f"""
+WITH n AS (
+    SELECT TOP (?) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS i
+    FROM sys.all_objects a CROSS JOIN sys.all_objects b CROSS JOIN sys.all_objects c
+)
+INSERT INTO {SCRATCH_TABLE} (Name, HelpTopic, SubIssue, CreatedDate, UpdatedDate, Status, MemberNumber)
+SELECT CONCAT('Member ', i), 'Loans', 'Auto', DATEADD(MINUTE, -i, GETDATE()), DATEADD(MINUTE, 5 - i, GETDATE()),
+       CASE i % 50 WHEN 0 THEN NULL WHEN 1 THEN 'WAITING' WHEN 2 THEN 'handled ' WHEN 3 THEN 'Waiting'
+                   ELSE 'Handled' END,
+       CAST(100000 + i % 90000 AS NVARCHAR(20))
+FROM n
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=3_000_000)
+    parser.add_argument('--sql', default=os.path.join(migrate.MIGRATIONS_DIR, '0001_normalize_kiosk_status.sql'))
+    parser.add_argument('--keep', action='store_true', help="leave the scratch table in place")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with open(args.sql, 'r', encoding='utf-8') as f:
+        batches = migrate.load_batches(f.read().replace('{table}', SCRATCH_TABLE))
+
+    conn = database.create_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"IF OBJECT_ID('{SCRATCH_TABLE}') IS NOT NULL DROP TABLE {SCRATCH_TABLE}")
+        cursor.execute(f"""
+            CREATE TABLE {SCRATCH_TABLE} (
+                FacingMemberID INT IDENTITY(1,1) NOT NULL PRIMARY KEY CLUSTERED,
+                Name NVARCHAR(100) NULL,
+                HelpTopic NVARCHAR(100) NULL,
+                SubIssue NVARCHAR(100) NULL,
+                CreatedDate DATETIME NOT NULL,
+                UpdatedDate DATETIME NULL,
+                Status NVARCHAR(20) NULL,
+                MemberNumber NVARCHAR(20) NULL
+            )
+        """)
+        started = time.perf_counter()
+        cursor.execute(SEED_SQL, args.rows)
+        print(f"seeded {args.rows} rows in {time.perf_counter() - started:.1f} s")
+
+        total = 0.0
+        for number, batch in enumerate(batches, 1):
+            started = time.perf_counter()
+            cursor.execute(batch)
+            while cursor.nextset():  # drain the row counts of every statement in the batch
+                pass
+            seconds = time.perf_counter() - started
+            total += seconds
+            step = next(line for line in batch.splitlines() if not line.lstrip().startswith('--'))
+            print(f"  batch {number}: {seconds:8.2f} s  {step.strip()[:60]}")
+        print(f"  total:   {total:8.2f} s")
+
+        cursor.execute(f"SELECT COUNT(*) FROM {SCRATCH_TABLE} "
+                       f"WHERE Status IS NULL OR Status COLLATE Latin1_General_BIN NOT IN ('Waiting', 'Handled')")
+        assert cursor.fetchone()[0] == 0, "backfill left non-canonical statuses"
+    finally:
+        if not args.keep:
+            cursor.execute(f"IF OBJECT_ID('{SCRATCH_TABLE}') IS NOT NULL DROP TABLE {SCRATCH_TABLE}")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark of cached transaction records: legacy dicts against transactions.Transaction.
+
+    python tests/bench_transactions.py [--count 50000]
+
+Reports memory per cached transaction, the 30-day filter run on every insight request (strptime on
+dict dates against comparing parsed dates, as in app.filter_recent_transactions) and to_dict() cost.
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dna_client import DNAApiClient  # noqa: E402
+from stub_servers import synthetic  # noqa: E402
+from test_transactions import legacy_transaction_dict  # noqa: E402
+
+
+def legacy_filter(transactions, days=30):
+    cutoff_date = datetime.now() - timedelta(days=days)
+    recent = []
+    for tx in transactions:
+        tx_date_str = tx.get('date', '')
+        if tx_date_str:
+            try:
+                if datetime.strptime(tx_date_str, '%Y-%m-%d') >= cutoff_date:
+                    recent.append(tx)
+            except ValueError:
+                recent.append(tx)
+        else:
+            recent.append(tx)
+    return recent
+
+
+def record_filter(transactions, days=30):
+    cutoff = datetime.now() - timedelta(days=days)
+    first_day = cutoff.date()
+    if cutoff.time() != datetime.min.time():
+        first_day += timedelta(days=1)
+    return [tx for tx in transactions if tx.date is None or tx.date >= first_day]
+
+
+def build(count, make):
+    """Builds count records with make(fields), returning (records, bytes allocated per record)."""
+    fields = []
+    account = 400000
+    while len(fields) < count:
+        fields.extend(synthetic.transactions(account, 50))
+        account += 1
+    fields = fields[:count]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [make(txn_fields) for txn_fields in fields]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return records, used / count
+
+
+def best_ms(func, repeat=5):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=50000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    client = DNAApiClient(logging.getLogger('bench'), verify_ssl=True)
+    descriptions = client.transaction_type_descriptions
+    dicts, dict_bytes = build(args.count, lambda fields: legacy_transaction_dict(fields, descriptions))
+    records, record_bytes = build(args.count, client._transaction_from_fields)
+    assert [tx.to_dict() for tx in records] == dicts
+
+    print(f"{args.count} transactions")
+    print(f"  memory per transaction   dict {dict_bytes:8.0f} B    Transaction {record_bytes:8.0f} B")
+    print(f"  30-day filter            dict {best_ms(lambda: legacy_filter(dicts)):8.2f} ms   "
+          f"Transaction {best_ms(lambda: record_filter(records)):8.2f} ms")
+    print(f"  to_dict() for JSON                          "
+          f"Transaction {best_ms(lambda: [tx.to_dict() for tx in records]):8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+import logging
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture
+def dna():
+    """A DNAApiClient for parsing only; it is never authenticated and makes no calls."""
+    from dna_client import DNAApiClient
+    return DNAApiClient(logging.getLogger('tests.dna_client'), verify_ssl=True)
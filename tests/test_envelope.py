@@ -0,0 +1,69 @@
+"""
+The pre-rendered SubmitRequest envelope against the f-string the client built for every call before it:
+the encoded request must be byte-for-byte the same, for single and batched RequestBase bodies.
+"""
+import html
+
+import pytest
+
+
+def legacy_prepare_submit_request_envelope(client, request_body):
+    """The envelope DNAApiClient._prepare_submit_request_envelope built before pre-rendering, UTF-8 encoded."""
+    if not client.application_id or not client.ntwk_node_name or not client.whois_response:
+        return None
+
+    return f"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body>
+    <SubmitRequest xmlns="http://www.opensolutions.com/CoreApi">
+      <input xmlns:i="http://www.w3.org/2001/XMLSchema-instance">
+        <Input>
+          <ExtensionRequests i:nil="true" />
+          <Requests>
+            {request_body}
+          </Requests>
+          <UserAuthentication>
+            <ApplID>{html.escape(client.application_id)}</ApplID>
+            <ApplNumber>0</ApplNumber>
+            <AuthorizationType>SingleSignOn</AuthorizationType>
+            <NetworkNodeName>{html.escape(client.ntwk_node_name)}</NetworkNodeName>
+            <Password>{html.escape(client.whois_response)}</Password>
+          </UserAuthentication>
+        </Input>
+        <ShouldCommitOrRollback>false</ShouldCommitOrRollback>
+      </input>
+    </SubmitRequest>
+  </s:Body>
+</s:Envelope>""".encode('utf-8')
+
+
+def authenticate(client, ticket='T1cket&<"session">'):
+    client.application_id = 'Kiosk&Queue'
+    client.ntwk_node_name = 'node-<01>'
+    client.whois_response = ticket
+    return client
+
+
+@pytest.mark.parametrize('members', [['600100'], ['600100', '600101', '600102'], [f'7{i:05}' for i in range(50)]])
+def test_same_bytes_as_legacy_envelope(dna, members):
+    authenticate(dna)
+    body = "".join(dna._prepare_member_info_request(member) for member in members)
+    assert dna._prepare_submit_request_envelope(body) == legacy_prepare_submit_request_envelope(dna, body)
+
+
+def test_non_ascii_body(dna):
+    authenticate(dna, ticket='tïcket')
+    body = '<RequestBase><Name>Zoë Müller</Name></RequestBase>'
+    assert dna._prepare_submit_request_envelope(body) == legacy_prepare_submit_request_envelope(dna, body)
+
+
+def test_new_ticket_rerenders_the_envelope(dna):
+    authenticate(dna)
+    body = dna._prepare_person_number_request('600100')
+    dna._prepare_submit_request_envelope(body)
+    authenticate(dna, ticket='second-ticket')
+    assert dna._prepare_submit_request_envelope(body) == legacy_prepare_submit_request_envelope(dna, body)
+    assert b'second-ticket' in dna._prepare_submit_request_envelope(body)
+
+
+def test_missing_auth_details(dna):
+    assert dna._prepare_submit_request_envelope('<RequestBase />') is None
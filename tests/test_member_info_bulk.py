@@ -0,0 +1,58 @@
+"""
+get_member_info_bulk: a member DNA reported as not found maps to None, while members of a chunk that
+failed are left out of the result, so the prefetch retries them instead of recording a miss.
+"""
+import re
+
+import pytest
+
+from stub_servers.dna import DNAStub
+
+NOT_FOUND = '700102'
+FAILING_CHUNK_MEMBER = '700104'
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+
+
+@pytest.fixture
+def bulk_dna(dna):
+    found = DNAStub(recordings_dir=None, missing_rate=0)
+    missing = DNAStub(recordings_dir=None, missing_rate=1)
+    calls = []
+
+    def make_request(url, headers, data, idempotent=True, hedge=False):
+        chunk = re.findall(r'<ReferenceNumber>(\d+)</ReferenceNumber>', data)
+        calls.append(chunk)
+        if FAILING_CHUNK_MEMBER in chunk:
+            return None  # Timeout, HTTP error or open circuit: _make_request gives up with None
+        fragments = ''.join((missing if member_number == NOT_FOUND else found)._taxid_data('3', member_number)
+                            for member_number in chunk)
+        return _Response(found._submit_response(fragments).get_data())
+
+    dna.ensure_authentication = lambda: True
+    dna._prepare_submit_request_envelope = lambda body: body
+    dna._make_request = make_request
+    dna.calls = calls
+    return dna
+
+
+def test_failed_chunk_members_are_left_out(bulk_dna):
+    results = bulk_dna.get_member_info_bulk(['700101', '700102', '700103', '700104', '700105'], chunk_size=3)
+    assert bulk_dna.calls == [['700101', '700102', '700103'], ['700104', '700105']]
+    assert set(results) == {'700101', '700102', '700103'}
+    assert results['700101']['member_number'] == '700101'
+    assert results[NOT_FOUND] is None
+
+
+def test_every_chunk_failed(bulk_dna):
+    assert bulk_dna.get_member_info_bulk([FAILING_CHUNK_MEMBER, '700105'], chunk_size=5) is None
+
+
+def test_member_without_a_response_is_left_out(dna):
+    stub = DNAStub(recordings_dir=None, missing_rate=0)
+    content = stub._submit_response(stub._taxid_data('3', '700201')).get_data()
+    results = dna.parse_member_info_bulk(content, ['700201', '700202'])
+    assert set(results) == {'700201'}
@@ -0,0 +1,278 @@
+"""
+Parity of the single-pass, namespace-agnostic 7725 (GetTaxIdData) parser with the prefix-by-prefix
+parser it replaced, on recorded responses, stub_servers responses and randomized edge cases.
+"""
+import glob
+import os
+import random
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from stub_servers.dna import DNAStub
+
+RECORDINGS = sorted(glob.glob(os.path.join(os.path.dirname(__file__), 'recordings', '7725-*.xml')))
+
+NAMESPACES = {
+    's': 'http://schemas.xmlsoap.org/soap/envelope/',
+    'core': 'http://www.opensolutions.com/CoreApi',
+    'a': 'http://schemas.datacontract.org/2004/07/OpenSolutions.CoreApiService.Services.Messages',
+    'i': 'http://www.w3.org/2001/XMLSchema-instance',
+}
+
+
+# --- The parser as it was before the single-pass rewrite ---------------------------------------
+# Every field was looked up with the core: prefix, then with a:. An element found by find() only
+# counted when it had children (ElementTree truthiness), which _element() reproduces.
+
+def _text(element, name):
+    for prefix in ('core:', 'a:'):
+        found = element.find(prefix + name, NAMESPACES) if element is not None else None
+        if found is not None and found.text:
+            return found.text
+    return None
+
+
+def _element(element, name):
+    found = element.find('core:' + name, NAMESPACES)
+    if found is not None and len(found):
+        return found
+    return element.find('a:' + name, NAMESPACES)
+
+
+def _elements(element, name):
+    return element.findall('core:' + name, NAMESPACES) or element.findall('a:' + name, NAMESPACES)
+
+
+def legacy_parse_accounts(client, response_base):
+    accounts_elem = _element(response_base, 'Accounts')
+    if accounts_elem is None:
+        return []
+    return [{
+        'account_number': _text(account_data, 'AccountNumber'),
+        'account_type': _text(account_data, 'MajorAccountTypeCode'),
+        'product_code': _text(account_data, 'CurrentMinorAccountTypeCode'),
+        'balance': client.format_currency(_text(account_data, 'BalanceAmount')),
+        'available_balance': client.format_currency(_text(account_data, 'AvailableBalance')),
+        'date_opened': _text(account_data, 'DateAccountOpened'),
+        'status': _text(account_data, 'CurrentAccountStatusCode'),
+    } for account_data in _elements(accounts_elem, 'AccountTaxIdData')]
+
+
+def legacy_parse_member_info(client, content):
+    try:
+        root = ET.fromstring(content)
+        user_auth = root.find('.//core:UserAuthentication', NAMESPACES)
+        if user_auth is None:
+            return None
+        overall_successful = user_auth.find('core:WasSuccessful', NAMESPACES)
+        if overall_successful is None or overall_successful.text.lower() != 'true':
+            return None
+
+        response_base = next((resp for resp in root.findall('.//core:Responses/core:ResponseBase', NAMESPACES)
+                              if resp.get('{' + NAMESPACES['i'] + '}type') == 'GetTaxIdDataResponse'), None)
+        if response_base is None:
+            return None
+        specific_successful = response_base.find('a:WasSuccessful', NAMESPACES)
+        if specific_successful is not None:
+            specific_successful.text.lower()  # Raised (and returned None) on an empty WasSuccessful
+        person_data = response_base.find('core:Person', NAMESPACES)
+        if person_data is None:
+            return None
+
+        firstname = _text(person_data, 'FirstName')
+        lastname = _text(person_data, 'LastName')
+        is_deceased_raw = _text(person_data, 'IsDeceased')
+        date_birth = _text(person_data, 'DateBirth')
+
+        email = None
+        email_addresses = _element(person_data, 'EmailAddresses')
+        if email_addresses is not None:
+            for email_address in _elements(email_addresses, 'EmailAddress'):
+                email = _text(email_address, 'Email')
+                if email:
+                    break
+
+        phone_number = None
+        phones = _element(person_data, 'PersonPhones')
+        if phones is not None:
+            for phone in _elements(phones, 'GetTaxIdDataPhone'):
+                area_code, exchange, number = (_text(phone, name) for name in ('AreaCode', 'Exchange', 'Number'))
+                if area_code and exchange and number:
+                    phone_number = f"{area_code}{exchange}{number}"
+
+        address_str = city = state = zip_code = line1 = None
+        addresses = _element(person_data, 'PersonAddresses')
+        if addresses is not None:
+            address = _element(addresses, 'GetTaxIdDataPersonOrganizationAddress')
+            if address is not None:
+                addr_lines = _element(address, 'AddressLines')
+                if addr_lines is not None:
+                    line_elem = _element(addr_lines, 'GetTaxIdDataAddressLine')
+                    if line_elem is not None:
+                        line1 = _text(line_elem, 'AddressLineText')
+                city = _text(address, 'CityName')
+                state = _text(address, 'State')
+                zip_code = _text(address, 'ZipCode') or _text(address, 'ZipCd')
+                address_str = f"{line1 or ''}, {city or ''}, {state or ''} {zip_code or ''}".strip(', ')
+
+        is_employee = False
+        person_types = _element(person_data, 'PersonTypes')
+        if person_types is not None:
+            is_employee = any(_text(pt, 'PersonTypeCode') == 'EMP' for pt in _elements(person_types, 'PersonType'))
+
+        return {
+            'persnbr': _text(person_data, 'PersonNumber') or person_data.get('persNbr'),
+            'full_name': f"{firstname or ''} {lastname or ''}".strip(),
+            'firstname': firstname,
+            'lastname': lastname,
+            'adddate': _text(person_data, 'AddDate'),
+            'age': client.calculate_age(date_birth) if date_birth else None,
+            'last_updated': _text(person_data, 'LastUpdated'),
+            'is_active': (_text(person_data, 'MemberGroup') or '').lower() == 'live',
+            'is_deceased': is_deceased_raw == 'true' if is_deceased_raw is not None else None,
+            'member_number': _text(person_data, 'MemberNumber'),
+            'address': address_str or "N/A",
+            'city': city,
+            'state': state,
+            'zip_code': zip_code,
+            'accounts': legacy_parse_accounts(client, response_base),
+            'ssn': _text(person_data, 'TaxId'),
+            'email': email or "N/A",
+            'mobile_phone': phone_number or "N/A",
+            'date_of_birth': date_birth,
+            'is_employee': is_employee,
+        }
+    except Exception:
+        return None
+
+
+def assert_same(client, content):
+    assert client.parse_member_info(content) == legacy_parse_member_info(client, content)
+
+
+# --- Recorded responses ------------------------------------------------------------------------
+
+@pytest.mark.parametrize('path', RECORDINGS, ids=os.path.basename)
+def test_recorded_responses(dna, path):
+    with open(path, 'rb') as f:
+        assert_same(dna, f.read())
+
+
+def test_recorded_member(dna):
+    with open(os.path.join(os.path.dirname(__file__), 'recordings', '7725-100234.xml'), 'rb') as f:
+        member = dna.parse_member_info(f.read())
+    assert (member['member_number'], member['ssn'], member['mobile_phone']) == ('100234', '900112233', '6145550142')
+    assert member['address'] == '4410 Cedar Ln Apt 2, Columbus, OH 43215'
+    assert [acct['account_number'] for acct in member['accounts']] == ['100234501', '100234502', '100234503']
+    assert member['is_employee'] and member['is_active'] and member['is_deceased'] is False
+
+
+# --- stub_servers responses --------------------------------------------------------------------
+
+def test_stub_server_responses(dna):
+    stub = DNAStub(recordings_dir=None, missing_rate=0.1, accounts_per_member=4)
+    found = 0
+    for member_number in range(500100, 500160):
+        for method, reference in (('3', str(member_number)), ('4', '8' + str(member_number))):
+            content = stub._submit_response(stub._taxid_data(method, reference)).get_data()
+            assert_same(dna, content)
+            found += dna.parse_member_info(content) is not None
+    assert found
+
+
+# --- Randomized edge cases ---------------------------------------------------------------------
+
+_A = f'xmlns:a="{NAMESPACES["a"]}" xmlns:i="{NAMESPACES["i"]}"'
+
+
+def _field(rng, tag, value, prefix=None):
+    # Each field appears at most once, in either namespace; DNA does not send both
+    if rng.random() < 0.15:
+        return ''
+    prefix = prefix if prefix is not None else rng.choice(['', '', 'a:'])
+    value = rng.choice([value, value, value, ''])
+    return f'<{prefix}{tag}>{value}</{prefix}{tag}>'
+
+
+def _random_person(rng):
+    parts = [_field(rng, 'PersonNumber', '123'), _field(rng, 'FirstName', 'Ann'), _field(rng, 'LastName', 'Lee'),
+             _field(rng, 'IsDeceased', rng.choice(['true', 'false'])), _field(rng, 'LastUpdated', '2025-01-01'),
+             _field(rng, 'DateBirth', rng.choice(['1980-05-06T00:00:00', '1980-05-06'])),
+             _field(rng, 'AddDate', '2000-01-01'), _field(rng, 'MemberGroup', rng.choice(['LIVE', 'dead'])),
+             _field(rng, 'MemberNumber', '555'), _field(rng, 'TaxId', '111223333')]
+    if rng.random() < 0.8:
+        emails = ''.join(f'<EmailAddress>{_field(rng, "Email", email)}</EmailAddress>'
+                         for email in rng.sample(['x@y.z', 'q@w.e'], rng.randint(0, 2)))
+        parts.append(f'<EmailAddresses>{emails}</EmailAddresses>')
+    if rng.random() < 0.8:
+        phones = ''.join(f'<GetTaxIdDataPhone>{_field(rng, "UsageCode", "CELL")}{_field(rng, "AreaCode", "555")}'
+                         f'{_field(rng, "Exchange", str(100 + n))}{_field(rng, "Number", "1234")}</GetTaxIdDataPhone>'
+                         for n in range(rng.randint(0, 3)))
+        parts.append(f'<PersonPhones>{phones}</PersonPhones>')
+    if rng.random() < 0.8:
+        addresses = ''.join(
+            '<GetTaxIdDataPersonOrganizationAddress><AddressLines><GetTaxIdDataAddressLine>'
+            f'{_field(rng, "AddressLineText", "1 Main St")}</GetTaxIdDataAddressLine></AddressLines>'
+            f'{_field(rng, "CityName", "Town")}{_field(rng, "State", "MA")}'
+            f'{_field(rng, rng.choice(["ZipCode", "ZipCd"]), "02110")}</GetTaxIdDataPersonOrganizationAddress>'
+            for _ in range(rng.randint(0, 2)))
+        parts.append(f'<PersonAddresses>{addresses}</PersonAddresses>')
+    if rng.random() < 0.5:
+        person_types = ''.join(f'<PersonType>{_field(rng, "PersonTypeCode", code)}</PersonType>'
+                               for code in rng.sample(['EMP', 'MBR'], rng.randint(0, 2)))
+        parts.append(f'<PersonTypes>{person_types}</PersonTypes>')
+    rng.shuffle(parts)
+    return f'<Person persNbr="999">{"".join(parts)}</Person>'
+
+
+def _random_accounts(rng):
+    prefix = rng.choice(['', 'a:'])
+    accounts = ''.join(
+        f'<{prefix}AccountTaxIdData>' + ''.join(_field(rng, tag, value, prefix) for tag, value in (
+            ('AccountNumber', str(1000 + n)), ('MajorAccountTypeCode', 'SAV'), ('CurrentMinorAccountTypeCode', 'S1'),
+            ('BalanceAmount', rng.choice(['12.5', 'x', '0', '-3.456'])), ('AvailableBalance', '3'),
+            ('DateAccountOpened', '2001-01-01'), ('CurrentAccountStatusCode', 'ACT'))) + f'</{prefix}AccountTaxIdData>'
+        for n in range(rng.randint(0, 5)))
+    return f'<{prefix}Accounts>{accounts}</{prefix}Accounts>'
+
+
+def _random_response(rng, response_type):
+    was_successful = rng.choice(['<a:WasSuccessful>true</a:WasSuccessful>', '<a:WasSuccessful>false</a:WasSuccessful>', ''])
+    body = (_random_person(rng) if rng.random() < 0.9 else '') + (_random_accounts(rng) if rng.random() < 0.85 else '')
+    return f'<ResponseBase i:type="{response_type}">{was_successful}{body}</ResponseBase>'
+
+
+def _random_document(rng):
+    responses = ''.join(_random_response(rng, rng.choice(['GetTaxIdDataResponse'] * 2 + ['OtherResponse']))
+                        for _ in range(rng.randint(0, 2)))
+    user_auth = rng.choice(['', '<UserAuthentication><WasSuccessful>true</WasSuccessful></UserAuthentication>',
+                            '<UserAuthentication><WasSuccessful>true</WasSuccessful></UserAuthentication>',
+                            '<UserAuthentication><WasSuccessful>false</WasSuccessful><Errors><Error>'
+                            '<ErrorMessage>no</ErrorMessage></Error></Errors></UserAuthentication>'])
+    return ('<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+            '<SubmitRequestResponse xmlns="http://www.opensolutions.com/CoreApi"><SubmitRequestResult>'
+            f'<Responses {_A}>{responses}</Responses>{user_auth}</SubmitRequestResult>'
+            '</SubmitRequestResponse></s:Body></s:Envelope>')
+
+
+def test_randomized_responses(dna):
+    rng = random.Random(7725)
+    parsed = 0
+    for _ in range(1000):
+        content = _random_document(rng)
+        assert_same(dna, content)
+        parsed += dna.parse_member_info(content) is not None
+    assert parsed > 200
+
+
+def test_field_in_any_namespace(dna):
+    # The one intended difference: a field under an unexpected prefix is still read
+    content = ('<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+               '<SubmitRequestResponse xmlns="http://www.opensolutions.com/CoreApi"><SubmitRequestResult>'
+               f'<Responses {_A}><ResponseBase i:type="GetTaxIdDataResponse"><a:WasSuccessful>true</a:WasSuccessful>'
+               '<Person xmlns:x="urn:other"><x:FirstName>Ann</x:FirstName><MemberNumber>555</MemberNumber></Person>'
+               '</ResponseBase></Responses><UserAuthentication><WasSuccessful>true</WasSuccessful></UserAuthentication>'
+               '</SubmitRequestResult></SubmitRequestResponse></s:Body></s:Envelope>')
+    assert dna.parse_member_info(content)['firstname'] == 'Ann'
+    assert legacy_parse_member_info(dna, content)['firstname'] is None
@@ -0,0 +1,212 @@
+"""
+Parity of the streaming 7703 parser (dna_client._iter_transaction_history_events) with the tree-based
+parser it replaced, on recorded responses, stub_servers responses and randomized edge cases.
+"""
+import glob
+import os
+import random
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from stub_servers.dna import DNAStub
+
+RECORDINGS = sorted(glob.glob(os.path.join(os.path.dirname(__file__), 'recordings', '7703-*.xml')))
+
+NAMESPACES = {
+    's': 'http://schemas.xmlsoap.org/soap/envelope/',
+    'core': 'http://www.opensolutions.com/CoreApi',
+    'a': 'http://schemas.datacontract.org/2004/07/OpenSolutions.CoreApiService.Services.Messages',
+    'i': 'http://www.w3.org/2001/XMLSchema-instance',
+}
+RTXN_FIELDS = ('ActivityDateTime', 'TransactionAmount', 'RtxnTypeCode', 'ExternalRtxnDescription',
+               'RtxnDescription', 'RtxnSourceCd')
+
+
+# --- The tree parser as it was before the streaming rewrite ------------------------------------
+# Rtxn elements are turned into transactions with the client's own _transaction_from_fields, so only
+# the document traversal (which Rtxns, which responses, success flags, fallbacks) is compared here.
+
+def _safe_find(element, path):
+    found = element.find(path, NAMESPACES)
+    return found.text if found is not None else None
+
+
+def _tree_parse_response_base(client, response_base, root=None):
+    successful = response_base.find('a:WasSuccessful', NAMESPACES)
+    if successful is not None and successful.text.lower() != 'true':
+        return None
+    rtxns = response_base.findall('.//a:Rtxn', NAMESPACES)
+    if not rtxns and root is not None:
+        rtxns = root.findall('.//a:Rtxn', NAMESPACES)
+    return [client._transaction_from_fields({name: _safe_find(rtxn, 'a:' + name) for name in RTXN_FIELDS})
+            for rtxn in rtxns]
+
+
+def _tree_overall_ok(root):
+    user_auth = root.find('.//core:UserAuthentication', NAMESPACES)
+    if user_auth is None:
+        return True
+    successful = user_auth.find('core:WasSuccessful', NAMESPACES)
+    return successful is not None and successful.text.lower() == 'true'
+
+
+def _history_responses(root):
+    return [resp for resp in root.findall('.//core:Responses/core:ResponseBase', NAMESPACES)
+            if resp.get('{' + NAMESPACES['i'] + '}type') == 'AccountTransactionHistoryResponse']
+
+
+def tree_parse(client, content):
+    try:
+        root = ET.fromstring(content)
+        if not _tree_overall_ok(root):
+            return None
+        responses = _history_responses(root)
+        if not responses:
+            return None
+        return _tree_parse_response_base(client, responses[0], root)
+    except Exception:
+        return None
+
+
+def tree_parse_bulk(client, content, account_numbers):
+    try:
+        root = ET.fromstring(content)
+        if not _tree_overall_ok(root):
+            return None
+        results = {acct: None for acct in account_numbers}
+        for index, response_base in enumerate(_history_responses(root)):
+            reference = _safe_find(response_base, 'a:ReferenceNumber')
+            if reference in results:
+                acct = reference
+            elif index < len(account_numbers):
+                acct = account_numbers[index]
+            else:
+                continue
+            try:
+                results[acct] = _tree_parse_response_base(client, response_base)
+            except Exception:
+                pass
+        return results
+    except Exception:
+        return None
+
+
+def rows(transactions):
+    """Comparable form of a parse result (Transaction has no __eq__)."""
+    if transactions is None:
+        return None
+    if isinstance(transactions, dict):
+        return {acct: rows(txns) for acct, txns in transactions.items()}
+    return [(tx.to_dict(), tx.amount_cents) for tx in transactions]
+
+
+def assert_same(client, content, account_numbers):
+    assert rows(client.parse_financial_transactions(content)) == rows(tree_parse(client, content))
+    assert (rows(client.parse_financial_transactions_bulk(content, account_numbers))
+            == rows(tree_parse_bulk(client, content, account_numbers)))
+
+
+# --- Recorded responses ------------------------------------------------------------------------
+
+@pytest.mark.parametrize('path', RECORDINGS, ids=os.path.basename)
+def test_recorded_responses(dna, path):
+    with open(path, 'rb') as f:
+        content = f.read()
+    assert_same(dna, content, ['100234501', '100234502', '100234503'])
+
+
+def test_recordings_cover_success_failure_and_bulk(dna):
+    parsed = {}
+    for path in RECORDINGS:
+        with open(path, 'rb') as f:
+            parsed[os.path.basename(path)] = dna.parse_financial_transactions(f.read())
+    assert len(parsed['7703-100234501.xml']) == 6
+    assert parsed['7703-100234599.xml'] is None
+    with open(os.path.join(os.path.dirname(__file__), 'recordings', '7703-bulk-100234501-100234502.xml'), 'rb') as f:
+        bulk = dna.parse_financial_transactions_bulk(f.read(), ['100234501', '100234502', '100234503'])
+    assert [len(bulk['100234501']), len(bulk['100234502']), bulk['100234503']] == [2, 1, None]
+
+
+# --- stub_servers responses --------------------------------------------------------------------
+
+def _stub_response(stub, accounts, limit):
+    fragments = ''.join(stub._transaction_history({'AccountNumber': acct, 'ReferenceNumber': acct,
+                                                   'MaxReturnCount': str(limit)}) for acct in accounts)
+    return stub._submit_response(fragments).get_data()
+
+
+@pytest.mark.parametrize('limit', [1, 10, 50])
+def test_stub_server_responses(dna, limit):
+    stub = DNAStub(recordings_dir=None)
+    for first in range(20):
+        accounts = [str(200000 + first * 7 + n) for n in range(1 + first % 4)]
+        content = _stub_response(stub, accounts, limit)
+        assert_same(dna, content, accounts)
+        # Accounts matched by position when DNA does not echo the reference number
+        assert_same(dna, content, [acct + '-x' for acct in accounts])
+
+
+def test_stub_server_auth_failure(dna):
+    content = DNAStub._submit_response('', auth_error='Invalid or expired credentials').get_data()
+    assert dna.parse_financial_transactions(content) is None
+    assert tree_parse(dna, content) is None
+    assert_same(dna, content, ['1'])
+
+
+# --- Randomized edge cases ---------------------------------------------------------------------
+
+_A = f'xmlns:a="{NAMESPACES["a"]}" xmlns:i="{NAMESPACES["i"]}"'
+
+
+def _random_rtxn(rng):
+    parts = []
+    if rng.random() < 0.9:
+        parts.append(f'<a:ActivityDateTime>{rng.choice(["2024-05-01T10:00:00.123", "2024-05-02", "", "2024-05-03T08:01:02"])}</a:ActivityDateTime>')
+    if rng.random() < 0.9:
+        parts.append(f'<a:TransactionAmount>{rng.choice(["-12.5", "3", "abc", "", "0.01", "1999.99"])}</a:TransactionAmount>')
+    if rng.random() < 0.9:
+        parts.append(f'<a:RtxnTypeCode>{rng.choice(["DEP", "WTH", "X"])}</a:RtxnTypeCode>')
+    if rng.random() < 0.5:
+        parts.append(f'<a:ExternalRtxnDescription>{rng.choice(["Ext &amp; co", ""])}</a:ExternalRtxnDescription>')
+    if rng.random() < 0.5:
+        parts.append('<a:RtxnDescription>Internal</a:RtxnDescription>')
+    if rng.random() < 0.5:
+        parts.append('<a:RtxnSourceCd>BR</a:RtxnSourceCd>')
+    rng.shuffle(parts)
+    return '<a:Rtxn>' + ''.join(parts) + '</a:Rtxn>'
+
+
+def _random_response(rng, response_type):
+    flag = rng.choice(['true', 'true', 'true', 'false', 'TRUE', None])
+    was_successful = f'<a:WasSuccessful>{flag}</a:WasSuccessful>' if flag is not None else ''
+    errors = '<a:Errors><a:Error><a:ErrorMessage>bad</a:ErrorMessage></a:Error></a:Errors>' if flag == 'false' else ''
+    reference = f'<a:ReferenceNumber>{rng.choice(["1", "2", "3", "9"])}</a:ReferenceNumber>' if rng.random() < 0.5 else ''
+    rtxns = ''.join(_random_rtxn(rng) for _ in range(rng.randint(0, 6)))
+    body = rng.choice([f'<a:Rtxns>{rtxns}</a:Rtxns>', rtxns])
+    return f'<ResponseBase i:type="{response_type}">{errors}{reference}{was_successful}{body}</ResponseBase>'
+
+
+def _random_document(rng):
+    responses = ''.join(_random_response(rng, rng.choice(['AccountTransactionHistoryResponse'] * 2 + ['OtherResponse']))
+                        for _ in range(rng.randint(0, 3)))
+    user_auth = rng.choice(['', '<UserAuthentication><WasSuccessful>true</WasSuccessful></UserAuthentication>',
+                            '<UserAuthentication><WasSuccessful>false</WasSuccessful></UserAuthentication>',
+                            '<UserAuthentication></UserAuthentication>'])
+    orphan = f'<Extra {_A}>{_random_rtxn(rng)}</Extra>' if rng.random() < 0.3 else ''
+    return ('<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+            '<SubmitRequestResponse xmlns="http://www.opensolutions.com/CoreApi"><SubmitRequestResult>'
+            f'<Responses {_A}>{responses}</Responses>{user_auth}</SubmitRequestResult>{orphan}'
+            '</SubmitRequestResponse></s:Body></s:Envelope>')
+
+
+def test_randomized_responses(dna):
+    rng = random.Random(7703)
+    for _ in range(500):
+        assert_same(dna, _random_document(rng), ['1', '2', '3'])
+
+
+def test_malformed_xml(dna):
+    for content in (b'', b'<bad', b'<s:Envelope xmlns:s="x"><s:Body></s:Envelope>'):
+        assert dna.parse_financial_transactions(content) is None
+        assert dna.parse_financial_transactions_bulk(content, ['1']) is None
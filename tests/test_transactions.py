@@ -0,0 +1,139 @@
+"""
+Transaction records against the dicts the 7703 parser produced before them: to_dict() must give the
+UI the same amount, date and time strings, and repeated codes must share one interned string.
+"""
+import glob
+import itertools
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from stub_servers import synthetic
+from transactions import Transaction, format_cents, parse_amount_cents
+
+RECORDINGS = sorted(glob.glob(os.path.join(os.path.dirname(__file__), 'recordings', '7703-*.xml')))
+NS_MESSAGES = '{http://schemas.datacontract.org/2004/07/OpenSolutions.CoreApiService.Services.Messages}'
+RTXN_FIELDS = ('ActivityDateTime', 'TransactionAmount', 'RtxnTypeCode', 'ExternalRtxnDescription',
+               'RtxnDescription', 'RtxnSourceCd')
+
+
+def legacy_transaction_dict(fields, descriptions):
+    """The per-Rtxn dict the parser built before Transaction records."""
+    act_date_time = fields.get('ActivityDateTime')
+    date, time = act_date_time.split('T') if act_date_time and 'T' in act_date_time else (act_date_time, None)
+
+    amount = fields.get('TransactionAmount')
+    formatted_amount = "$0.00"
+    if amount:
+        try:
+            amount_float = float(amount)
+            formatted_amount = f"${abs(amount_float):.2f}"
+            if amount_float < 0:
+                formatted_amount = f"-{formatted_amount}"
+        except ValueError:
+            pass
+
+    transaction_type = fields.get('RtxnTypeCode')
+    description = fields.get('ExternalRtxnDescription')
+    if not description:
+        description = fields.get('RtxnDescription')
+        if not description:
+            description = descriptions.get(transaction_type, f'Type: {transaction_type}')
+
+    return {
+        'date': date,
+        'time': time.split('.')[0] if time else None,
+        'amount': formatted_amount,
+        'transaction_type': transaction_type,
+        'description': description,
+        'source': fields.get('RtxnSourceCd'),
+    }
+
+
+def recorded_fields():
+    for path in RECORDINGS:
+        for rtxn in ET.parse(path).getroot().iter(NS_MESSAGES + 'Rtxn'):
+            fields = {}
+            for child in rtxn:
+                name = child.tag[len(NS_MESSAGES):]
+                if name in RTXN_FIELDS:
+                    fields.setdefault(name, child.text)
+            yield fields
+
+
+def synthetic_fields():
+    for account in range(300100, 300140):
+        yield from synthetic.transactions(account, 50)
+
+
+def assert_matches_legacy(dna, fields):
+    assert dna._transaction_from_fields(fields).to_dict() == legacy_transaction_dict(fields, dna.transaction_type_descriptions)
+
+
+def test_recorded_transactions(dna):
+    fields = list(recorded_fields())
+    assert fields
+    for txn_fields in fields:
+        assert_matches_legacy(dna, txn_fields)
+
+
+def test_stub_server_transactions(dna):
+    for txn_fields in synthetic_fields():
+        assert_matches_legacy(dna, txn_fields)
+
+
+@pytest.mark.parametrize('amount', [
+    None, '', '0', '0.00', '3', '-12.5', '12.50', '0.01', '-0.01', '-0.1', '1999.99', '-1999.99', '1234567.89',
+    '+5', '1e2', '  7.25 ', 'abc', '12,50', '-0',
+])
+def test_amount_formatting(dna, amount):
+    assert_matches_legacy(dna, {'TransactionAmount': amount, 'RtxnTypeCode': 'DEP'})
+
+
+@pytest.mark.parametrize('activity', [
+    None, '2024-05-01', '2024-05-01T13:45:10', '2024-05-01T13:45:10.123', '2024-05-01T00:00:00.000',
+    '2024-12-31T23:59:59.9999999', '2024-02-29T06:07:08.5',
+])
+def test_dates_and_times(dna, activity):
+    assert_matches_legacy(dna, {'ActivityDateTime': activity, 'TransactionAmount': '1'})
+
+
+def test_descriptions(dna):
+    for external, internal, code in itertools.product([None, '', 'Ext &amp; co'], [None, '', 'Internal'],
+                                                      [None, 'DEP', 'ZZZ']):
+        assert_matches_legacy(dna, {'ExternalRtxnDescription': external, 'RtxnDescription': internal,
+                                    'RtxnTypeCode': code})
+
+
+@pytest.mark.parametrize('activity', ['', 'not-a-dateTgarbage', '2024-13-01T10:00:00'])
+def test_unusable_dates_become_none(activity):
+    # The dicts echoed whatever DNA sent ('' included); records keep only what parses, so both the
+    # date filters and the UI see None
+    tx = Transaction.from_activity(activity, 100, 'DEP', 'Deposit', None)
+    assert tx.date is None
+    assert tx.to_dict()['date'] is None
+
+
+def test_sub_cent_amounts_round_half_up():
+    # DNA amounts have two decimals; anything finer rounds half-up instead of through a binary float
+    assert format_cents(parse_amount_cents('0.125')) == '$0.13'
+    assert format_cents(parse_amount_cents('-0.125')) == '-$0.13'
+    assert format_cents(parse_amount_cents('2.675')) == '$2.68'
+
+
+def test_type_and_source_codes_are_interned(dna):
+    # Build the codes at runtime so they are distinct objects before interning
+    first = dna._transaction_from_fields({'RtxnTypeCode': ''.join(['D', 'EP']), 'RtxnSourceCd': ''.join(['TE', 'LL'])})
+    second = dna._transaction_from_fields({'RtxnTypeCode': ''.join(['DE', 'P']), 'RtxnSourceCd': ''.join(['T', 'ELL'])})
+    assert first.transaction_type is second.transaction_type is sys.intern('DEP')
+    assert first.source is second.source is sys.intern('TELL')
+    empty = dna._transaction_from_fields({'RtxnTypeCode': None, 'RtxnSourceCd': ''})
+    assert (empty.transaction_type, empty.source) == (None, '')
+
+
+def test_records_have_no_instance_dict():
+    tx = Transaction.from_activity('2024-05-01T13:45:10', -1250, 'WTH', 'Withdraw', 'TELL')
+    assert not hasattr(tx, '__dict__')
+    assert tx.amount == '-$12.50'
@@ -0,0 +1,128 @@
+import sys
+from datetime import date as Date, time as Time
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+def parse_amount_cents(amount):
+    """Converts a DNA amount string such as '-12.5' to integer cents. Raises ValueError if it is not a number."""
+    try:
+        return int((Decimal(amount) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+    except (InvalidOperation, TypeError, OverflowError) as e:
+        raise ValueError(f"invalid amount: {amount!r}") from e
+
+
+def format_cents(cents):
+    """Formats integer cents the way the UI shows amounts: '$12.50' or '-$12.50'."""
+    sign = '-' if cents < 0 else ''
+    dollars, remainder = divmod(abs(cents), 100)
+    return f"{sign}${dollars}.{remainder:02d}"
+
+
+def _intern(value):
+    return sys.intern(value) if value else value
+
+
+class Transaction:
+    """
+    One account transaction as cached per member. Amounts are integer cents, the posting date and time
+    are parsed once, and type/source codes are interned so the many repeated codes share one string.
+    Display strings are produced on access (amount) or by to_dict() for JSON.
+    """
+
+    __slots__ = ('date', 'time', 'amount_cents', 'transaction_type', 'description', 'source')
+
+    def __init__(self, date, time, amount_cents, transaction_type, description, source):
+        self.date = date                    # datetime.date, or None if DNA sent no usable date
+        self.time = time                    # datetime.time without microseconds, or None
+        self.amount_cents = amount_cents
+        self.transaction_type = _intern(transaction_type)
+        self.description = description
+        self.source = _intern(source)
+
+    @classmethod
+    def from_activity(cls, activity_date_time, amount_cents, transaction_type, description, source):
+        """Builds a transaction from DNA's ActivityDateTime text (e.g. '2024-05-01T13:45:10.123')."""
+        tx_date = tx_time = None
+        if activity_date_time:
+            date_text, _, time_text = activity_date_time.partition('T')
+            try:
+                tx_date = Date.fromisoformat(date_text)
+            except ValueError:
+                pass
+            if time_text:
+                try:
+                    tx_time = Time.fromisoformat(time_text.split('.')[0])
+                except ValueError:
+                    pass
+        return cls(tx_date, tx_time, amount_cents, transaction_type, description, source)
+
+    @property
+    def amount(self):
+        """Display amount, e.g. '-$12.50'."""
+        return format_cents(self.amount_cents)
+
+    def to_dict(self):
+        """Returns the JSON shape the UI has always used (formatted amount, ISO date and time strings)."""
+        return {
+            'date': self.date.isoformat() if self.date else None,
+            'time': self.time.isoformat() if self.time else None,
+            'amount': self.amount,
+            'transaction_type': self.transaction_type,
+            'description': self.description,
+            'source': self.source,
+        }
+
+    def __repr__(self):
+        return f"Transaction({self.date}, {self.amount}, {self.transaction_type!r}, {self.description!r})"
+
+
+def _sort_key(transaction):
+    return transaction.date, transaction.time or Time()
+
+
+def _identity(transaction):
+    return (transaction.date, transaction.time, transaction.amount_cents, transaction.transaction_type,
+            transaction.description, transaction.source)
+
+
+def merge_recent_transactions(cached, recent, window, limit):
+    """
+    Merges a fresh "newest window transactions" fetch into a cached history (both newest first).
+
+    The newest ActivityDateTime in cached is the watermark: transactions in recent after it are new,
+    and ones at exactly the watermark are new only beyond the copies already cached. Returns the merged
+    list (new transactions first, capped at max(limit, len(cached))), or None when the histories cannot
+    be stitched together and a full fetch is needed: recent holds a full window that does not reach
+    back past the watermark (more may have posted in between), or dates are missing.
+    """
+    if not recent:
+        # DNA returned nothing for the account; trust it only if nothing was cached either
+        return [] if not cached else None
+    if not cached:
+        return list(recent) if len(recent) < window else None
+    if any(tx.date is None for tx in cached) or any(tx.date is None for tx in recent):
+        return None
+
+    watermark = max(_sort_key(tx) for tx in cached)
+    if len(recent) >= window and min(_sort_key(tx) for tx in recent) >= watermark:
+        return None  # The window may not reach back to everything posted since the watermark
+
+    at_watermark = {}
+    for tx in cached:
+        if _sort_key(tx) == watermark:
+            key = _identity(tx)
+            at_watermark[key] = at_watermark.get(key, 0) + 1
+    new = []
+    for tx in recent:
+        sort_key = _sort_key(tx)
+        if sort_key > watermark:
+            new.append(tx)
+        elif sort_key == watermark:
+            key = _identity(tx)
+            if at_watermark.get(key, 0) > 0:
+                at_watermark[key] -= 1
+            else:
+                new.append(tx)
+    if not new:
+        return cached
+    return (new + list(cached))[:max(limit, len(cached))]